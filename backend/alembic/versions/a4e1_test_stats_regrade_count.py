@@ -0,0 +1,28 @@
+"""
+regrade counter on test_stats
+
+test_stats.regrade_count is bumped by every regrade, so the item analysis
+cache version changes even when a regrade leaves every counter (and thus
+updated_at) untouched.
+
+Revision ID: a4e1_test_stats_regrade_count
+Revises: f3d9_submission_lease_token
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a4e1_test_stats_regrade_count'
+down_revision = 'f3d9_submission_lease_token'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('test_stats', sa.Column('regrade_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('test_stats', 'regrade_count')
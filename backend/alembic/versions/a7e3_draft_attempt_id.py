@@ -0,0 +1,34 @@
+"""
+tag answer drafts with their attempt session
+
+Nullable answer_drafts.attempt_id (no table rewrite). Drafts are only read
+for the attempt they were saved in; untagged rows from before this revision
+are ignored and replaced by the next autosave.
+
+Revision ID: a7e3_draft_attempt_id
+Revises: f5c1_exam_windows
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a7e3_draft_attempt_id'
+down_revision = 'f5c1_exam_windows'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'answer_drafts',
+        sa.Column(
+            'attempt_id', sa.Integer(),
+            sa.ForeignKey('attempt_sessions.id', ondelete='CASCADE'), nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('answer_drafts', 'attempt_id')
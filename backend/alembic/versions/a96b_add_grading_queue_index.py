@@ -0,0 +1,39 @@
+"""
+add partial index for the manual grading queue
+
+Covers answers with is_correct IS NULL ordered by (created_at, id); built
+CONCURRENTLY so the answers table stays writable.
+
+Revision ID: a96b_grading_queue_index
+Revises: f74a_test_stats
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a96b_grading_queue_index'
+down_revision = 'f74a_test_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_answers_pending_created_at_id', 'answers', ['created_at', 'id'],
+            postgresql_where=sa.text('is_correct IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_answers_pending_created_at_id', table_name='answers',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
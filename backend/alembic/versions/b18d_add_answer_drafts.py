@@ -0,0 +1,33 @@
+"""
+add answer_drafts for server-side autosave of in-progress attempts
+
+Rows are written in batches by the draft flusher from the Redis hashes that
+receive every autosave, so the table holds one compact row per attempt.
+
+Revision ID: b18d_answer_drafts
+Revises: a96b_grading_queue_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b18d_answer_drafts'
+down_revision = 'a96b_grading_queue_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'answer_drafts',
+        sa.Column('test_id', sa.Integer(), sa.ForeignKey('tests.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('answers', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('answer_drafts')
@@ -0,0 +1,51 @@
+"""
+page the manual grading queue by answer id
+
+Replaces the partial (created_at, id) index on pending answers with one on
+id alone, matching the id-only keyset of the queue. Both are built and
+dropped CONCURRENTLY so the answers table stays writable.
+
+Revision ID: b7c3_grading_queue_id_index
+Revises: a4e1_test_stats_regrade_count
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b7c3_grading_queue_id_index'
+down_revision = 'a4e1_test_stats_regrade_count'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_answers_pending_id', 'answers', ['id'],
+            postgresql_where=sa.text('is_correct IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_answers_pending_created_at_id', table_name='answers',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_answers_pending_created_at_id', 'answers', ['created_at', 'id'],
+            postgresql_where=sa.text('is_correct IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_answers_pending_id', table_name='answers',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
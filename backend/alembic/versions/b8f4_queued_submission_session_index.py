@@ -0,0 +1,37 @@
+"""
+index queued submissions by attempt session
+
+A retried asynchronous submit whose response was lost finds its queued
+submission through the attempt session. Built CONCURRENTLY.
+
+Revision ID: b8f4_submission_session_index
+Revises: a7e3_draft_attempt_id
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = 'b8f4_submission_session_index'
+down_revision = 'a7e3_draft_attempt_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_queued_submissions_attempt_session_id', 'queued_submissions', ['attempt_session_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_queued_submissions_attempt_session_id', table_name='queued_submissions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
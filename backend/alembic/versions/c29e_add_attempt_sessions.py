@@ -0,0 +1,59 @@
+"""
+add attempt_sessions and link queued submissions to their session
+
+An attempt session records the server start time, deadline and status of a
+started attempt; a partial unique index keeps one active session per
+(test, student). Redis holds the hot copy, this table is the durable one.
+
+Revision ID: c29e_attempt_sessions
+Revises: b18d_answer_drafts
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c29e_attempt_sessions'
+down_revision = 'b18d_answer_drafts'
+branch_labels = None
+depends_on = None
+
+
+STATUSES = ('active', 'submitted', 'expired')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attempt_sessions',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('test_id', sa.Integer(), sa.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deadline_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('status', sa.Enum(*STATUSES, name='attemptstatus'), nullable=False, server_default='active'),
+        sa.Column('result_id', sa.Integer(), sa.ForeignKey('test_results.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'uq_attempt_sessions_active_test_id_student_id', 'attempt_sessions', ['test_id', 'student_id'],
+        unique=True,
+        postgresql_where=sa.text("status = 'active'"),
+    )
+    op.create_index('ix_attempt_sessions_student_id_status', 'attempt_sessions', ['student_id', 'status'])
+    op.add_column(
+        'queued_submissions',
+        sa.Column(
+            'attempt_session_id', sa.Integer(),
+            sa.ForeignKey('attempt_sessions.id', ondelete='SET NULL'), nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('queued_submissions', 'attempt_session_id')
+    op.drop_index('ix_attempt_sessions_student_id_status', table_name='attempt_sessions')
+    op.drop_index('uq_attempt_sessions_active_test_id_student_id', table_name='attempt_sessions')
+    op.drop_table('attempt_sessions')
+    sa.Enum(name='attemptstatus').drop(op.get_bind())
@@ -0,0 +1,48 @@
+"""
+add queued submissions outbox for asynchronous grading
+
+Also merges the student-profile and grade-settings heads.
+
+Revision ID: c41d_queued_submissions
+Revises: 2ac_student_profile, b97c_grade_settings
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c41d_queued_submissions'
+down_revision = ('2ac_student_profile', 'b97c_grade_settings')
+branch_labels = None
+depends_on = None
+
+
+STATUSES = ('queued', 'processing', 'completed', 'failed')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'queued_submissions',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('test_id', sa.Integer(), sa.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('status', sa.Enum(*STATUSES, name='submissionstatus'), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('error_code', sa.Integer(), nullable=True),
+        sa.Column('result_id', sa.Integer(), sa.ForeignKey('test_results.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_queued_submissions_status_id', 'queued_submissions', ['status', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_queued_submissions_status_id', table_name='queued_submissions')
+    op.drop_table('queued_submissions')
+    sa.Enum(name='submissionstatus').drop(op.get_bind())
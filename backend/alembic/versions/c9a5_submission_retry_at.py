@@ -0,0 +1,28 @@
+"""
+add retry_at to queued submissions
+
+Submissions whose grading failed unexpectedly are requeued with a backoff;
+nullable queued_submissions.retry_at (no table rewrite) holds the earliest
+next claim.
+
+Revision ID: c9a5_submission_retry_at
+Revises: b8f4_submission_session_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c9a5_submission_retry_at'
+down_revision = 'b8f4_submission_session_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('queued_submissions', sa.Column('retry_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('queued_submissions', 'retry_at')
@@ -0,0 +1,39 @@
+"""
+index the blob digests referenced by answers
+
+Partial expression index on answers.answer_data ->> 'file_sha256' for the
+sweep deleting blobs no answer references; built CONCURRENTLY.
+
+Revision ID: d1b7_answer_file_sha256_index
+Revises: c9a5_submission_retry_at
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd1b7_answer_file_sha256_index'
+down_revision = 'c9a5_submission_retry_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_answers_file_sha256', 'answers', [sa.text("(answer_data ->> 'file_sha256')")],
+            postgresql_where=sa.text("(answer_data ->> 'file_sha256') IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_answers_file_sha256', table_name='answers',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,39 @@
+"""
+add partial index on deadlines of active attempt sessions
+
+Serves the deadline worker's sweep for overdue attempts, the backstop for
+schedules lost by Redis; built CONCURRENTLY so attempts can keep starting.
+
+Revision ID: d3af_attempt_deadline_index
+Revises: c29e_attempt_sessions
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd3af_attempt_deadline_index'
+down_revision = 'c29e_attempt_sessions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_attempt_sessions_active_deadline_at', 'attempt_sessions', ['deadline_at'],
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_attempt_sessions_active_deadline_at', table_name='attempt_sessions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
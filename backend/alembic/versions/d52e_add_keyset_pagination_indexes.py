@@ -0,0 +1,51 @@
+"""
+add (timestamp, id) indexes for keyset pagination of listings
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL so large tables stay
+writable during the migration.
+
+Revision ID: d52e_keyset_indexes
+Revises: c41d_queued_submissions
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = 'd52e_keyset_indexes'
+down_revision = 'c41d_queued_submissions'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_tests_created_at_id', 'tests', ['created_at', 'id']),
+    ('ix_tests_creator_id_created_at_id', 'tests', ['creator_id', 'created_at', 'id']),
+    ('ix_test_results_completed_at_id', 'test_results', ['completed_at', 'id']),
+    ('ix_test_results_student_id_completed_at_id', 'test_results', ['student_id', 'completed_at', 'id']),
+    ('ix_test_results_test_id_completed_at_id', 'test_results', ['test_id', 'completed_at', 'id']),
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+    ('ix_groups_created_at_id', 'groups', ['created_at', 'id']),
+    ('ix_groups_creator_id_created_at_id', 'groups', ['creator_id', 'created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,28 @@
+"""
+record when each draft answer was saved
+
+Nullable answer_drafts.answer_saved_at (no table rewrite): per-question save
+times used to merge the stored draft with the Redis copy. Answers stored
+before this revision count as the oldest saves.
+
+Revision ID: e2c8_draft_answer_saved_at
+Revises: d1b7_answer_file_sha256_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e2c8_draft_answer_saved_at'
+down_revision = 'd1b7_answer_file_sha256_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('answer_drafts', sa.Column('answer_saved_at', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('answer_drafts', 'answer_saved_at')
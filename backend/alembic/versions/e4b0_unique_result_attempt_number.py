@@ -0,0 +1,72 @@
+"""
+make attempt numbers unique per test and student
+
+Retried submissions used to record the same attempt twice. Existing
+duplicates are renumbered in completion order, then a unique index on
+test_results (test_id, student_id, attempt_number) replaces the
+(test_id, student_id) index it extends; both built CONCURRENTLY.
+
+Revision ID: e4b0_unique_attempt_number
+Revises: d3af_attempt_deadline_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e4b0_unique_attempt_number'
+down_revision = 'd3af_attempt_deadline_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only (test, student) pairs holding a duplicate number are renumbered
+    op.execute(sa.text("""
+        UPDATE test_results
+        SET attempt_number = numbered.attempt_number
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY test_id, student_id ORDER BY completed_at, id
+            ) AS attempt_number
+            FROM test_results
+            WHERE (test_id, student_id) IN (
+                SELECT test_id, student_id
+                FROM test_results
+                GROUP BY test_id, student_id, attempt_number
+                HAVING count(*) > 1
+            )
+        ) AS numbered
+        WHERE test_results.id = numbered.id
+          AND test_results.attempt_number <> numbered.attempt_number
+    """))
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_test_results_test_id_student_id_attempt_number', 'test_results',
+            ['test_id', 'student_id', 'attempt_number'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_test_results_test_id_student_id', table_name='test_results',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_test_results_test_id_student_id', 'test_results', ['test_id', 'student_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'uq_test_results_test_id_student_id_attempt_number', table_name='test_results',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,53 @@
+"""
+add composite indexes for hot query shapes
+
+Covers attempt counting on test_results (test_id, student_id), answer and
+question/option loading by parent id, and student-side lookups on
+test_assignments and group_memberships. (student_id, completed_at) on
+test_results already exists from d52e. Built with CREATE INDEX CONCURRENTLY
+on PostgreSQL; verify plans with check_query_plans.py.
+
+Revision ID: e63f_hot_query_indexes
+Revises: d52e_keyset_indexes
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = 'e63f_hot_query_indexes'
+down_revision = 'd52e_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_test_results_test_id_student_id', 'test_results', ['test_id', 'student_id']),
+    ('ix_answers_test_result_id', 'answers', ['test_result_id']),
+    ('ix_answers_question_id', 'answers', ['question_id']),
+    ('ix_questions_test_id_id', 'questions', ['test_id', 'id']),
+    ('ix_question_options_question_id', 'question_options', ['question_id']),
+    ('ix_test_assignments_student_id_test_id', 'test_assignments', ['student_id', 'test_id']),
+    ('ix_group_memberships_student_id', 'group_memberships', ['student_id']),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,28 @@
+"""
+lease token on queued submissions
+
+Nullable queued_submissions.lease_token (no table rewrite), set on every
+claim. A worker records a submission's outcome only while it still holds the
+lease, so a requeued slow row is not graded twice.
+
+Revision ID: f3d9_submission_lease_token
+Revises: e2c8_draft_answer_saved_at
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f3d9_submission_lease_token'
+down_revision = 'e2c8_draft_answer_saved_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('queued_submissions', sa.Column('lease_token', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('queued_submissions', 'lease_token')
@@ -0,0 +1,44 @@
+"""
+add exam windows to tests
+
+Nullable tests.exam_opens_at / exam_closes_at (no table rewrite) and a
+partial index on opening times for the cache warm-up, built CONCURRENTLY.
+
+Revision ID: f5c1_exam_windows
+Revises: e4b0_unique_attempt_number
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f5c1_exam_windows'
+down_revision = 'e4b0_unique_attempt_number'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tests', sa.Column('exam_opens_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tests', sa.Column('exam_closes_at', sa.DateTime(timezone=True), nullable=True))
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tests_exam_opens_at', 'tests', ['exam_opens_at'],
+            postgresql_where=sa.text("exam_opens_at IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tests_exam_opens_at', table_name='tests',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('tests', 'exam_closes_at')
+    op.drop_column('tests', 'exam_opens_at')
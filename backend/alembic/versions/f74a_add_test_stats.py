@@ -0,0 +1,74 @@
+"""
+add test_stats rollup of per-test result statistics
+
+The table is backfilled from test_results; afterwards it is maintained by
+the application in the same transaction as every result change.
+``python rebuild_test_stats.py`` recomputes it if it ever drifts.
+
+Revision ID: f74a_test_stats
+Revises: e63f_hot_query_indexes
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f74a_test_stats'
+down_revision = 'e63f_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+HISTOGRAM_BUCKETS = 10
+BUCKET_WIDTH = 100 // HISTOGRAM_BUCKETS
+
+
+def _bucket_condition(index: int) -> str:
+    if index == 0:
+        return f"score < {BUCKET_WIDTH}"
+    if index == HISTOGRAM_BUCKETS - 1:
+        return f"score >= {index * BUCKET_WIDTH}"
+    return f"score >= {index * BUCKET_WIDTH} AND score < {(index + 1) * BUCKET_WIDTH}"
+
+
+def upgrade() -> None:
+    op.create_table(
+        'test_stats',
+        sa.Column('test_id', sa.Integer(), sa.ForeignKey('tests.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unique_students', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pending_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('graded_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('passes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        *[
+            sa.Column(f'bucket_{index}', sa.Integer(), nullable=False, server_default='0')
+            for index in range(HISTOGRAM_BUCKETS)
+        ],
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    )
+
+    graded = "status <> 'pending_manual'"
+    buckets = [f'bucket_{index}' for index in range(HISTOGRAM_BUCKETS)]
+    bucket_counts = [
+        f"COUNT(*) FILTER (WHERE {graded} AND {_bucket_condition(index)})"
+        for index in range(HISTOGRAM_BUCKETS)
+    ]
+    op.execute(
+        "INSERT INTO test_stats (test_id, attempts, unique_students, pending_count, graded_count, passes, "
+        f"score_sum, score_sq_sum, {', '.join(buckets)}) "
+        "SELECT test_id, COUNT(*), COUNT(DISTINCT student_id), "
+        "COUNT(*) FILTER (WHERE status = 'pending_manual'), "
+        f"COUNT(*) FILTER (WHERE {graded}), "
+        f"COUNT(*) FILTER (WHERE {graded} AND is_passed), "
+        f"COALESCE(SUM(score) FILTER (WHERE {graded}), 0), "
+        f"COALESCE(SUM(score * score) FILTER (WHERE {graded}), 0), "
+        f"{', '.join(bucket_counts)} "
+        "FROM test_results GROUP BY test_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('test_stats')
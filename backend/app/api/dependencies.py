@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -8,6 +8,8 @@ from app.core.database import get_db
 from app.core.security import decode_token
 from app.models.user import User, UserRole
 from app.schemas.user import TokenData
+from app.services.user_principal import UserPrincipal, get_user_principal
+from app.services.pagination import InvalidCursor, PageCursor, decode_cursor, decode_id_cursor
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -15,8 +17,12 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+) -> UserPrincipal:
+    """Get current authenticated user from JWT token.
+
+    Returns a cached ``UserPrincipal`` (id, role, status flags); load the
+    ``User`` row explicitly when other fields are needed.
+    """
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,9 +42,7 @@ async def get_current_user(
     except (ValueError, TypeError):
         raise credentials_exception
     
-    # Get user from database
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await get_user_principal(db, user_id)
     
     if user is None:
         raise credentials_exception
@@ -53,8 +57,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -71,7 +75,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: list[UserRole]):
         self.allowed_roles = allowed_roles
     
-    async def __call__(self, user: User = Depends(get_current_active_user)) -> User:
+    async def __call__(self, user: UserPrincipal = Depends(get_current_active_user)) -> UserPrincipal:
         if user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -95,3 +99,38 @@ async def get_user_by_id(
     result = await db.execute(select(User).where(User.id == user_id))
     return result.scalar_one_or_none()
 
+
+async def get_page_cursor(
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page; takes precedence over skip",
+    )
+) -> Optional[PageCursor]:
+    """Decode the keyset pagination cursor, if any"""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def get_id_cursor(
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page",
+    )
+) -> Optional[int]:
+    """Decode the id-only keyset pagination cursor, if any"""
+    if cursor is None:
+        return None
+    try:
+        return decode_id_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -5,17 +5,16 @@ from sqlalchemy import select
 from datetime import datetime
 
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.core.security import create_access_token, create_refresh_token
+from app.core.password_hasher import password_hasher
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token, LoginRequest, RefreshTokenRequest
 from app.api.dependencies import get_current_user
+from app.services.user_principal import UserPrincipal
 from app.core.config import settings
-import redis.asyncio as redis
+from app.core.redis_client import RedisUnavailable, redis_manager
 
 router = APIRouter()
-async def _get_redis():
-    return redis.from_url(settings.REDIS_URL, decode_responses=True)
-
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -72,7 +71,7 @@ async def register(
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         role=user_data.role,
         phone=user_data.phone,
         gender=user_data.gender,
@@ -105,7 +104,7 @@ async def login(
     user = result.scalar_one_or_none()
     
     # Verify credentials
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверное имя пользователя или пароль",
@@ -137,9 +136,9 @@ async def login(
         payload = decode_token(refresh_token)
         jti = payload.get("jti")
         if jti:
-            r = await _get_redis()
-            await r.set(f"refresh_jti:{user.id}", jti, ex=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
-    except Exception:
+            async with redis_manager.guard() as r:
+                await r.set(f"refresh_jti:{user.id}", jti, ex=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
+    except RedisUnavailable:
         # Non-fatal
         pass
     
@@ -152,10 +151,18 @@ async def login(
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get current user information"""
-    return current_user
+    result = await db.execute(select(User).where(User.id == current_user.id))
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден",
+        )
+    return user
 
 
 @router.post("/refresh", response_model=Token)
@@ -182,13 +189,11 @@ async def refresh_token(
 
         # Verify refresh token jti matches stored one
         try:
-            r = await _get_redis()
-            stored_jti = await r.get(f"refresh_jti:{user_id}")
+            async with redis_manager.guard() as r:
+                stored_jti = await r.get(f"refresh_jti:{user_id}")
             if not stored_jti or stored_jti != jti:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
-        except HTTPException:
-            raise
-        except Exception:
+        except RedisUnavailable:
             # If Redis unavailable, proceed without jti check
             pass
 
@@ -209,9 +214,9 @@ async def refresh_token(
             new_payload = decode_token(new_refresh_token)
             new_jti = new_payload.get("jti")
             if new_jti:
-                r = await _get_redis()
-                await r.set(f"refresh_jti:{user.id}", new_jti, ex=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
-        except Exception:
+                async with redis_manager.guard() as r:
+                    await r.set(f"refresh_jti:{user.id}", new_jti, ex=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
+        except RedisUnavailable:
             pass
 
         return Token(
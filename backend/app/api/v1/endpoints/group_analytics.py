@@ -5,11 +5,11 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import require_teacher
+from app.services.user_principal import UserPrincipal
 from app.core.database import get_db
-from app.models.group import Group, GroupMembership
-from app.models.result import TestResult
-from app.models.test import Test
-from app.models.user import User, UserRole
+from app.models.group import Group
+from app.models.user import UserRole
+from app.services.group_analytics import get_group_analytics
 
 router = APIRouter()
 
@@ -19,9 +19,13 @@ async def group_analytics(
     group_id: int,
     test_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher),
+    current_user: UserPrincipal = Depends(require_teacher),
 ) -> Dict[str, Any]:
-    """Aggregate group performance optionally filtered by a specific test."""
+    """Aggregate group performance optionally filtered by a specific test.
+
+    Besides count, average and pass rate, returns the median, quartiles/p90
+    and a histogram of scores in 10-point buckets.
+    """
 
     group_result = await db.execute(select(Group).where(Group.id == group_id))
     group = group_result.scalar_one_or_none()
@@ -34,36 +38,4 @@ async def group_analytics(
             detail="Not authorized to view analytics for this group",
         )
 
-    base_query = (
-        select(TestResult)
-        .join(GroupMembership, TestResult.student_id == GroupMembership.student_id)
-        .where(GroupMembership.group_id == group_id)
-        .where(TestResult.status != "pending_manual")
-    )
-
-    if test_id is not None:
-        base_query = base_query.where(TestResult.test_id == test_id)
-
-    result_rows = await db.execute(base_query)
-    results = result_rows.scalars().all()
-
-    if not results:
-        return {"count": 0, "avg_score": 0.0, "pass_rate": 0.0, "test_title": None}
-
-    count = len(results)
-    avg_score = sum(r.score for r in results) / count
-    pass_rate = sum(1 for r in results if r.is_passed) / count * 100
-
-    test_title: Optional[str] = None
-    if test_id is not None:
-        test_name_result = await db.execute(select(Test.title).where(Test.id == test_id))
-        test_title = test_name_result.scalar_one_or_none()
-
-    return {
-        "count": count,
-        "avg_score": avg_score,
-        "pass_rate": pass_rate,
-        "test_title": test_title,
-    }
-
-
+    return await get_group_analytics(db, group_id, test_id)
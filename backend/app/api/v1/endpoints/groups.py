@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.models.user import User, UserRole
@@ -10,7 +10,10 @@ from app.schemas.group import (
     GroupCreate, GroupUpdate, GroupResponse,
     GroupMembershipCreate, GroupMembershipResponse,
 )
-from app.api.dependencies import get_current_user, require_teacher, require_admin
+from app.api.dependencies import get_current_user, get_page_cursor, require_teacher, require_admin
+from app.services.user_principal import UserPrincipal
+from app.services.pagination import PageCursor, keyset_paginate, set_next_cursor
+from app.services.group_analytics import invalidate_group_analytics
 
 
 router = APIRouter()
@@ -18,23 +21,30 @@ router = APIRouter()
 
 @router.get("/", response_model=List[GroupResponse])
 async def list_groups(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    after: Optional[PageCursor] = Depends(get_page_cursor),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     query = select(Group)
     if current_user.role == UserRole.TEACHER:
         query = query.where(Group.creator_id == current_user.id)
-    result = await db.execute(query.offset(skip).limit(limit).order_by(Group.created_at.desc()))
-    return result.scalars().all()
+    query = keyset_paginate(query, Group.created_at, Group.id, after)
+    if after is None:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    groups = result.scalars().all()
+    set_next_cursor(response, groups, limit, "created_at")
+    return groups
 
 
 @router.get("/{group_id}", response_model=GroupResponse)
 async def get_group(
     group_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     gres = await db.execute(select(Group).where(Group.id == group_id))
     group = gres.scalar_one_or_none()
@@ -51,7 +61,7 @@ async def get_group(
 async def create_group(
     data: GroupCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     group = Group(name=data.name.strip(), description=data.description, creator_id=current_user.id)
     db.add(group)
@@ -65,7 +75,7 @@ async def update_group(
     group_id: int,
     data: GroupUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     res = await db.execute(select(Group).where(Group.id == group_id))
     group = res.scalar_one_or_none()
@@ -85,7 +95,7 @@ async def update_group(
 async def delete_group(
     group_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     res = await db.execute(select(Group).where(Group.id == group_id))
     group = res.scalar_one_or_none()
@@ -95,13 +105,14 @@ async def delete_group(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this group")
     await db.delete(group)
     await db.commit()
+    await invalidate_group_analytics([group_id])
 
 
 @router.get("/{group_id}/members", response_model=List[GroupMembershipResponse])
 async def list_members(
     group_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     gres = await db.execute(select(Group).where(Group.id == group_id))
     group = gres.scalar_one_or_none()
@@ -118,7 +129,7 @@ async def add_member(
     group_id: int,
     data: GroupMembershipCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     gres = await db.execute(select(Group).where(Group.id == group_id))
     group = gres.scalar_one_or_none()
@@ -138,6 +149,7 @@ async def add_member(
     membership = GroupMembership(group_id=group_id, student_id=data.student_id, added_by_id=current_user.id)
     db.add(membership)
     await db.commit()
+    await invalidate_group_analytics([group_id])
     await db.refresh(membership)
     return membership
 
@@ -147,7 +159,7 @@ async def remove_member(
     group_id: int,
     student_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     gres = await db.execute(select(Group).where(Group.id == group_id))
     group = gres.scalar_one_or_none()
@@ -161,5 +173,6 @@ async def remove_member(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Membership not found")
     await db.delete(membership)
     await db.commit()
+    await invalidate_group_analytics([group_id])
 
 
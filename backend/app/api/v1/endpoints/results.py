@@ -1,117 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import JSON, select, update, case, type_coerce
+from sqlalchemy.orm import selectinload, undefer
 from typing import List, Optional, Any
-from datetime import datetime, timezone
-import re
-import string
+from datetime import datetime, timedelta, timezone
+import asyncio
 import base64
 from urllib.parse import quote
 
-from app.core.database import get_db
+from app.core.admission import attempt_start_gate
 from app.core.config import settings
-import redis.asyncio as redis
+from app.core.database import get_db
+from app.core.blob_store import BlobTooLarge, blob_store
+from app.core.file_response import conditional_file_response
+from app.core.security import create_file_token
 from app.models.user import User, UserRole
-from app.models.test import Test, Question, QuestionOption, TestAssignment, QuestionType, TestStatus
+from app.models.test import Test, Question, QuestionOption, QuestionType, TestStatus
 from app.models.result import TestResult, Answer
+from app.models.submission import QueuedSubmission
 from app.schemas.result import (
     TestResultResponse, TestResultListResponse,
-    TestAttemptStart, TestAttemptSubmit, GradeAnswerRequest,
-    AnswerResponse
+    TestAttemptStart, TestAttemptSubmit, GradeAnswerRequest, BatchGradeRequest,
+    AnswerResponse, SubmissionAcceptedResponse, SubmissionStatusResponse,
+    FileUploadResponse, GradingQueueItem, AnswerCreate, DraftUpdate, DraftResponse,
+)
+from app.api.dependencies import get_current_user, get_id_cursor, get_page_cursor, require_teacher
+from app.services.user_principal import UserPrincipal
+from app.services.results_service import (
+    AttemptContext, AttemptRejected, finalize_attempt, grade_attempt_answers, load_answer_views,
+    load_attempt_context, load_attempt_counts, normalize_answers, recompute_result_scores,
+)
+from app.services.answer_drafts import discard_draft, load_draft, save_draft_answers
+from app.services.answer_key import get_answer_key
+from app.services.attempt_sessions import (
+    AttemptSessionInfo, close_attempt_session, find_active_session, find_submitted_session, forget_attempt_session,
+    get_attempt_session, start_attempt_session,
 )
-from app.api.dependencies import get_current_user, require_teacher
+from app.services.deadline_worker import expire_attempt
+from app.services.exam_window import exam_window_error
+from app.services.idempotency import IDEMPOTENCY_KEY_HEADER, IdempotencyRejected, run_idempotent
+from app.services.grading_worker import grading_workers
+from app.services.graders import MAX_FILE_SIZE_BYTES
+from app.services.pagination import (
+    PageCursor, id_keyset_paginate, keyset_paginate, set_next_cursor, set_next_id_cursor,
+)
+from app.services.group_analytics import invalidate_student_group_analytics
 
 router = APIRouter()
-async def _get_redis():
-    return redis.from_url(settings.REDIS_URL, decode_responses=True)
 
+# Uploaded chunks are buffered and handed to a thread for hashing and writing
+UPLOAD_WRITE_BUFFER_BYTES = 1024 * 1024
 
-_SHORT_ANSWER_SPLIT_PATTERN = re.compile(r"[|;\n,]+")
-_MANUAL_GRADING_TYPES = {
-    QuestionType.ESSAY,
-    QuestionType.CODE,
-}
 
+def _result_response(test_result: TestResult, answers, **extra) -> TestResultResponse:
+    """Detailed result built from the row and pre-selected answer views."""
+    own = set(TestResultResponse.model_fields) - {"answers", "student_full_name", "student_username"}
+    fields = {name: getattr(test_result, name) for name in own}
+    return TestResultResponse(
+        **fields,
+        answers=[AnswerResponse.model_validate(dict(answer)) for answer in answers],
+        **extra,
+    )
 
-def _parse_float_value(value: Optional[Any]) -> Optional[float]:
-    if value is None:
-        return None
-    if isinstance(value, str):
-        normalized = value.strip().replace(",", ".")
-        if not normalized:
-            return None
-        value = normalized
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _normalize_short_answer(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    normalized = value.strip().lower()
-    if not normalized:
-        return None
-    normalized = normalized.replace("ё", "е")
-    normalized = re.sub(r"\s+", " ", normalized)
-    normalized = normalized.strip(string.punctuation + " ")
-    return normalized or None
-
-
-def _get_short_answer_variants(answer_text: Optional[str]) -> List[str]:
-    if not answer_text:
-        return []
-    raw_variants = _SHORT_ANSWER_SPLIT_PATTERN.split(answer_text)
-    normalized_variants = []
-    for variant in raw_variants:
-        normalized = _normalize_short_answer(variant)
-        if normalized:
-            normalized_variants.append(normalized)
-    # fallback: if splitting removed everything, try whole text
-    if not normalized_variants:
-        normalized = _normalize_short_answer(answer_text)
-        if normalized:
-            normalized_variants.append(normalized)
-    return normalized_variants
 
+async def _idempotent(
+    scope: str,
+    current_user: UserPrincipal,
+    idempotency_key: Optional[str],
+    data: Any,
+    handler,
+    status_code: int = status.HTTP_200_OK,
+):
+    """Run an endpoint body once per ``Idempotency-Key``, replaying its response to retries."""
+    try:
+        return await run_idempotent(scope, current_user.id, idempotency_key, data, handler, status_code)
+    except IdempotencyRejected as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.detail,
+            headers={"Retry-After": str(exc.retry_after)} if exc.retry_after else None,
+        )
 
 
 @router.post("/start", response_model=dict)
 async def start_test_attempt(
     data: TestAttemptStart,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255),
 ):
-    """Start a test attempt (student only)"""
-    
+    """Start a test attempt (student only).
+
+    Retries sent with the same ``Idempotency-Key`` get the first response.
+    Starts are admitted in arrival order up to a concurrency limit; beyond
+    the queue limit they are answered 503 with ``Retry-After``. Replayed
+    retries are answered before the gate and never take a slot.
+    """
+
+    async def admitted_start() -> dict:
+        async with attempt_start_gate.admit():
+            return await _start_attempt(data, db, current_user)
+
+    return await _idempotent("start", current_user, idempotency_key, data, admitted_start)
+
+
+async def _start_attempt(data: TestAttemptStart, db: AsyncSession, current_user: UserPrincipal) -> dict:
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can take tests"
         )
-    
-    # Verify test exists and is assigned
-    test_result = await db.execute(
-        select(Test).where(Test.id == data.test_id)
-    )
-    test = test_result.scalar_one_or_none()
-    
-    if not test:
+
+    # Test, assignment and attempts used in one round trip
+    context = await load_attempt_context(db, data.test_id, current_user.id)
+    if context is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Test not found"
         )
-    
-    assignment_result = await db.execute(
-        select(TestAssignment).where(
-            TestAssignment.test_id == data.test_id,
-            TestAssignment.student_id == current_user.id
-        )
-    )
-    assignment = assignment_result.scalar_one_or_none()
-    if not assignment:
+    test = context.test
+
+    if not context.assigned:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Test not assigned to you"
@@ -124,434 +133,447 @@ async def start_test_attempt(
             detail="Test is not published"
         )
 
+    # Only then look up the attempt: a repeated start (second tab, reload)
+    # resumes the active one; one whose time ran out is submitted from its
+    # draft first and counts as used
+    attempts = context.attempts
+    active = await find_active_session(db, test.id, current_user.id)
+    if active is not None and active.overdue():
+        await expire_attempt(db, active.id)
+        active = None
+        attempts = await load_attempt_counts(db, test.id, current_user.id)
+
     # Check max attempts
-    if test.max_attempts:
-        attempts_result = await db.execute(
-            select(func.count()).select_from(TestResult).where(
-                TestResult.test_id == data.test_id,
-                TestResult.student_id == current_user.id
-            )
+    if test.max_attempts and attempts.used >= test.max_attempts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum attempts ({test.max_attempts}) reached"
         )
-        attempts_count = attempts_result.scalar()
-        
-        if attempts_count >= test.max_attempts:
+    
+    if active is not None:
+        session, resumed = active, True
+    else:
+        window_error = exam_window_error(test)
+        if window_error:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Maximum attempts ({test.max_attempts}) reached"
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=window_error
             )
-    
-    # Record attempt start on server (Redis)
-    started_at = datetime.now(timezone.utc)
-    try:
-        r = await _get_redis()
-        key = f"attempt:{test.id}:{current_user.id}"
-        await r.set(key, started_at.isoformat())
-        # TTL: test duration * 2 or 24h fallback
-        ttl_seconds = (test.duration_minutes or 60) * 120
-        await r.expire(key, ttl_seconds)
-    except Exception:
-        # Non-fatal: continue without blocking if Redis unavailable
-        pass
+        session, resumed = await start_attempt_session(db, test, current_user.id)
 
     return {
-        "message": "Test attempt started",
+        "message": "Test attempt resumed" if resumed else "Test attempt started",
         "test_id": test.id,
-        "started_at": started_at.isoformat()
+        "attempt_id": session.id,
+        "started_at": session.started_at.isoformat(),
+        "deadline_at": session.deadline_at.isoformat() if session.deadline_at else None,
+        "status": session.status,
     }
 
 
-@router.post("/submit", response_model=TestResultResponse)
-async def submit_test_attempt(
-    data: TestAttemptSubmit,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Submit test answers and get result (student only)"""
-    
+async def _load_submittable_test(db: AsyncSession, test_id: int, current_user: UserPrincipal) -> AttemptContext:
+    """Run the pre-grading checks shared by the sync and async submit paths."""
     if current_user.role != UserRole.STUDENT:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only students can submit tests"
         )
-    
-    # Get test with questions
-    test_result = await db.execute(
-        select(Test)
-        .options(
-            selectinload(Test.questions).selectinload(Question.options)
-        )
-        .where(Test.id == data.test_id)
-    )
-    test = test_result.scalar_one_or_none()
-    if not test:
+
+    # Test row, assignment and attempt counts in one query; questions come
+    # from the compiled answer key
+    context = await load_attempt_context(db, test_id, current_user.id)
+    if context is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Test not found"
         )
 
     # Ensure test is published
-    if test.status != TestStatus.PUBLISHED:
+    if context.test.status != TestStatus.PUBLISHED:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Test is not published"
         )
 
-    assignment_result = await db.execute(
-        select(TestAssignment).where(
-            TestAssignment.test_id == data.test_id,
-            TestAssignment.student_id == current_user.id
-        )
-    )
-    if not assignment_result.scalar_one_or_none():
+    if not context.assigned:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Test not assigned to you"
         )
-
-    # Re-check max attempts to prevent bypassing start
-    if test.max_attempts:
-        attempts_result = await db.execute(
-            select(func.count()).select_from(TestResult).where(
-                TestResult.test_id == data.test_id,
-                TestResult.student_id == current_user.id
+    return context
+
+
+async def _load_active_session(
+    db: AsyncSession,
+    test_id: int,
+    current_user: UserPrincipal,
+    attempt_id: Optional[int] = None,
+    replay: bool = False,
+) -> AttemptSessionInfo:
+    """The attempt being submitted: by id when the client sends it, else the active one.
+
+    Callers run the access checks (:func:`_load_submittable_test`) first, so
+    a student who lost access learns nothing about their attempts.
+
+    With ``replay`` (a retried request) an attempt already submitted is
+    returned too, so the retry can answer with the first outcome; without an
+    id that is the latest attempt submitted within the idempotency window.
+    """
+    if attempt_id is not None:
+        session = await get_attempt_session(db, attempt_id)
+        if session is None or session.student_id != current_user.id or session.test_id != test_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attempt not found"
             )
-        )
-        attempts_count = attempts_result.scalar()
-        if attempts_count >= test.max_attempts:
+    else:
+        session = await find_active_session(db, test_id, current_user.id)
+        if session is None and replay:
+            closed_since = datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+            session = await find_submitted_session(db, test_id, current_user.id, closed_since)
+        if session is None:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Maximum attempts ({test.max_attempts}) reached"
+                status_code=status.HTTP_409_CONFLICT,
+                detail="No active attempt; start the test first"
             )
-    
-    # Calculate attempt number
-    attempts_result = await db.execute(
-        select(func.count()).select_from(TestResult).where(
-            TestResult.test_id == data.test_id,
-            TestResult.student_id == current_user.id
+    if not session.active:
+        if replay and session.status == "submitted":
+            return session
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Attempt already {session.status}"
         )
+    if session.overdue():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Time is up; the attempt is submitted automatically from its saved answers"
+        )
+    return session
+
+
+@router.post("/uploads", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_answer_file(
+    request: Request,
+    file_name: str = Query(..., min_length=1, max_length=255),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Stream a file answer to storage and return a token for the submit payload (student only).
+
+    The request body is the raw file; ``Content-Type`` is recorded as the file
+    type. Reference the upload in ``answer_data`` as ``{"file_token": ...}``.
+    Files no submitted answer references are deleted by the blob sweeper
+    once the token has expired (``app.services.blob_sweeper``).
+    """
+
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can upload answer files"
+        )
+
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="Размер файла превышает допустимый лимит (20 МБ)"
     )
-    attempt_number = attempts_result.scalar() + 1
-    
-    # Calculate time spent using server-tracked start if available
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE_BYTES:
+        raise too_large
+
+    writer = await asyncio.to_thread(blob_store.writer, MAX_FILE_SIZE_BYTES)
+    buffer = bytearray()
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= UPLOAD_WRITE_BUFFER_BYTES:
+                await asyncio.to_thread(writer.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(writer.write, bytes(buffer))
+    except BlobTooLarge:
+        raise too_large
+    except BaseException:
+        writer.abort()
+        raise
+
+    if writer.size == 0:
+        writer.abort()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+    ref = await asyncio.to_thread(writer.commit)
+
+    file_type = (request.headers.get("content-type") or "application/octet-stream")[:255]
+    token = create_file_token({
+        "uid": current_user.id,
+        "sha256": ref.sha256,
+        "size": ref.size,
+        "name": file_name,
+        "mime": file_type,
+    })
+    return FileUploadResponse(
+        file_token=token,
+        file_name=file_name,
+        file_type=file_type,
+        file_size=ref.size,
+    )
+
+
+@router.patch("/drafts/{test_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def save_draft(
+    test_id: int,
+    data: DraftUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Autosave individual answers of the current attempt (student only).
+
+    Answers are upserted per question into the attempt's draft; submit with
+    ``from_draft`` to grade the saved answers.
+    """
+
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can take tests"
+        )
+
+    # Access is checked before the attempt is looked up; the session was
+    # admitted by /start and bounds the draft's lifetime
+    context = await _load_submittable_test(db, test_id, current_user)
+    session = await _load_active_session(db, test_id, current_user)
+
+    answers = normalize_answers(data.answers)
+    answer_key = await get_answer_key(db, context.test)
+    unknown = sorted(set(answers) - answer_key.questions_by_id.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Questions {', '.join(map(str, unknown))} do not belong to this test"
+        )
+
+    try:
+        await save_draft_answers(db, session, answers)
+    except AttemptRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/drafts/{test_id}", response_model=DraftResponse)
+async def get_draft(
+    test_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Autosaved answers of the current attempt, e.g. to restore after a crash (student only)"""
+
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can take tests"
+        )
+
+    session = await find_active_session(db, test_id, current_user.id)
+    if session is None:
+        answers = {}
+    else:
+        answers = await load_draft(db, session)
+    return DraftResponse(
+        test_id=test_id,
+        answers=[AnswerCreate(question_id=question_id, answer_data=payload) for question_id, payload in answers.items()],
+    )
+
+
+@router.post("/submit", response_model=TestResultResponse)
+async def submit_test_attempt(
+    data: TestAttemptSubmit,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255),
+):
+    """Submit test answers and get result (student only).
+
+    Retries sent with the same ``Idempotency-Key`` get the first result
+    instead of recording another attempt.
+    """
+
+    return await _idempotent(
+        "submit", current_user, idempotency_key, data,
+        lambda: _submit_attempt(data, db, current_user, replay=idempotency_key is not None),
+    )
+
+
+async def _submit_attempt(
+    data: TestAttemptSubmit,
+    db: AsyncSession,
+    current_user: UserPrincipal,
+    replay: bool = False,
+) -> TestResultResponse:
+    context = await _load_submittable_test(db, data.test_id, current_user)
+    test = context.test
+    session = await _load_active_session(db, test.id, current_user, data.attempt_id, replay=replay)
+    if not session.active:
+        # A retry whose first response was lost, with Redis unable to replay it
+        if session.result_id is None:  # queued for grading, not graded yet
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Attempt already submitted"
+            )
+        result = await db.get(TestResult, session.result_id)
+        return _result_response(result, await load_answer_views(db, Answer.test_result_id == result.id))
+
     completed_at = datetime.now(timezone.utc)
-    server_started_at = data.started_at
+
+    answers = normalize_answers(data.answers)
+    if data.from_draft:
+        # Explicitly submitted answers win over the autosaved ones
+        answers = {**await load_draft(db, session), **answers}
+
     try:
-        r = await _get_redis()
-        key = f"attempt:{test.id}:{current_user.id}"
-        stored = await r.get(key)
-        if stored:
-            server_started_at = datetime.fromisoformat(stored)
-    except Exception:
-        pass
-    # Normalize timezone-aware
-    if server_started_at.tzinfo is None:
-        server_started_at = server_started_at.replace(tzinfo=timezone.utc)
-    time_spent = int((completed_at - server_started_at).total_seconds() / 60)
-    
-    # Total points is the sum of all questions in the test (answered or not)
-    points_total = sum(q.points for q in test.questions)
-    points_earned = 0.0
-    
-    # Create answer records
-    answer_records = []
-    pending_answers_count = 0
-    
-    # Index answers by question_id for quick lookup
-    answers_by_qid = {a.question_id: a for a in data.answers}
-
-    for question in test.questions:
-        answer_data = answers_by_qid.get(question.id)
-        if not answer_data:
-            # No answer provided: count as incorrect / zero points
-            answer_payload = {}
-        else:
-            # Ensure dict-like payload
-            answer_payload = answer_data.answer_data if isinstance(answer_data.answer_data, dict) else {}
-
-        # Grade based on question type
-        is_correct: Optional[bool] = False
-        points = 0.0
-
-        if question.question_type == QuestionType.SINGLE_CHOICE:
-            selected_option_id = answer_payload.get("selected_option_id")
-            try:
-                selected_option_id = int(selected_option_id)
-            except (TypeError, ValueError):
-                selected_option_id = None
-
-            if selected_option_id is not None:
-                correct_option = next(
-                    (o for o in question.options if o.id == selected_option_id and o.is_correct),
-                    None,
-                )
-                if correct_option:
-                    is_correct = True
-                    points = question.points
-
-        elif question.question_type == QuestionType.MULTIPLE_CHOICE:
-            raw_selected = answer_payload.get("selected_option_ids", [])
-            if not isinstance(raw_selected, (list, tuple, set)):
-                raw_selected = []
-
-            selected_option_ids = {
-                int(option_id)
-                for option_id in raw_selected
-                if isinstance(option_id, (int, str)) and str(option_id).strip() != ""
-            }
-            correct_option_ids = {o.id for o in question.options if o.is_correct}
-
-            if selected_option_ids == correct_option_ids and correct_option_ids:
-                is_correct = True
-                points = question.points
-
-        elif question.question_type == QuestionType.TRUE_FALSE:
-            selected_value = answer_payload.get("value")
-
-            def _normalize_tf(value: Optional[str]) -> Optional[bool]:
-                if value is None:
-                    return None
-                value_str = str(value).strip().lower()
-                if value_str in {"true", "истина", "правда", "yes", "1"}:
-                    return True
-                if value_str in {"false", "ложь", "no", "0"}:
-                    return False
-                return None
-
-            student_bool = _normalize_tf(selected_value)
-            correct_bool = _normalize_tf(question.correct_answer_text)
-
-            if student_bool is not None and correct_bool is not None and student_bool == correct_bool:
-                is_correct = True
-                points = question.points
-
-        elif question.question_type == QuestionType.FILL_IN_BLANK:
-            correct_text = question.correct_answer_text or ""
-            correct_answers = [part.strip().lower() for part in correct_text.split(",") if part.strip()]
-
-            blanks = answer_payload.get("blanks", [])
-            if isinstance(blanks, dict):
-                blanks = [blanks[key] for key in sorted(blanks, key=lambda x: int(x))]
-            if not isinstance(blanks, list):
-                blanks = []
-
-            student_answers = [str(value).strip().lower() for value in blanks if str(value).strip()]
-
-            if correct_answers and len(correct_answers) == len(student_answers):
-                if all(student_answers[idx] == correct_answers[idx] for idx in range(len(correct_answers))):
-                    is_correct = True
-                    points = question.points
-
-        elif question.question_type == QuestionType.NUMERIC:
-            correct_value = _parse_float_value(question.correct_answer_text)
-
-            student_value = answer_payload.get("number_value")
-            if student_value is None:
-                student_value = answer_payload.get("value")
-            student_value = _parse_float_value(student_value)
-
-            if correct_value is not None and student_value is not None:
-                if abs(student_value - correct_value) <= 1e-4:
-                    is_correct = True
-                    points = question.points
-
-        elif question.question_type == QuestionType.MATCHING:
-            matches = answer_payload.get("matches", {})
-            if not isinstance(matches, dict):
-                matches = {}
-
-            prepared_matches = {}
-            for key, value in matches.items():
-                try:
-                    prepared_matches[int(key)] = int(value)
-                except (TypeError, ValueError):
-                    continue
-
-            expected_matches = {option.id: option.id for option in question.options}
-
-            if expected_matches:
-                is_correct_flag = True
-                for option_id, expected_id in expected_matches.items():
-                    if prepared_matches.get(option_id) != expected_id:
-                        is_correct_flag = False
-                        break
-                if is_correct_flag and len(prepared_matches) == len(expected_matches):
-                    is_correct = True
-                    points = question.points
-
-        elif question.question_type == QuestionType.ORDERING:
-            order_map = answer_payload.get("order", {})
-            if not isinstance(order_map, dict):
-                order_map = {}
-
-            prepared_order: dict[int, int] = {}
-            for key, value in order_map.items():
-                try:
-                    option_id = int(key)
-                    position = int(value)
-                    prepared_order[option_id] = position
-                except (TypeError, ValueError):
-                    continue
-
-            expected_sequence = [option.id for option in sorted(question.options, key=lambda o: o.order)]
-
-            if expected_sequence and len(prepared_order) == len(expected_sequence):
-                student_pairs = sorted(prepared_order.items(), key=lambda item: item[1])
-                student_positions = [pair[1] for pair in student_pairs]
-
-                if len(set(student_positions)) == len(student_positions) and set(prepared_order.keys()) == set(expected_sequence):
-                    student_sequence = [pair[0] for pair in student_pairs]
-                    if student_sequence == expected_sequence:
-                        is_correct = True
-                        points = question.points
-        elif question.question_type == QuestionType.FILE_UPLOAD:
-            MAX_FILE_SIZE_BYTES = 20 * 1024 * 1024
-
-            def _parse_int(value: Optional[Any]) -> Optional[int]:
-                try:
-                    return int(value)
-                except (TypeError, ValueError):
-                    return None
-
-            file_name = answer_payload.get("file_name")
-            file_type = answer_payload.get("file_type")
-            file_size = _parse_int(answer_payload.get("file_size"))
-            raw_content = answer_payload.get("file_content")
-
-            if not raw_content or not isinstance(raw_content, str):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Для этого вопроса нужно загрузить файл",
-                )
-
-            content_payload = raw_content
-            if content_payload.startswith("data:"):
-                content_payload = content_payload.split(",", 1)[-1]
-
-            approx_bytes = int(len(content_payload) * 3 / 4)
-
-            if file_size is not None and file_size > MAX_FILE_SIZE_BYTES:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Размер файла превышает допустимый лимит (20 МБ)",
-                )
-
-            if approx_bytes > int(MAX_FILE_SIZE_BYTES * 1.4):  # base64 overhead (~33%)
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Размер файла превышает допустимый лимит (20 МБ)",
-                )
-
-            if not file_name or not isinstance(file_name, str):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Не указано имя файла",
-                )
-
-            if len(file_name) > 255:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Имя файла слишком длинное",
-                )
-
-            if file_type is not None and not isinstance(file_type, str):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Некорректный тип файла",
-                )
-
-            is_correct = None  # file uploads всегда проверяются вручную
-            points = 0.0
-            pending_answers_count += 1
-        elif question.question_type == QuestionType.SHORT_ANSWER:
-            expected_answers = _get_short_answer_variants(question.correct_answer_text)
-            student_answer = _normalize_short_answer(
-                answer_payload.get("text") or answer_payload.get("value")
+        result = await finalize_attempt(
+            db,
+            test=test,
+            student_id=current_user.id,
+            answers=answers,
+            started_at=session.started_at,
+            completed_at=completed_at,
+            attempts=context.attempts,
+            attempt_session=session,
+        )
+    except AttemptRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    await discard_draft(db, session)
+
+    # File payloads are stripped in SQL so 20 MB legacy uploads never travel back
+    answers = await load_answer_views(db, Answer.test_result_id == result.id)
+    return _result_response(result, answers)
+
+
+@router.post(
+    "/submit-async",
+    response_model=SubmissionAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_test_attempt_async(
+    data: TestAttemptSubmit,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255),
+):
+    """Queue test answers for background grading (student only).
+
+    The submission is stored durably and graded by the grading workers; poll
+    ``GET /results/submissions/{id}`` for the outcome. Retries sent with the
+    same ``Idempotency-Key`` get the first submission back.
+    """
+
+    return await _idempotent(
+        "submit-async", current_user, idempotency_key, data,
+        lambda: _queue_attempt(data, db, current_user, replay=idempotency_key is not None),
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+async def _queue_attempt(
+    data: TestAttemptSubmit,
+    db: AsyncSession,
+    current_user: UserPrincipal,
+    replay: bool = False,
+) -> SubmissionAcceptedResponse:
+    context = await _load_submittable_test(db, data.test_id, current_user)
+    test = context.test
+
+    session = await _load_active_session(db, test.id, current_user, data.attempt_id, replay=replay)
+    if not session.active:
+        # A retry whose first response was lost, with Redis unable to replay it
+        queued = (await db.execute(
+            select(QueuedSubmission).where(QueuedSubmission.attempt_session_id == session.id)
+        )).scalar_one_or_none()
+        if queued is None:  # submitted synchronously
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Attempt already submitted"
             )
+        return SubmissionAcceptedResponse(submission_id=queued.id, status=queued.status)
 
-            if expected_answers:
-                if student_answer and student_answer in expected_answers:
-                    is_correct = True
-                    points = question.points
-                else:
-                    is_correct = False
-            else:
-                # No configured correct answers -> requires manual grading
-                is_correct = None
-                pending_answers_count += 1
-        elif question.question_type in _MANUAL_GRADING_TYPES:
-            is_correct = None  # Will require manual grading
-            points = 0.0
-            pending_answers_count += 1
-
-        points_earned += points
-
-        answer_record = Answer(
-            question_id=question.id,
-            answer_data=answer_payload,
-            is_correct=is_correct,
-            points_earned=points
+    if test.max_attempts and context.attempts.used >= test.max_attempts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum attempts ({test.max_attempts}) reached"
         )
-        answer_records.append(answer_record)
-    
-    # Calculate score and status
-    score = (points_earned / points_total * 100) if points_total > 0 else 0
-    status_value = "pending_manual" if pending_answers_count > 0 else "auto_completed"
-    is_passed = score >= test.passing_score if status_value != "pending_manual" else False
-    
-    # Create test result
-    result = TestResult(
+
+    submitted_at = datetime.now(timezone.utc)
+    started_at = session.started_at
+
+    payload = [answer.model_dump(mode="json") for answer in data.answers]
+    if data.from_draft:
+        submitted = {answer.question_id for answer in data.answers}
+        draft = await load_draft(db, session)
+        payload = [
+            {"question_id": question_id, "answer_data": answer_data}
+            for question_id, answer_data in draft.items()
+            if question_id not in submitted
+        ] + payload
+
+    # Rejected here, the attempt stays open; in the worker it would be used up without a result
+    try:
+        await grade_attempt_answers(db, test, current_user.id, normalize_answers(payload))
+    except AttemptRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+
+    submission = QueuedSubmission(
         test_id=test.id,
         student_id=current_user.id,
-        score=score,
-        points_earned=points_earned,
-        points_total=points_total,
-        is_passed=is_passed,
-        status=status_value,
-        pending_answers_count=pending_answers_count,
-        started_at=server_started_at,
-        completed_at=completed_at,
-        time_spent_minutes=time_spent,
-        attempt_number=attempt_number
+        payload=payload,
+        started_at=started_at,
+        submitted_at=submitted_at,
+        status="queued",
+        attempts=0,
+        attempt_session_id=session.id,
     )
-    
-    db.add(result)
-    await db.flush()
-    
-    # Add answers
-    for answer_record in answer_records:
-        answer_record.test_result_id = result.id
-        db.add(answer_record)
-    
+    db.add(submission)
+    # The attempt ends when it is queued; the worker links the result later
+    if not await close_attempt_session(db, session.id, "submitted"):
+        await db.rollback()
+        await forget_attempt_session(session)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Attempt already submitted"
+        )
     await db.commit()
-    
-    # Reload with relationships
-    final_result = await db.execute(
-        select(TestResult)
-        .options(selectinload(TestResult.answers))
-        .where(TestResult.id == result.id)
-    )
-    result_obj = final_result.scalar_one()
+    await forget_attempt_session(session)
+    grading_workers.notify()
+    # The queued payload now holds the answers
+    await discard_draft(db, session)
+
+    return SubmissionAcceptedResponse(submission_id=submission.id, status=submission.status)
+
 
-    # Do not send raw file payloads back to the client to avoid large responses
-    # (especially for 20 MB uploads) and potential client-side timeouts.
-    response_payload = TestResultResponse.model_validate(result_obj, from_attributes=True)
-    sanitized_answers: list[AnswerResponse] = []
-    for answer in response_payload.answers:
-        data = dict(answer.answer_data) if isinstance(answer.answer_data, dict) else {}
-        data.pop("file_content", None)
-        sanitized_answers.append(answer.model_copy(update={"answer_data": data}))
+@router.get("/submissions/{submission_id}", response_model=SubmissionStatusResponse)
+async def get_submission_status(
+    submission_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Poll the grading status of a queued submission (owner only)"""
 
-    return response_payload.model_copy(update={"answers": sanitized_answers})
+    result = await db.execute(select(QueuedSubmission).where(QueuedSubmission.id == submission_id))
+    submission = result.scalar_one_or_none()
+    if not submission or submission.student_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found"
+        )
+    return submission
 
 
 @router.get("/", response_model=List[TestResultListResponse])
 async def get_results(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     test_id: int = None,
     student_id: int = None,
+    after: Optional[PageCursor] = Depends(get_page_cursor),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get test results"""
     
@@ -591,9 +613,12 @@ async def get_results(
         if current_user.role in [UserRole.TEACHER, UserRole.ADMIN]:
             query = query.where(TestResult.student_id == student_id)
     
-    query = query.order_by(TestResult.completed_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(query)
+    query = keyset_paginate(query, TestResult.completed_at, TestResult.id, after)
+    if after is None:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
     rows = result.all()
+    set_next_cursor(response, [row[0] for row in rows], limit, "completed_at")
     
     responses: List[TestResultListResponse] = []
     for test_result, full_name, username, test_title in rows:
@@ -617,20 +642,68 @@ async def get_results(
     return responses
 
 
+@router.get("/grading-queue", response_model=List[GradingQueueItem])
+async def get_grading_queue(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    test_id: Optional[int] = None,
+    after: Optional[int] = Depends(get_id_cursor),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_teacher)
+):
+    """Answers awaiting manual grading on the caller's tests, oldest first (teacher/admin only)"""
+
+    is_file = Question.question_type == QuestionType.FILE_UPLOAD
+    query = (
+        select(
+            Answer.id,
+            Answer.test_result_id,
+            TestResult.test_id,
+            Test.title.label("test_title"),
+            Answer.question_id,
+            Question.question_text,
+            Question.question_type,
+            Question.points.label("max_points"),
+            TestResult.student_id,
+            User.full_name.label("student_full_name"),
+            User.username.label("student_username"),
+            # File answers may still hold legacy base64 content: read only their metadata
+            type_coerce(case((is_file, None), else_=Answer.answer_data), JSON).label("answer_data"),
+            case((is_file, Answer.answer_data["file_name"].as_string())).label("file_name"),
+            case((is_file, Answer.answer_data["file_type"].as_string())).label("file_type"),
+            case((is_file, Answer.answer_data["file_size"].as_integer())).label("file_size"),
+            Answer.created_at,
+        )
+        .join(TestResult, TestResult.id == Answer.test_result_id)
+        .join(Test, Test.id == TestResult.test_id)
+        .join(Question, Question.id == Answer.question_id)
+        .join(User, User.id == TestResult.student_id)
+        .where(Answer.is_correct.is_(None))
+    )
+    if current_user.role == UserRole.TEACHER:
+        query = query.where(Test.creator_id == current_user.id)
+    if test_id is not None:
+        query = query.where(TestResult.test_id == test_id)
+
+    # Ids grow with insertion, so id order is submission order
+    query = id_keyset_paginate(query, Answer.id, after)
+    rows = (await db.execute(query.limit(limit))).all()
+    set_next_id_cursor(response, rows, limit)
+
+    return [GradingQueueItem.model_validate(row._mapping) for row in rows]
+
+
 @router.get("/{result_id}", response_model=TestResultResponse)
 async def get_result(
     result_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get detailed test result"""
     
     result = await db.execute(
         select(TestResult)
-        .options(
-            selectinload(TestResult.answers),
-            selectinload(TestResult.student),
-        )
+        .options(selectinload(TestResult.student))
         .where(TestResult.id == result_id)
     )
     test_result = result.scalar_one_or_none()
@@ -675,96 +748,103 @@ async def get_result(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to view this result"
             )
-    student_full_name = getattr(test_result.student, "full_name", None)
-    student_username = getattr(test_result.student, "username", None)
-
-    response = TestResultResponse.model_validate(test_result, from_attributes=True)
-    return response.model_copy(
-        update={
-            "student_full_name": student_full_name,
-            "student_username": student_username,
-        }
+    answers = await load_answer_views(db, Answer.test_result_id == test_result.id)
+    return _result_response(
+        test_result,
+        answers,
+        student_full_name=getattr(test_result.student, "full_name", None),
+        student_username=getattr(test_result.student, "username", None),
     )
 
 
-@router.post("/grade-answer", response_model=AnswerResponse)
-async def grade_answer(
-    data: GradeAnswerRequest,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
-):
-    """Manually grade an answer (teacher/admin only)"""
-    
-    result = await db.execute(select(Answer).where(Answer.id == data.answer_id))
-    answer = result.scalar_one_or_none()
-    
-    if not answer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Answer not found"
-        )
-
-    test_result_query = await db.execute(
-        select(TestResult)
-        .options(selectinload(TestResult.answers))
-        .where(TestResult.id == answer.test_result_id)
-    )
-    test_result = test_result_query.scalar_one_or_none()
-    if not test_result:
+async def _apply_manual_grades(
+    db: AsyncSession,
+    grades: List[GradeAnswerRequest],
+    current_user: UserPrincipal,
+) -> List[AnswerResponse]:
+    """Authorize, store and recompute a set of manual grades in one transaction."""
+    answer_ids = [grade.answer_id for grade in grades]
+    if len(set(answer_ids)) != len(answer_ids):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test result not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each answer can be graded only once per request"
         )
 
-    test_query = await db.execute(select(Test).where(Test.id == test_result.test_id))
-    test = test_query.scalar_one_or_none()
-    if not test:
+    owners = (await db.execute(
+        select(Answer.id, Answer.test_result_id, Test.creator_id)
+        .join(TestResult, TestResult.id == Answer.test_result_id)
+        .join(Test, Test.id == TestResult.test_id)
+        .where(Answer.id.in_(answer_ids))
+    )).all()
+    if len(owners) != len(answer_ids):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test not found"
+            detail="Answer not found"
         )
-
-    if current_user.role == UserRole.TEACHER and test.creator_id != current_user.id:
+    if current_user.role == UserRole.TEACHER and any(row.creator_id != current_user.id for row in owners):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to grade answers for this test"
         )
-    
-    # Update answer
-    answer.is_correct = data.is_correct
-    answer.points_earned = data.points_earned
-    answer.teacher_comment = data.teacher_comment
-    
-    # Recalculate score and status
-    points_earned = sum(a.points_earned for a in test_result.answers)
-    test_result.points_earned = points_earned
-    test_result.score = (points_earned / test_result.points_total * 100) if test_result.points_total > 0 else 0
-
-    pending_answers = sum(1 for a in test_result.answers if a.is_correct is None)
-    test_result.pending_answers_count = pending_answers
-
-    if pending_answers == 0:
-        if test_result.status == "pending_manual":
-            test_result.status = "completed"
-        test_result.is_passed = test_result.score >= test.passing_score
-    else:
-        test_result.status = "pending_manual"
-        test_result.is_passed = False
-    
+
+    await db.execute(update(Answer), [
+        {
+            "id": grade.answer_id,
+            "is_correct": grade.is_correct,
+            "points_earned": grade.points_earned,
+            "teacher_comment": grade.teacher_comment,
+        }
+        for grade in grades
+    ])
+    results = await recompute_result_scores(db, {row.test_result_id for row in owners})
     await db.commit()
-    await db.refresh(answer)
-    
-    return answer
+
+    for student_id, test_id in {(r.student_id, r.test_id) for r in results}:
+        await invalidate_student_group_analytics(db, student_id, test_id)
+
+    by_id = {row["id"]: row for row in await load_answer_views(db, Answer.id.in_(answer_ids))}
+    return [AnswerResponse.model_validate(dict(by_id[answer_id])) for answer_id in answer_ids]
+
+
+@router.post("/grade-answer", response_model=AnswerResponse)
+async def grade_answer(
+    data: GradeAnswerRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_teacher)
+):
+    """Manually grade an answer (teacher/admin only)"""
+
+    answers = await _apply_manual_grades(db, [data], current_user)
+    return answers[0]
+
+
+@router.post("/grade-answers", response_model=List[AnswerResponse])
+async def grade_answers(
+    data: BatchGradeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_teacher)
+):
+    """Manually grade many answers at once (teacher/admin only).
+
+    All grades are applied in one transaction and every affected result is
+    recomputed once; if any answer is missing or not gradable by the caller,
+    nothing is stored.
+    """
+
+    return await _apply_manual_grades(db, data.grades, current_user)
 
 
 @router.get("/answers/{answer_id}/file")
 async def download_answer_file(
     answer_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher),
+    current_user: UserPrincipal = Depends(require_teacher),
 ):
     """Allow teacher/admin to download uploaded file answer."""
-    answer_result = await db.execute(select(Answer).where(Answer.id == answer_id))
+    answer_result = await db.execute(
+        select(Answer).options(undefer(Answer.answer_data)).where(Answer.id == answer_id)
+    )
     answer = answer_result.scalar_one_or_none()
     if not answer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Answer not found")
@@ -795,10 +875,31 @@ async def download_answer_file(
         )
 
     ad = answer.answer_data or {}
-    b64_content = ad.get("file_content")
     file_name = ad.get("file_name") or f"answer_{answer_id}"
     file_type = ad.get("file_type") or "application/octet-stream"
 
+    # Build ASCII-safe Content-Disposition. If original has non-ASCII, add RFC5987 filename*
+    ascii_name = "".join(ch if ch.isascii() and ch not in ['"', "\\"] else "_" for ch in file_name) or "file"
+    content_disposition = f'attachment; filename="{ascii_name}"'
+    if file_name != ascii_name:
+        content_disposition += f"; filename*=UTF-8''{quote(file_name)}"
+
+    headers = {
+        "Content-Disposition": content_disposition
+    }
+
+    digest = ad.get("file_sha256")
+    if digest:
+        try:
+            path = blob_store.path_for(digest)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file reference")
+        if not path.is_file():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File content not found")
+        return conditional_file_response(request, path, etag=digest, media_type=file_type, headers=headers)
+
+    # Legacy answers keep base64 content inline
+    b64_content = ad.get("file_content")
     if not b64_content:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File content not found")
 
@@ -810,14 +911,4 @@ async def download_answer_file(
     except Exception:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file content")
 
-    # Build ASCII-safe Content-Disposition. If original has non-ASCII, add RFC5987 filename*
-    ascii_name = "".join(ch if ch.isascii() and ch not in ['"', "\\"] else "_" for ch in file_name) or "file"
-    content_disposition = f'attachment; filename="{ascii_name}"'
-    if file_name != ascii_name:
-        content_disposition += f"; filename*=UTF-8''{quote(file_name)}"
-
-    headers = {
-        "Content-Disposition": content_disposition
-    }
     return Response(content=binary, media_type=file_type, headers=headers)
-
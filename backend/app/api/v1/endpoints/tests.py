@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 from app.core.database import get_db
 from app.models.user import User, UserRole
@@ -13,16 +13,27 @@ from app.schemas.test import (
     TestCreate, TestUpdate, TestResponse, TestListResponse,
     QuestionCreate, QuestionUpdate, QuestionResponse,
     TestAssignmentCreate, TestAssignmentResponse,
-    TestAutoWithQuestionCreate, TestAssignmentBulkRequest
+    TestAutoWithQuestionCreate, TestAssignmentBulkRequest, TestStatsResponse,
+    ItemAnalysisResponse,
 )
-from app.api.dependencies import get_current_user, require_teacher
-from app.services.tests_service import normalize_question_options
+from app.api.dependencies import get_current_user, get_page_cursor, require_teacher
+from app.services.user_principal import UserPrincipal
+from app.services.tests_service import normalize_question_options, bulk_assign_students
+from app.services.pagination import PageCursor, keyset_paginate, set_next_cursor
+from app.services.answer_key import answer_key_cache
+from app.services.student_view import get_student_view, invalidate_student_view
+from app.services.exam_window import (
+    exam_window_error, exam_window_inverted, has_exam_window, invalidate_assignees, is_assigned, warm_exam_caches,
+)
+from app.services.test_stats import get_test_stats
+from app.services.item_analysis import get_item_analysis
+from app.core.file_response import etag_matches
 from app.core.config import settings
 
 router = APIRouter()
 
 
-def _ensure_can_manage_test(test: Test, user: User, detail: str = "Not authorized to manage this test") -> None:
+def _ensure_can_manage_test(test: Test, user: UserPrincipal, detail: str = "Not authorized to manage this test") -> None:
     """Ensure teacher users can only manage their own tests."""
     if user.role == UserRole.TEACHER and test.creator_id != user.id:
         raise HTTPException(
@@ -31,13 +42,38 @@ def _ensure_can_manage_test(test: Test, user: User, detail: str = "Not authorize
         )
 
 
+def _set_assignment_count_headers(response: Response, created: int, skipped: int) -> None:
+    """Report how many assignments a bulk operation created vs. skipped."""
+    response.headers["X-Assignments-Created"] = str(created)
+    response.headers["X-Assignments-Skipped"] = str(skipped)
+
+
+def _mark_test_modified(test: Test) -> None:
+    """Bump the test version stamp so cached answer keys and student views get rebuilt."""
+    test.updated_at = datetime.now(timezone.utc)
+
+
+async def _invalidate_test_caches(test_id: int) -> None:
+    """Drop per-test caches after a committed change."""
+    answer_key_cache.invalidate(test_id)
+    await invalidate_student_view(test_id)
+
+
+async def _warm_exam_test(db: AsyncSession, test: Test) -> None:
+    """Prepare a published exam for its class starting together."""
+    if test.status == TestStatus.PUBLISHED and has_exam_window(test):
+        await warm_exam_caches(db, test)
+
+
 @router.get("/", response_model=List[TestListResponse])
 async def get_tests(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     status: Optional[TestStatus] = None,
+    after: Optional[PageCursor] = Depends(get_page_cursor),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get all tests available to current user"""
     
@@ -69,9 +105,12 @@ async def get_tests(
     if status:
         query = query.where(Test.status == status)
     
-    query = query.offset(skip).limit(limit).order_by(Test.created_at.desc())
-    result = await db.execute(query)
+    query = keyset_paginate(query, Test.created_at, Test.id, after)
+    if after is None:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
     tests = result.scalars().all()
+    set_next_cursor(response, tests, limit, "created_at")
 
     if not tests:
         return []
@@ -104,18 +143,19 @@ async def get_tests(
 @router.get("/{test_id}", response_model=TestResponse)
 async def get_test(
     test_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get test by ID with all questions"""
     
-    result = await db.execute(
-        select(Test)
-        .options(
+    is_student = current_user.role == UserRole.STUDENT
+    query = select(Test).where(Test.id == test_id)
+    if not is_student:
+        query = query.options(
             selectinload(Test.questions).selectinload(Question.options)
         )
-        .where(Test.id == test_id)
-    )
+    result = await db.execute(query)
     test = result.scalar_one_or_none()
     
     if not test:
@@ -131,73 +171,32 @@ async def get_test(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to view this test"
             )
-    elif current_user.role == UserRole.STUDENT:
+    elif is_student:
         if test.status != TestStatus.PUBLISHED:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Test is not published"
             )
-        assignment_result = await db.execute(
-            select(TestAssignment).where(
-                TestAssignment.test_id == test_id,
-                TestAssignment.student_id == current_user.id
-            )
-        )
-        if not assignment_result.scalar_one_or_none():
+        if not await is_assigned(db, test, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Test not assigned to you"
             )
-    
-    # Hide correct answers for students
-    if current_user.role == UserRole.STUDENT:
-        # Build sanitized response dict without revealing correct answers
-        sanitized_questions = []
-        for q in test.questions:
-            sanitized_options = [
-                {
-                    "id": o.id,
-                    "question_id": o.question_id,
-                    "option_text": o.option_text,
-                    "is_correct": False,  # never reveal
-                    "order": o.order,
-                    "matching_pair": o.matching_pair,
-                    "created_at": o.created_at,
-                }
-                for o in q.options
-            ]
-
-            sanitized_questions.append(
-                {
-                    "id": q.id,
-                    "test_id": q.test_id,
-                    "question_text": q.question_text,
-                    "question_type": q.question_type,
-                    "points": q.points,
-                    "order": q.order,
-                    "correct_answer_text": None,  # never reveal
-                    "explanation": q.explanation,
-                    "created_at": q.created_at,
-                    "options": sanitized_options,
-                }
+        # Exam questions stay hidden outside the window, like new attempts
+        window_error = exam_window_error(test)
+        if window_error:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=window_error
             )
-
-        return {
-            "id": test.id,
-            "title": test.title,
-            "description": test.description,
-            "duration_minutes": test.duration_minutes,
-            "passing_score": test.passing_score,
-            "max_attempts": test.max_attempts,
-            "show_results": test.show_results,
-            "shuffle_questions": test.shuffle_questions,
-            "shuffle_options": test.shuffle_options,
-            "status": test.status,
-            "creator_id": test.creator_id,
-            "created_at": test.created_at,
-            "updated_at": test.updated_at,
-            "questions": sanitized_questions,
-        }
+    
+    # Students get the cached sanitized snapshot (no correct answers)
+    if is_student:
+        snapshot = await get_student_view(db, test)
+        headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
     return test
 
@@ -206,7 +205,7 @@ async def get_test(
 async def create_test(
     test_data: TestCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Create a new test (teacher/admin only)"""
     
@@ -221,6 +220,8 @@ async def create_test(
         shuffle_questions=test_data.shuffle_questions,
         shuffle_options=test_data.shuffle_options,
         status=test_data.status,
+        exam_opens_at=test_data.exam_opens_at,
+        exam_closes_at=test_data.exam_closes_at,
         creator_id=current_user.id
     )
     
@@ -273,6 +274,7 @@ async def create_test(
         .where(Test.id == new_test.id)
     )
     created_test = result.scalar_one()
+    await _warm_exam_test(db, created_test)
     
     return created_test
 
@@ -282,7 +284,7 @@ async def update_test(
     test_id: int,
     test_data: TestUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Update test (teacher/admin only)"""
     
@@ -314,8 +316,16 @@ async def update_test(
             setattr(test, field, None)
             continue
         setattr(test, field, value)
+    if exam_window_inverted(test):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Окно экзамена должно закрываться позже, чем открывается"
+        )
+    _mark_test_modified(test)
     
     await db.commit()
+    await _invalidate_test_caches(test_id)
+    await _warm_exam_test(db, test)
     # Reload with relationships to avoid async lazy-load during response serialization
     refreshed = await db.execute(
         select(Test)
@@ -333,7 +343,7 @@ async def update_test(
 async def delete_test(
     test_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Delete test (teacher/admin only)"""
     
@@ -355,6 +365,7 @@ async def delete_test(
     
     await db.delete(test)
     await db.commit()
+    await _invalidate_test_caches(test_id)
 
 
 # Test Assignments
@@ -363,7 +374,7 @@ async def assign_test(
     test_id: int,
     assignment_data: TestAssignmentCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Assign test to student (teacher/admin only)"""
     
@@ -431,7 +442,7 @@ async def assign_test(
 async def get_test_assignments(
     test_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Get all assignments for a test (teacher/admin only)"""
     
@@ -454,11 +465,53 @@ async def get_test_assignments(
     return assignments
 
 
+@router.get("/{test_id}/stats", response_model=TestStatsResponse)
+async def get_test_statistics(
+    test_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_teacher)
+):
+    """Attempts, average, pass rate, pending count and score histogram of a test (teacher/admin only)"""
+
+    test_result = await db.execute(select(Test).where(Test.id == test_id))
+    test = test_result.scalar_one_or_none()
+    if not test:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+
+    _ensure_can_manage_test(test, current_user, detail="Not authorized to view statistics for this test")
+
+    return await get_test_stats(db, test_id)
+
+
+@router.get("/{test_id}/item-analysis", response_model=ItemAnalysisResponse)
+async def get_test_item_analysis(
+    test_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_teacher)
+):
+    """Per-question difficulty, discrimination and option selection rates (teacher/admin only)"""
+
+    test_result = await db.execute(select(Test).where(Test.id == test_id))
+    test = test_result.scalar_one_or_none()
+    if not test:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+
+    _ensure_can_manage_test(test, current_user, detail="Not authorized to view statistics for this test")
+
+    return await get_item_analysis(db, test)
+
+
 @router.delete("/assignments/{assignment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_assignment(
     assignment_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Delete test assignment (teacher/admin only)"""
     
@@ -480,6 +533,7 @@ async def delete_assignment(
     
     await db.delete(assignment)
     await db.commit()
+    await invalidate_assignees(test.id)
 
 
 # Question management
@@ -488,7 +542,7 @@ async def create_question(
     test_id: int,
     question_data: QuestionCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Create a question for a test (teacher/admin only)"""
 
@@ -535,7 +589,9 @@ async def create_question(
             matching_pair=option_data.matching_pair
         ))
 
+    _mark_test_modified(test)
     await db.commit()
+    await _invalidate_test_caches(test_id)
 
     # Reload with options
     q = await db.execute(
@@ -549,9 +605,10 @@ async def create_question(
 async def assign_test_to_group(
     test_id: int,
     group_id: int,
+    response: Response,
     due_date: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     # Verify test
     tres = await db.execute(select(Test).where(Test.id == test_id))
@@ -570,24 +627,12 @@ async def assign_test_to_group(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to assign to this group")
 
     # Fetch members
-    mres = await db.execute(select(GroupMembership).where(GroupMembership.group_id == group_id))
-    members = mres.scalars().all()
-    if not members:
-        return []
-
-    created: list[TestAssignment] = []
-    for m in members:
-        existing = await db.execute(select(TestAssignment).where(TestAssignment.test_id == test_id, TestAssignment.student_id == m.student_id))
-        if existing.scalar_one_or_none():
-            continue
-        a = TestAssignment(test_id=test_id, student_id=m.student_id, assigned_by_id=current_user.id, due_date=due_date)
-        db.add(a)
-        created.append(a)
+    mres = await db.execute(select(GroupMembership.student_id).where(GroupMembership.group_id == group_id))
+    member_ids = mres.scalars().all()
 
+    created, skipped = await bulk_assign_students(db, test_id, member_ids, current_user.id, due_date)
     await db.commit()
-    # refresh assignments
-    for a in created:
-        await db.refresh(a)
+    _set_assignment_count_headers(response, len(created), skipped)
     return created
 
 
@@ -595,8 +640,9 @@ async def assign_test_to_group(
 async def assign_test_bulk(
     test_id: int,
     payload: TestAssignmentBulkRequest,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     tres = await db.execute(select(Test).where(Test.id == test_id))
     test = tres.scalar_one_or_none()
@@ -643,35 +689,9 @@ async def assign_test_bulk(
         )
         student_ids.update(all_students_res.scalars().all())
 
-    if not student_ids:
-        return []
-
-    created: list[TestAssignment] = []
-    for sid in student_ids:
-        existing = await db.execute(
-            select(TestAssignment).where(
-                TestAssignment.test_id == test_id,
-                TestAssignment.student_id == sid,
-            )
-        )
-        if existing.scalar_one_or_none():
-            continue
-        assignment = TestAssignment(
-            test_id=test_id,
-            student_id=sid,
-            assigned_by_id=current_user.id,
-            due_date=payload.due_date,
-        )
-        db.add(assignment)
-        created.append(assignment)
-
-    if not created:
-        return []
-
+    created, skipped = await bulk_assign_students(db, test_id, student_ids, current_user.id, payload.due_date)
     await db.commit()
-    for assignment in created:
-        await db.refresh(assignment)
-
+    _set_assignment_count_headers(response, len(created), skipped)
     return created
 
 
@@ -679,7 +699,7 @@ async def assign_test_bulk(
 async def create_or_append_with_question(
     payload: TestAutoWithQuestionCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Create a new test (if test_id not supplied) and add a question, or
     append a question to an existing test. Returns the full test with questions.
@@ -748,7 +768,9 @@ async def create_or_append_with_question(
             matching_pair=option_data.matching_pair,
         ))
 
+    _mark_test_modified(test)
     await db.commit()
+    await _invalidate_test_caches(test.id)
 
     # Return full test with questions
     result = await db.execute(
@@ -767,7 +789,7 @@ async def update_question(
     question_id: int,
     question_data: QuestionUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Update a question and optionally replace options (teacher/admin only)."""
 
@@ -800,7 +822,9 @@ async def update_question(
                 matching_pair=option_data.matching_pair
             ))
 
+    _mark_test_modified(test)
     await db.commit()
+    await _invalidate_test_caches(test_id)
 
     q = await db.execute(select(Question).options(selectinload(Question.options)).where(Question.id == question.id))
     return q.scalar_one()
@@ -810,7 +834,7 @@ async def update_question(
 async def delete_question(
     question_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """Delete a question (teacher/admin only)."""
 
@@ -825,4 +849,6 @@ async def delete_question(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to modify this test")
 
     await db.delete(question)
-    await db.commit()
\ No newline at end of file
+    _mark_test_modified(test)
+    await db.commit()
+    await _invalidate_test_caches(test.id)
\ No newline at end of file
@@ -1,25 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import List, Optional
 
 from app.core.database import get_db
-from app.core.security import get_password_hash
+from app.core.password_hasher import password_hasher
 from app.models.user import User, UserRole, ParentChild
 from app.schemas.user import UserResponse, UserCreate, UserUpdate, ParentChildCreate, ParentChildResponse
-from app.api.dependencies import get_current_user, require_admin, require_teacher
+from app.api.dependencies import get_current_user, get_page_cursor, require_admin, require_teacher
+from app.services.test_stats import rebuild_test_stats, student_result_test_ids
+from app.services.user_principal import UserPrincipal, invalidate_user_principals
+from app.services.pagination import PageCursor, keyset_paginate, set_next_cursor
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     role: Optional[UserRole] = None,
     is_verified: Optional[bool] = None,
+    after: Optional[PageCursor] = Depends(get_page_cursor),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: UserPrincipal = Depends(require_admin)
 ):
     """Get all users (admin only)"""
     
@@ -30,9 +35,12 @@ async def get_users(
     if is_verified is not None:
         query = query.where(User.is_verified == is_verified)
     
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
+    query = keyset_paginate(query, User.created_at, User.id, after)
+    if after is None:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
     users = result.scalars().all()
+    set_next_cursor(response, users, limit, "created_at")
     
     return users
 
@@ -41,7 +49,7 @@ async def get_users(
 async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get user by ID"""
     
@@ -68,7 +76,7 @@ async def get_user(
 async def create_user(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: UserPrincipal = Depends(require_admin)
 ):
     """Create a new user (admin only)"""
     
@@ -91,7 +99,7 @@ async def create_user(
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         role=user_data.role,
         phone=user_data.phone,
         gender=user_data.gender,
@@ -112,17 +120,20 @@ async def create_user(
 @router.post("/verify-all", status_code=status.HTTP_200_OK)
 async def verify_all_users(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: UserPrincipal = Depends(require_admin)
 ):
     """Mark all pending users as verified (admin only)."""
 
     result = await db.execute(select(User).where(User.is_verified.is_(False)))
     users_to_verify = result.scalars().all()
 
+    verified_ids = []
     for user in users_to_verify:
         user.is_verified = True
+        verified_ids.append(user.id)
 
     await db.commit()
+    await invalidate_user_principals(verified_ids)
 
     return {"updated": len(users_to_verify)}
 
@@ -132,7 +143,7 @@ async def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Update user"""
     
@@ -162,12 +173,13 @@ async def update_user(
     
     # Hash password if provided
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await password_hasher.hash(update_data.pop("password"))
     
     for field, value in update_data.items():
         setattr(user, field, value)
     
     await db.commit()
+    await invalidate_user_principals([user_id])
     await db.refresh(user)
     
     return user
@@ -177,7 +189,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: UserPrincipal = Depends(require_admin)
 ):
     """Delete user (admin only)"""
     
@@ -190,8 +202,14 @@ async def delete_user(
             detail="User not found"
         )
     
+    # Their results go with them; the stats of those tests carry no negative delta
+    stale_stats = await student_result_test_ids(db, user_id)
     await db.delete(user)
+    await db.flush()
+    if stale_stats:
+        await rebuild_test_stats(db, stale_stats)
     await db.commit()
+    await invalidate_user_principals([user_id])
 
 
 # Parent-Child relationships
@@ -199,7 +217,7 @@ async def delete_user(
 async def create_parent_child_relationship(
     data: ParentChildCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: UserPrincipal = Depends(require_admin)
 ):
     """Create parent-child relationship (admin only)"""
     
@@ -245,7 +263,7 @@ async def create_parent_child_relationship(
 async def get_parent_children(
     parent_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     """Get all children of a parent"""
     
@@ -269,7 +287,7 @@ async def get_parent_children(
 @router.get("/students/verified", response_model=List[UserResponse])
 async def get_verified_students(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """List verified students (teacher/admin)."""
 
@@ -285,7 +303,7 @@ async def get_verified_students(
 async def list_students(
     is_verified: Optional[bool] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_teacher)
+    current_user: UserPrincipal = Depends(require_teacher)
 ):
     """List students (teacher/admin) with optional verification filter."""
 
@@ -0,0 +1,112 @@
+"""Fair admission control for bursty endpoints.
+
+When a teacher tells a class to start at once, hundreds of attempt starts
+arrive within the same second. An :class:`AdmissionGate` lets at most
+``max_active`` of them run at a time and queues the rest strictly in arrival
+order, handing each freed slot to the oldest waiter, so the database pool
+serves a steady stream instead of a pile-up. When ``max_waiting`` requests
+are already queued, or a request has waited ``max_wait_seconds``, it is
+refused with ``AdmissionRejected``, which the API maps to ``503`` +
+``Retry-After`` sized by the backlog ahead of it.
+"""
+
+import asyncio
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    """The gate is saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    def __init__(self, max_active: int, max_waiting: int, max_wait_seconds: float):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted request holds its slot
+        self.service_seconds = 0.05
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds for the current backlog to drain at the observed service rate (at least 1)."""
+        backlog = self.waiting + 1
+        return max(1, math.ceil(backlog * self.service_seconds / max(self.max_active, 1)))
+
+    async def _acquire(self) -> None:
+        if self.active < self.max_active and not self._waiters:
+            self.active += 1
+            return
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait_seconds)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the wait ended: pass it on
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                self.rejected += 1
+                raise AdmissionRejected(self.retry_after()) from None
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot moves to the oldest waiter
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold one slot for the body; raises ``AdmissionRejected`` when saturated."""
+        await self._acquire()
+        self.admitted += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            yield
+        finally:
+            self.service_seconds += 0.1 * (loop.time() - started - self.service_seconds)
+            self._release()
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "max_active": self.max_active,
+            "active": self.active,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_seconds": round(self.service_seconds, 4),
+        }
+
+
+attempt_start_gate = AdmissionGate(
+    max_active=settings.ATTEMPT_START_CONCURRENCY,
+    max_waiting=settings.ATTEMPT_START_MAX_QUEUED,
+    max_wait_seconds=settings.ATTEMPT_START_MAX_WAIT_SECONDS,
+)
@@ -0,0 +1,191 @@
+"""Content-addressed blob storage on the local filesystem.
+
+Blobs are stored under ``BLOB_STORAGE_DIR`` as ``ab/cd/<sha256>`` so that no
+directory grows unbounded. Identical content is stored once; writing it
+again refreshes the blob's modification time, which the unreferenced-blob
+sweep (``app.services.blob_sweeper``) treats as its last use.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from app.core.config import settings
+
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+class BlobNotFound(LookupError):
+    pass
+
+
+class BlobTooLarge(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    sha256: str
+    size: int
+
+
+def is_valid_digest(digest: Optional[str]) -> bool:
+    return isinstance(digest, str) and len(digest) == 64 and set(digest) <= _HEX_DIGITS
+
+
+class BlobStore:
+    """Filesystem blob store with sharded directories and sha256 addressing."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        if not is_valid_digest(digest):
+            raise ValueError("Invalid blob digest")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).is_file()
+
+    def _tmp_file(self) -> BinaryIO:
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+
+    @staticmethod
+    def _refresh(target: Path) -> bool:
+        """Mark existing content as just written; False if there is none."""
+        try:
+            os.utime(target)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _commit_tmp(self, tmp_path: str, digest: str) -> None:
+        target = self.path_for(digest)
+        if self._refresh(target):
+            # Deduplicated: same content already stored
+            os.unlink(tmp_path)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+
+    def put_bytes(self, data: bytes) -> BlobRef:
+        digest = hashlib.sha256(data).hexdigest()
+        if self._refresh(self.path_for(digest)):
+            return BlobRef(digest, len(data))
+        with self._tmp_file() as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+        self._commit_tmp(tmp_path, digest)
+        return BlobRef(digest, len(data))
+
+    def writer(self, max_size: Optional[int] = None) -> "BlobWriter":
+        return BlobWriter(self, max_size=max_size)
+
+    def open(self, digest: str) -> BinaryIO:
+        try:
+            return open(self.path_for(digest), "rb")
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    def delete(self, digest: str) -> None:
+        try:
+            os.unlink(self.path_for(digest))
+        except FileNotFoundError:
+            pass
+
+    def iter_written_before(self, cutoff: float) -> Iterator[str]:
+        """Digests of blobs last written before the ``cutoff`` timestamp."""
+        for path in self.root.glob("??/??/*"):
+            try:
+                if is_valid_digest(path.name) and path.stat().st_mtime < cutoff:
+                    yield path.name
+            except FileNotFoundError:
+                continue
+
+    def delete_if_written_before(self, digest: str, cutoff: float) -> bool:
+        """Delete the blob unless it was (re)written at or after ``cutoff``."""
+        path = self.path_for(digest)
+        try:
+            if path.stat().st_mtime >= cutoff:
+                return False
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def purge_tmp(self, cutoff: float) -> int:
+        """Remove temp files of writes abandoned before ``cutoff`` (e.g. a crashed process)."""
+        removed = 0
+        for path in (self.root / "tmp").glob("*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    os.unlink(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def put_bytes_async(self, data: bytes) -> BlobRef:
+        return await asyncio.to_thread(self.put_bytes, data)
+
+    async def put_base64_async(self, encoded: str) -> BlobRef:
+        """Decode a (data-URL or plain) base64 payload and store it off the event loop."""
+        def _decode_and_store() -> BlobRef:
+            payload = encoded
+            if payload.startswith("data:") and "," in payload:
+                payload = payload.split(",", 1)[1]
+            try:
+                data = base64.b64decode(payload)
+            except (binascii.Error, ValueError):
+                raise ValueError("Invalid base64 content")
+            return self.put_bytes(data)
+
+        return await asyncio.to_thread(_decode_and_store)
+
+
+class BlobWriter:
+    """Incrementally write a blob to a temp file while hashing it.
+
+    Memory use is bounded by the caller's chunk size. ``commit`` moves the
+    temp file to its content address; ``abort`` discards it.
+    """
+
+    def __init__(self, store: BlobStore, max_size: Optional[int] = None):
+        self.store = store
+        self.max_size = max_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._tmp = store._tmp_file()
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            self.abort()
+            raise BlobTooLarge("Blob exceeds the size limit")
+        self._hash.update(chunk)
+        self._tmp.write(chunk)
+
+    def commit(self) -> BlobRef:
+        self._tmp.close()
+        digest = self._hash.hexdigest()
+        self.store._commit_tmp(self._tmp.name, digest)
+        return BlobRef(digest, self.size)
+
+    def abort(self) -> None:
+        self._tmp.close()
+        try:
+            os.unlink(self._tmp.name)
+        except FileNotFoundError:
+            pass
+
+
+blob_store = BlobStore(settings.BLOB_STORAGE_DIR)
@@ -16,17 +16,76 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+    REDIS_MAX_CONNECTIONS: int = 50  # per process
+    REDIS_POOL_TIMEOUT_SECONDS: float = 0.5  # wait for a free connection before falling back
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 0.5
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures before Redis is skipped
+    REDIS_CIRCUIT_RESET_SECONDS: float = 30.0
     
     # JWT Security
     SECRET_KEY: str  # must be provided via environment
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60  # Увеличено с 30 до 60 минут для комфортной работы
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # Authenticated user cache (bounds how long a deactivation can go unnoticed)
+    USER_PRINCIPAL_CACHE_SIZE: int = 10000
+    USER_PRINCIPAL_LOCAL_TTL_SECONDS: float = 30.0
+    USER_PRINCIPAL_REDIS_TTL_SECONDS: int = 300
+
+    # Password hashing (bcrypt runs in a bounded thread pool)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # beyond this, login/register answer 503 + Retry-After
     
     # Database logging
     DATABASE_ECHO: bool = False
     REQUIRE_TEST_ASSIGNMENT: bool = True
 
+    # File answers storage (content-addressed blobs)
+    BLOB_STORAGE_DIR: str = "storage/blobs"
+    FILE_TOKEN_EXPIRE_MINUTES: int = 24 * 60  # lifetime of tokens returned by /results/uploads
+    BLOB_SWEEP_INTERVAL_SECONDS: float = 3600.0  # deletion of blobs no answer references (0 = disabled)
+    BLOB_SWEEP_GRACE_SECONDS: int = 3600  # unreferenced blobs are kept this long past the token lifetime
+    BLOB_SWEEP_BATCH_SIZE: int = 500
+
+    # Grading
+    ANSWER_KEY_CACHE_SIZE: int = 256  # compiled answer keys kept per process
+    STUDENT_VIEW_CACHE_SIZE: int = 256  # serialized student test views kept per process
+    STUDENT_VIEW_REDIS_TTL_SECONDS: int = 3600
+    GRADING_WORKERS: int = 2  # background workers draining queued submissions (0 = disabled)
+    GRADING_POLL_INTERVAL_SECONDS: float = 1.0
+    GRADING_STALE_AFTER_SECONDS: int = 300  # requeue submissions stuck in "processing"
+    GRADING_MAX_ATTEMPTS: int = 5  # claims before a submission that keeps erroring is failed
+    GRADING_RETRY_BACKOFF_SECONDS: float = 10.0  # first retry delay, doubled per further attempt
+
+    # Attempt sessions (Redis copy with the attempt_sessions table as fallback)
+    ATTEMPT_SESSION_REDIS_TTL_SECONDS: int = 7200  # kept this long past the deadline, or for untimed tests
+    ATTEMPT_DEADLINE_GRACE_SECONDS: int = 60  # allowance for submits racing the deadline
+    DEADLINE_POLL_INTERVAL_SECONDS: float = 1.0  # auto-submission of timed-out attempts
+    DEADLINE_BATCH_SIZE: int = 200
+    DEADLINE_WORKER_CONCURRENCY: int = 4  # attempts finalized in parallel per process (0 = disabled)
+    DEADLINE_SWEEP_INTERVAL_SECONDS: float = 60.0  # database backstop for schedules lost by Redis
+    DEADLINE_RETRY_SECONDS: int = 30
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # retried start/submit requests replay the first response this long
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # claim held while the first request runs
+
+    # Exam windows (a whole class starting at once)
+    EXAM_WARMUP_LEAD_SECONDS: int = 600  # caches are kept warm this long before and after a window opens
+    EXAM_WARMUP_INTERVAL_SECONDS: float = 30.0  # (0 = disabled)
+    ATTEMPT_START_CONCURRENCY: int = 8  # starts using the database at once per process; keep below the pool size
+    ATTEMPT_START_MAX_QUEUED: int = 500  # beyond this, starts answer 503 + Retry-After
+    ATTEMPT_START_MAX_WAIT_SECONDS: float = 10.0
+
+    # Draft answers (autosave lives in Redis, flushed to answer_drafts in the background)
+    DRAFT_FLUSH_INTERVAL_SECONDS: float = 10.0  # also the most a draft can lag behind in the DB
+    DRAFT_FLUSH_BATCH_SIZE: int = 500
+    DRAFT_MAX_ANSWER_BYTES: int = 65536  # per question; files go through POST /results/uploads
+
+    # Analytics
+    GROUP_ANALYTICS_REDIS_TTL_SECONDS: int = 600  # upper bound on staleness if an invalidation is missed
+    ITEM_ANALYSIS_REDIS_TTL_SECONDS: int = 3600  # reports are versioned, TTL only frees memory
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:5173",
@@ -1,5 +1,11 @@
+from sqlalchemy import JSON, String
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import CompileError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
 from app.core.config import settings
 
 # Create async engine
@@ -23,6 +29,91 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_insert(session: AsyncSession):
+    """``insert`` supporting ``on_conflict_do_update`` for the session's dialect."""
+    return _UPSERT_INSERTS[session.get_bind().dialect.name]
+
+
+class json_without_keys(FunctionElement):
+    """JSON document with the given top-level keys removed by the database.
+
+    ``json_without_keys(Answer.answer_data, "file_content")`` lets a query
+    return an object without ever transferring its large members.
+    """
+
+    type = JSON()
+    inherit_cache = True
+
+    _traverse_internals = FunctionElement._traverse_internals + [("keys", InternalTraversal.dp_plain_obj)]
+
+    def __init__(self, document, *keys: str):
+        self.keys = keys
+        super().__init__(document)
+
+
+def _literal(key: str) -> str:
+    return "'" + key.replace("'", "''") + "'"
+
+
+@compiles(json_without_keys, "postgresql")
+def _json_without_keys_postgresql(element, compiler, **kw):
+    document = compiler.process(list(element.clauses)[0], **kw)
+    removed = "".join(f" - {_literal(key)}" for key in element.keys)
+    return f"CAST((CAST({document} AS JSONB){removed}) AS JSON)"
+
+
+@compiles(json_without_keys, "sqlite")
+def _json_without_keys_sqlite(element, compiler, **kw):
+    document = compiler.process(list(element.clauses)[0], **kw)
+    paths = "".join(f", {_literal('$.' + key)}" for key in element.keys)
+    return f"json_remove({document}{paths})"
+
+
+@compiles(json_without_keys)
+def _json_without_keys_default(element, compiler, **kw):
+    raise CompileError(f"json_without_keys is not supported on {compiler.dialect.name}")
+
+
+class json_text(FunctionElement):
+    """Top-level member of a JSON document as text, rendered with a literal key.
+
+    The literal key keeps the expression identical to the one an expression
+    index was built on, e.g. ``json_text(Answer.answer_data, "file_sha256")``.
+    """
+
+    type = String()
+    inherit_cache = True
+
+    _traverse_internals = FunctionElement._traverse_internals + [("key", InternalTraversal.dp_plain_obj)]
+
+    def __init__(self, document, key: str):
+        self.key = key
+        super().__init__(document)
+
+
+@compiles(json_text, "postgresql")
+def _json_text_postgresql(element, compiler, **kw):
+    document = compiler.process(list(element.clauses)[0], **kw)
+    return f"({document} ->> {_literal(element.key)})"
+
+
+@compiles(json_text, "sqlite")
+def _json_text_sqlite(element, compiler, **kw):
+    document = compiler.process(list(element.clauses)[0], **kw)
+    return f"json_extract({document}, {_literal('$.' + element.key)})"
+
+
+@compiles(json_text)
+def _json_text_default(element, compiler, **kw):
+    raise CompileError(f"json_text is not supported on {compiler.dialect.name}")
+
+
 # Dependency to get database session
 async def get_db() -> AsyncSession:
     """Dependency for getting async database session"""
@@ -0,0 +1,144 @@
+"""Conditional and ranged file responses for stored blobs.
+
+Starlette's ``FileResponse`` streams files in chunks but ignores ``Range`` and
+``If-None-Match``. ``conditional_file_response`` adds both on top of it using a
+strong ETag (the blob's sha256), so clients can revalidate and resume large
+downloads without the server buffering the file.
+"""
+
+import os
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive ``(start, end)`` offsets.
+
+    Returns None when the header should be ignored (absent, malformed or a
+    multi-range request) and raises ``RangeNotSatisfiable`` when the range does
+    not overlap the file.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not first:
+        if not last.isdigit():
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - suffix, 0), size - 1
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class FileRangeResponse(Response):
+    """``206 Partial Content`` response streaming ``[start, end]`` of a file."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        end: int,
+        size: int,
+        headers: Mapping[str, str],
+        media_type: str,
+    ):
+        super().__init__(status_code=206, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method", "GET").upper() != "HEAD":
+            remaining = self.end - self.start + 1
+            async with await anyio.open_file(self.path, "rb") as file:
+                await file.seek(self.start)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def conditional_file_response(
+    request: Request,
+    path: Path,
+    *,
+    etag: str,
+    media_type: str,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Serve ``path`` honouring ``If-None-Match``, ``Range`` and ``If-Range``."""
+    quoted_etag = f'"{etag}"'
+    base_headers = {
+        **(headers or {}),
+        "ETag": quoted_etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), quoted_etag):
+        return Response(status_code=304, headers={
+            "ETag": quoted_etag,
+            "Cache-Control": base_headers["Cache-Control"],
+        })
+
+    stat_result = os.stat(path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == quoted_etag):
+        try:
+            byte_range = parse_byte_range(range_header, stat_result.st_size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={
+                "Content-Range": f"bytes */{stat_result.st_size}",
+                "ETag": quoted_etag,
+            })
+        if byte_range is not None:
+            start, end = byte_range
+            return FileRangeResponse(path, start, end, stat_result.st_size, base_headers, media_type)
+
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers=base_headers,
+        stat_result=stat_result,
+        method=request.method,
+    )
@@ -0,0 +1,220 @@
+"""Process-wide pooled Redis client guarded by a circuit breaker.
+
+Redis is an optimisation here (attempt start times, refresh token rotation,
+caches): every caller has a database or no-op fallback. The breaker makes
+that fallback cheap — after ``REDIS_CIRCUIT_FAILURE_THRESHOLD`` consecutive
+failures Redis is skipped entirely for ``REDIS_CIRCUIT_RESET_SECONDS`` instead
+of every request waiting for a timeout. Then a single probe call is let
+through; everyone else keeps falling back until it succeeds or fails.
+
+At most ``REDIS_MAX_CONNECTIONS`` guarded calls run at once; a burst beyond
+that waits up to ``REDIS_POOL_TIMEOUT_SECONDS`` for a slot and then falls
+back. Running out of slots says nothing about Redis' health, so it does not
+count towards opening the circuit.
+
+Usage::
+
+    try:
+        async with redis_manager.guard() as r:
+            await r.set(key, value)
+    except RedisUnavailable:
+        pass  # fall back
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisUnavailable(Exception):
+    """Redis failed, timed out, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self.probing = False  # the half-open probe is in flight
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go to Redis; half-open, only the first caller probes."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        state = self.state
+        if state == self.HALF_OPEN or (state == self.CLOSED and self.failures >= self.failure_threshold):
+            logger.warning("Redis circuit opened after %s consecutive failures", self.failures)
+            self.opened_at = self._clock()
+        self.probing = False
+
+    def abandon_probe(self) -> None:
+        """The probe ended without a verdict on Redis; the next caller probes instead."""
+        self.probing = False
+
+
+class RedisManager:
+    """Owns one connection pool per process; created in the app lifespan."""
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_connections: int,
+        pool_timeout: float,
+        socket_timeout: float,
+        connect_timeout: float,
+        breaker: CircuitBreaker,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = breaker
+        self._pool: Optional[redis.ConnectionPool] = None
+        self._client: Optional[redis.Redis] = None
+        # One slot per pooled connection, held for a guarded block (which uses
+        # one connection at a time); counters are exposed by metrics()
+        self._slots = asyncio.Semaphore(max_connections)
+        self.in_use = 0
+        self.waiting = 0
+        self.pool_timeouts = 0
+
+    def _connect(self) -> None:
+        # guard() admits at most max_connections callers, so the pool never runs dry
+        self._pool = redis.ConnectionPool.from_url(
+            self.url,
+            decode_responses=True,
+            max_connections=self.max_connections,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.connect_timeout,
+        )
+        self._client = redis.Redis(connection_pool=self._pool)
+
+    @property
+    def client(self) -> redis.Redis:
+        # Created lazily so scripts and tests work without the lifespan
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._connect()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            await self._pool.disconnect()
+        self._client = None
+        self._pool = None
+
+    async def _acquire_slot(self) -> None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.pool_timeout)
+        except asyncio.TimeoutError:
+            self.pool_timeouts += 1
+            raise RedisUnavailable("No Redis connection available") from None
+        finally:
+            self.waiting -= 1
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[redis.Redis]:
+        """Yield the shared client; Redis errors surface as ``RedisUnavailable``."""
+        if not self.breaker.allow():
+            raise RedisUnavailable("Redis circuit is open")
+        probe = self.breaker.probing
+        try:
+            await self._acquire_slot()
+        except BaseException:
+            if probe:
+                self.breaker.abandon_probe()
+            raise
+        self.in_use += 1
+        try:
+            yield self.client
+        except (RedisError, OSError, asyncio.TimeoutError) as exc:
+            self.breaker.record_failure()
+            raise RedisUnavailable(str(exc)) from exc
+        except BaseException:
+            if probe:
+                self.breaker.abandon_probe()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, object]:
+        return {
+            "max_connections": self.max_connections,
+            "in_use_connections": self.in_use,
+            "waiting_calls": self.waiting,
+            "pool_timeouts": self.pool_timeouts,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "rejected_calls": self.breaker.rejected,
+        }
+
+
+redis_manager = RedisManager(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    pool_timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.REDIS_CIRCUIT_RESET_SECONDS,
+    ),
+)
@@ -46,6 +46,25 @@ def create_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 
+def create_file_token(data: dict) -> str:
+    """Create a signed token referencing an uploaded file answer"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(minutes=settings.FILE_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "type": "file"})
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_file_token(token: str) -> Optional[dict]:
+    """Decode a file token; returns None if it is invalid, expired or not a file token"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "file":
+        return None
+    return payload
+
+
 def decode_token(token: str) -> dict:
     """Decode and validate JWT token"""
     try:
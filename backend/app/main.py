@@ -1,13 +1,47 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.redis_client import redis_manager
+from app.core.admission import AdmissionRejected, attempt_start_gate
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.services.answer_drafts import draft_flusher
+from app.services.blob_sweeper import blob_sweeper
+from app.services.deadline_worker import deadline_worker
+from app.services.exam_window import exam_warmer
+from app.services.grading_worker import grading_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop shared clients and background workers with the application"""
+    await redis_manager.start()
+    await grading_workers.start()
+    await draft_flusher.start()
+    await deadline_worker.start()
+    await exam_warmer.start()
+    await blob_sweeper.start()
+    try:
+        yield
+    finally:
+        await blob_sweeper.stop()
+        await exam_warmer.stop()
+        await deadline_worker.stop()
+        await draft_flusher.stop()
+        await grading_workers.stop()
+        await redis_manager.close()
+        password_hasher.shutdown()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -17,9 +51,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Shed login/registration load instead of queueing unbounded bcrypt work"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Сервер перегружен, повторите попытку через несколько секунд"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Ask clients to come back later instead of piling starts onto the database pool"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Слишком много одновременных запусков, повторите попытку позже"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/")
 async def root():
     """Корневой эндпоинт"""
@@ -33,7 +88,12 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Проверка здоровья сервиса"""
-    return {"status": "здоров"}
+    return {
+        "status": "здоров",
+        "redis": redis_manager.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "attempt_start_gate": attempt_start_gate.metrics(),
+    }
 
 
 # Include API router
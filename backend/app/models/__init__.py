@@ -3,6 +3,10 @@ from app.models.test import Test, Question, QuestionOption, TestAssignment
 from app.models.result import TestResult, Answer
 from app.models.group import Group, GroupMembership
 from app.models.grade_settings import GradeSettings
+from app.models.submission import QueuedSubmission
+from app.models.test_stats import TestStats
+from app.models.draft import AnswerDraft
+from app.models.attempt_session import AttemptSession
 
 __all__ = [
     "User",
@@ -15,5 +19,9 @@ __all__ = [
     "Group",
     "GroupMembership",
     "GradeSettings",
+    "QueuedSubmission",
+    "TestStats",
+    "AnswerDraft",
+    "AttemptSession",
 ]
 
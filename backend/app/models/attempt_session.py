@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, Enum as SQLEnum, text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+ATTEMPT_STATUSES = ("active", "submitted", "expired")
+
+
+class AttemptSession(Base):
+    """A started attempt: server start time, deadline and lifecycle status"""
+    __tablename__ = "attempt_sessions"
+    __table_args__ = (
+        # At most one active attempt per (test, student): concurrent starts resolve to the same session
+        Index(
+            "uq_attempt_sessions_active_test_id_student_id",
+            "test_id",
+            "student_id",
+            unique=True,
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        Index("ix_attempt_sessions_student_id_status", "student_id", "status"),
+        # Deadline sweep backstop for the Redis schedule
+        Index(
+            "ix_attempt_sessions_active_deadline_at",
+            "deadline_at",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    deadline_at = Column(DateTime(timezone=True), nullable=True)  # None for untimed tests
+    status = Column(SQLEnum(*ATTEMPT_STATUSES, name="attemptstatus"), nullable=False, default="active")
+    result_id = Column(Integer, ForeignKey("test_results.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<AttemptSession(id={self.id}, status={self.status})>"
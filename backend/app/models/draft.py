@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AnswerDraft(Base):
+    """Last persisted autosave of an in-progress attempt (Redis holds the live copy)"""
+    __tablename__ = "answer_drafts"
+
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Attempt session the draft belongs to; drafts of other attempts are ignored
+    attempt_id = Column(Integer, ForeignKey("attempt_sessions.id", ondelete="CASCADE"), nullable=True)
+
+    # {"<question_id>": answer_data, ...}
+    answers = Column(JSON, nullable=False)
+    # {"<question_id>": epoch ms of its last save}; merged against the Redis copy
+    answer_saved_at = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<AnswerDraft(test_id={self.test_id}, student_id={self.student_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,11 @@ from app.core.database import Base
 
 class Group(Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        # Keyset pagination of group listings (newest first)
+        Index("ix_groups_created_at_id", "created_at", "id"),
+        Index("ix_groups_creator_id_created_at_id", "creator_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, unique=True)
@@ -26,6 +31,7 @@ class GroupMembership(Base):
     __tablename__ = "group_memberships"
     __table_args__ = (
         UniqueConstraint("group_id", "student_id", name="uix_group_student"),
+        Index("ix_group_memberships_student_id", "student_id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -1,13 +1,25 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, JSON, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, JSON, Index, Enum as SQLEnum, text
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
-from app.core.database import Base
+from app.core.database import Base, json_text
 
 
 class TestResult(Base):
     """Test result model - stores completed test attempts"""
     __tablename__ = "test_results"
+    __table_args__ = (
+        # Keyset pagination of result listings (newest first)
+        Index("ix_test_results_completed_at_id", "completed_at", "id"),
+        Index("ix_test_results_student_id_completed_at_id", "student_id", "completed_at", "id"),
+        Index("ix_test_results_test_id_completed_at_id", "test_id", "completed_at", "id"),
+        # Attempt counting per (test, student); one result per attempt number
+        Index(
+            "uq_test_results_test_id_student_id_attempt_number",
+            "test_id", "student_id", "attempt_number",
+            unique=True,
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
@@ -48,6 +60,16 @@ class TestResult(Base):
 class Answer(Base):
     """Answer model - stores student's answer to a question"""
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_test_result_id", "test_result_id"),
+        Index("ix_answers_question_id", "question_id"),
+        # Manual grading queue (paged by id): only answers still awaiting a grade
+        Index(
+            "ix_answers_pending_id", "id",
+            postgresql_where=text("is_correct IS NULL"),
+            sqlite_where=text("is_correct IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_result_id = Column(Integer, ForeignKey("test_results.id", ondelete="CASCADE"), nullable=False)
@@ -56,7 +78,10 @@ class Answer(Base):
     # Answer data - flexible storage
     # For multiple choice: JSON array of selected option IDs
     # For text answers: JSON object with text field
-    answer_data = Column(JSON, nullable=False)
+    # Deferred: grading and listings never need it, and legacy file answers
+    # hold whole base64 files. Load it explicitly (undefer) or select a
+    # stripped copy via results_service.answer_view_columns().
+    answer_data = deferred(Column(JSON, nullable=False), raiseload=True)
     
     # Scoring
     is_correct = Column(Boolean, nullable=True)  # NULL for manual grading
@@ -74,3 +99,11 @@ class Answer(Base):
     def __repr__(self):
         return f"<Answer(id={self.id}, is_correct={self.is_correct})>"
 
+
+# Stored file blobs referenced by answers, for the unreferenced-blob sweep
+_answer_file_sha256 = json_text(Answer.__table__.c.answer_data, "file_sha256")
+Index(
+    "ix_answers_file_sha256", _answer_file_sha256,
+    postgresql_where=_answer_file_sha256.isnot(None),
+    sqlite_where=_answer_file_sha256.isnot(None),
+)
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+SUBMISSION_STATUSES = ("queued", "processing", "completed", "failed")
+
+
+class QueuedSubmission(Base):
+    """Durable outbox row for an asynchronously graded test submission"""
+    __tablename__ = "queued_submissions"
+    __table_args__ = (
+        Index("ix_queued_submissions_status_id", "status", "id"),
+        Index("ix_queued_submissions_attempt_session_id", "attempt_session_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # Raw submission as received: list of {"question_id", "answer_data"}
+    payload = Column(JSON, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    submitted_at = Column(DateTime(timezone=True), nullable=False)
+
+    status = Column(SQLEnum(*SUBMISSION_STATUSES, name="submissionstatus"), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)  # processing attempts by workers
+    error = Column(Text, nullable=True)
+    error_code = Column(Integer, nullable=True)
+    result_id = Column(Integer, ForeignKey("test_results.id", ondelete="SET NULL"), nullable=True)
+    attempt_session_id = Column(Integer, ForeignKey("attempt_sessions.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    # Set per claim; outcomes are only recorded by the worker holding the current lease
+    lease_token = Column(String(32), nullable=True)
+    retry_at = Column(DateTime(timezone=True), nullable=True)  # not claimed again before (backoff)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    result = relationship("TestResult", foreign_keys=[result_id])
+
+    def __repr__(self):
+        return f"<QueuedSubmission(id={self.id}, status={self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Float, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Float, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -31,6 +31,13 @@ class TestStatus(str, enum.Enum):
 class Test(Base):
     """Test model - contains test information and questions"""
     __tablename__ = "tests"
+    __table_args__ = (
+        # Keyset pagination of listings: newest first, per creator or overall
+        Index("ix_tests_created_at_id", "created_at", "id"),
+        Index("ix_tests_creator_id_created_at_id", "creator_id", "created_at", "id"),
+        # Exam windows about to open, for cache warm-up
+        Index("ix_tests_exam_opens_at", "exam_opens_at", postgresql_where=text("exam_opens_at IS NOT NULL")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -43,6 +50,10 @@ class Test(Base):
     show_results = Column(Boolean, default=True)  # Show results to student
     shuffle_questions = Column(Boolean, default=False)
     shuffle_options = Column(Boolean, default=False)
+
+    # Exam window: the class starts together; NULL = no window
+    exam_opens_at = Column(DateTime(timezone=True), nullable=True)
+    exam_closes_at = Column(DateTime(timezone=True), nullable=True)  # also ends running attempts
     
     status = Column(SQLEnum(TestStatus, values_callable=lambda x: [e.value for e in x]), default=TestStatus.DRAFT, nullable=False)
     
@@ -66,6 +77,9 @@ class Test(Base):
 class Question(Base):
     """Question model - individual question in a test"""
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_test_id_id", "test_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
@@ -95,6 +109,9 @@ class Question(Base):
 class QuestionOption(Base):
     """Question option model - for multiple choice questions"""
     __tablename__ = "question_options"
+    __table_args__ = (
+        Index("ix_question_options_question_id", "question_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
@@ -118,6 +135,8 @@ class TestAssignment(Base):
     __tablename__ = "test_assignments"
     __table_args__ = (
         UniqueConstraint("test_id", "student_id", name="uix_test_assignments_test_student"),
+        # Student-side lookups ("my tests"); the unique constraint covers test_id first
+        Index("ix_test_assignments_student_id_test_id", "student_id", "test_id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+HISTOGRAM_BUCKETS = 10  # score buckets of 10 points: bucket_0 = [0, 10) ... bucket_9 = [90, 100]
+
+
+class TestStats(Base):
+    """Per-test rollup of results, maintained in the same transaction as each result change"""
+    __tablename__ = "test_stats"
+
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    unique_students = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)  # results awaiting manual grading
+
+    # Graded results only (pending ones join once their grading completes)
+    graded_count = Column(Integer, nullable=False, default=0)
+    passes = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_sq_sum = Column(Float, nullable=False, default=0.0)
+
+    bucket_0 = Column(Integer, nullable=False, default=0)
+    bucket_1 = Column(Integer, nullable=False, default=0)
+    bucket_2 = Column(Integer, nullable=False, default=0)
+    bucket_3 = Column(Integer, nullable=False, default=0)
+    bucket_4 = Column(Integer, nullable=False, default=0)
+    bucket_5 = Column(Integer, nullable=False, default=0)
+    bucket_6 = Column(Integer, nullable=False, default=0)
+    bucket_7 = Column(Integer, nullable=False, default=0)
+    bucket_8 = Column(Integer, nullable=False, default=0)
+    bucket_9 = Column(Integer, nullable=False, default=0)
+
+    # Bumped by every regrade, even one that leaves all counters unchanged
+    regrade_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<TestStats(test_id={self.test_id}, attempts={self.attempts})>"
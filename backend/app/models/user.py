@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -24,6 +24,9 @@ class StudentGender(str, enum.Enum):
 class User(Base):
     """User model for all platform users"""
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),  # keyset pagination
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -51,15 +54,15 @@ class User(Base):
     
     # Relationships
     # For teachers - created tests
-    created_tests = relationship("Test", back_populates="creator", foreign_keys="Test.creator_id")
+    created_tests = relationship("Test", back_populates="creator", foreign_keys="Test.creator_id", cascade="all, delete-orphan")
     
     # For students - test assignments and results
-    test_assignments = relationship("TestAssignment", back_populates="student", foreign_keys="TestAssignment.student_id")
-    test_results = relationship("TestResult", back_populates="student", foreign_keys="TestResult.student_id")
+    test_assignments = relationship("TestAssignment", back_populates="student", foreign_keys="TestAssignment.student_id", cascade="all, delete-orphan")
+    test_results = relationship("TestResult", back_populates="student", foreign_keys="TestResult.student_id", cascade="all, delete-orphan")
     
     # For parents - children relationships
-    children = relationship("ParentChild", back_populates="parent", foreign_keys="ParentChild.parent_id")
-    parents = relationship("ParentChild", back_populates="child", foreign_keys="ParentChild.child_id")
+    children = relationship("ParentChild", back_populates="parent", foreign_keys="ParentChild.parent_id", cascade="all, delete-orphan")
+    parents = relationship("ParentChild", back_populates="child", foreign_keys="ParentChild.child_id", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, role={self.role})>"
@@ -75,6 +75,26 @@ class TestResultListResponse(BaseModel):
         from_attributes = True
 
 
+class GradingQueueItem(BaseModel):
+    """Answer awaiting manual grading; file answers carry metadata only, never content"""
+    id: int  # answer id
+    test_result_id: int
+    test_id: int
+    test_title: str
+    question_id: int
+    question_text: str
+    question_type: str
+    max_points: float
+    student_id: int
+    student_full_name: Optional[str] = None
+    student_username: Optional[str] = None
+    answer_data: Optional[Dict[str, Any]] = None  # None for file uploads
+    file_name: Optional[str] = None
+    file_type: Optional[str] = None
+    file_size: Optional[int] = None
+    created_at: datetime
+
+
 # Test attempt schemas (for taking a test)
 class TestAttemptStart(BaseModel):
     """Start a test attempt"""
@@ -84,10 +104,52 @@ class TestAttemptStart(BaseModel):
 class TestAttemptSubmit(BaseModel):
     """Submit answers for a test attempt"""
     test_id: int
-    started_at: datetime
+    attempt_id: Optional[int] = None  # from /start; defaults to the active attempt
+    started_at: Optional[datetime] = None  # ignored, the attempt session holds the start time
+    answers: List[AnswerCreate] = []
+    from_draft: bool = False  # merge the autosaved draft under ``answers``
+
+
+class DraftUpdate(BaseModel):
+    """Autosave of individual answers of an in-progress attempt"""
+    answers: List[AnswerCreate] = Field(..., min_length=1, max_length=200)
+
+
+class DraftResponse(BaseModel):
+    """Autosaved answers of an in-progress attempt"""
+    test_id: int
     answers: List[AnswerCreate]
 
 
+class FileUploadResponse(BaseModel):
+    """Reference to a streamed file answer; send ``file_token`` in ``answer_data``"""
+    file_token: str
+    file_name: str
+    file_type: str
+    file_size: int
+
+
+class SubmissionAcceptedResponse(BaseModel):
+    """Acknowledgement of an asynchronously graded submission"""
+    submission_id: int
+    status: str
+
+
+class SubmissionStatusResponse(BaseModel):
+    """Processing state of a queued submission"""
+    id: int
+    test_id: int
+    status: str
+    result_id: Optional[int] = None
+    error: Optional[str] = None
+    error_code: Optional[int] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class GradeAnswerRequest(BaseModel):
     """Manual grading by teacher"""
     answer_id: int
@@ -95,3 +157,7 @@ class GradeAnswerRequest(BaseModel):
     points_earned: float = Field(..., ge=0)
     teacher_comment: Optional[str] = None
 
+
+class BatchGradeRequest(BaseModel):
+    """Several manual grades applied atomically"""
+    grades: List[GradeAnswerRequest] = Field(..., min_length=1, max_length=500)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
 from app.models.test import QuestionType, TestStatus
 
 
@@ -70,6 +70,18 @@ class TestBase(BaseModel):
     shuffle_questions: bool = False
     shuffle_options: bool = False
     status: TestStatus = TestStatus.DRAFT
+    # Exam window: starts are accepted only between these moments
+    exam_opens_at: Optional[datetime] = None
+    exam_closes_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def validate_exam_window(self):
+        bounds = [self.exam_opens_at, self.exam_closes_at]
+        if all(bounds):
+            opens_at, closes_at = (value if value.tzinfo else value.replace(tzinfo=timezone.utc) for value in bounds)
+            if closes_at <= opens_at:
+                raise ValueError("Окно экзамена должно закрываться позже, чем открывается")
+        return self
 
 
 class TestCreate(TestBase):
@@ -86,6 +98,8 @@ class TestUpdate(BaseModel):
     shuffle_questions: Optional[bool] = None
     shuffle_options: Optional[bool] = None
     status: Optional[TestStatus] = None
+    exam_opens_at: Optional[datetime] = None
+    exam_closes_at: Optional[datetime] = None
 
 
 class TestResponse(TestBase):
@@ -113,6 +127,57 @@ class TestListResponse(BaseModel):
         from_attributes = True
 
 
+# Test statistics schemas
+class ScoreBucket(BaseModel):
+    """Number of graded results with ``from <= score < to`` (the last bucket includes 100)"""
+    from_: int = Field(..., alias="from")
+    to: int
+    count: int
+
+    class Config:
+        populate_by_name = True
+
+
+class TestStatsResponse(BaseModel):
+    """Rollup of a test's results; averages cover graded results only"""
+    test_id: int
+    attempts: int
+    unique_students: int
+    graded_count: int
+    pending_count: int
+    average_score: Optional[float] = None
+    score_stddev: Optional[float] = None
+    pass_rate: Optional[float] = None
+    histogram: List[ScoreBucket]
+    updated_at: Optional[datetime] = None
+
+
+# Item analysis schemas
+class OptionAnalysis(BaseModel):
+    """How often an option was chosen and how well its choosers did overall"""
+    option_id: int
+    is_correct: bool
+    selection_rate: Optional[float] = None
+    mean_total_score: Optional[float] = None
+
+
+class QuestionAnalysis(BaseModel):
+    question_id: int
+    question_type: QuestionType
+    max_points: float
+    difficulty: Optional[float] = None  # mean share of points earned (p-value)
+    discrimination: Optional[float] = None  # point-biserial vs. the rest of the test
+    options: List[OptionAnalysis] = []
+
+
+class ItemAnalysisResponse(BaseModel):
+    """Item analysis over graded attempts of a test"""
+    test_id: int
+    attempts: int
+    mean_total_score: Optional[float] = None
+    questions: List[QuestionAnalysis]
+
+
 # Test Assignment schemas
 class TestAssignmentBase(BaseModel):
     test_id: int
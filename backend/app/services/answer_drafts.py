@@ -0,0 +1,368 @@
+"""Server-side autosave of in-progress attempts with Redis write-behind.
+
+Every autosave lands in a Redis hash ``draft:{test_id}:{student_id}`` (field =
+question id, value = JSON ``answer_data``) and marks the attempt in the
+``drafts:dirty`` set. The hash and the row are tagged with the attempt
+session id: a draft left over from an earlier attempt (e.g. its discard hit
+a Redis outage) is never returned for, or merged into, the next one. The
+:class:`DraftFlusher` pops dirty attempts in batches and upserts one compact
+``answer_drafts`` row per attempt, so the database sees one write per
+attempt per flush interval instead of one per keystroke. Popping is atomic,
+so several processes can flush concurrently.
+
+Redis holds the live copy; the table is what survives a Redis restart and
+what autosaves are written to directly while Redis is unavailable. Either
+side can therefore hold the newer answer to a question: every save records
+its time per question (``<question id>:at`` hash fields, the row's
+``answer_saved_at``), and loads and flushes merge both, keeping the newest
+save of each question.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, upsert_insert
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.draft import AnswerDraft
+from app.services.attempt_sessions import AttemptSessionInfo
+from app.services.results_service import AttemptRejected
+
+logger = logging.getLogger(__name__)
+
+DIRTY_DRAFTS_KEY = "drafts:dirty"
+# Reserved hash field holding the attempt session id (question fields are numeric)
+ATTEMPT_FIELD = "attempt"
+# Suffix of the hash field holding when a question was last saved (epoch ms)
+SAVED_AT_SUFFIX = ":at"
+
+# question id (str) -> (saved at in epoch ms, answer_data)
+DraftEntries = Dict[str, Tuple[int, Any]]
+
+# KEYS: draft hash, dirty set. ARGV: attempt id, ttl, dirty member, field/value pairs.
+# A hash of another attempt is dropped instead of merged into.
+_SAVE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'attempt') ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+redis.call('HSET', KEYS[1], 'attempt', ARGV[1], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[3])
+return 1
+"""
+
+# KEYS: draft hash, dirty set. ARGV: attempt id, dirty member.
+# Leaves the draft of a newer attempt alone.
+_DISCARD_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'attempt') == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+
+def draft_key(test_id: int, student_id: int) -> str:
+    return f"draft:{test_id}:{student_id}"
+
+
+def _member(test_id: int, student_id: int) -> str:
+    return f"{test_id}:{student_id}"
+
+
+def _parse_member(member: str) -> Tuple[int, int]:
+    test_id, student_id = member.split(":", 1)
+    return int(test_id), int(student_id)
+
+
+def encode_draft_answers(answers: Mapping[int, Dict[str, Any]]) -> Dict[str, str]:
+    """Hash fields for ``answers``; oversized answers are rejected with 413."""
+    encoded = {}
+    for question_id, payload in answers.items():
+        value = json.dumps(payload, separators=(",", ":"))
+        if len(value.encode()) > settings.DRAFT_MAX_ANSWER_BYTES:
+            raise AttemptRejected(413, f"Draft answer for question {question_id} is too large")
+        encoded[str(question_id)] = value
+    return encoded
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def _hash_entries(fields: Mapping[str, str]) -> DraftEntries:
+    """Entries of a Redis draft hash; saves from before timestamps count as oldest."""
+    entries = {}
+    for field, value in fields.items():
+        if field == ATTEMPT_FIELD or field.endswith(SAVED_AT_SUFFIX):
+            continue
+        try:
+            entries[field] = (int(fields.get(field + SAVED_AT_SUFFIX) or 0), json.loads(value))
+        except (TypeError, ValueError):
+            continue
+    return entries
+
+
+def _row_entries(row: Optional[AnswerDraft], attempt_id: Optional[int]) -> DraftEntries:
+    """Entries of a stored draft row, if it belongs to ``attempt_id``."""
+    if row is None or row.attempt_id != attempt_id:
+        return {}
+    saved_at = row.answer_saved_at or {}
+    return {question_id: (int(saved_at.get(question_id) or 0), payload) for question_id, payload in row.answers.items()}
+
+
+def _merge_entries(*sources: DraftEntries) -> DraftEntries:
+    """Newest save of every question across ``sources``; later sources win ties."""
+    merged: DraftEntries = {}
+    for entries in sources:
+        for question_id, entry in entries.items():
+            if question_id not in merged or entry[0] >= merged[question_id][0]:
+                merged[question_id] = entry
+    return merged
+
+
+def _row_values(entries: DraftEntries) -> Dict[str, Any]:
+    return {
+        "answers": {question_id: payload for question_id, (_, payload) in entries.items()},
+        "answer_saved_at": {question_id: saved_at for question_id, (saved_at, _) in entries.items()},
+    }
+
+
+def _decode(entries: DraftEntries) -> Dict[int, Dict[str, Any]]:
+    decoded = {}
+    for question_id, (_, payload) in entries.items():
+        try:
+            decoded[int(question_id)] = payload if isinstance(payload, dict) else {}
+        except ValueError:
+            continue
+    return decoded
+
+
+async def _upsert_drafts(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    # updated_at comes from the application clock, like attempt start times it is compared to
+    now = datetime.now(timezone.utc)
+    insert = upsert_insert(db)
+    stmt = insert(AnswerDraft)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnswerDraft.test_id, AnswerDraft.student_id],
+        set_={
+            "attempt_id": stmt.excluded.attempt_id,
+            "answers": stmt.excluded.answers,
+            "answer_saved_at": stmt.excluded.answer_saved_at,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt, [{**row, "updated_at": now} for row in rows])
+
+
+async def save_draft_answers(
+    db: AsyncSession,
+    session: AttemptSessionInfo,
+    answers: Mapping[int, Dict[str, Any]],
+) -> None:
+    """Upsert individual answers of the attempt's draft.
+
+    Goes to Redis when available (the flusher persists it later); otherwise
+    the stored row is merged and committed directly. A stored draft of
+    another attempt is replaced, not merged. Each answer is stamped with
+    the time of this save.
+    """
+    encoded = encode_draft_answers(answers)
+    saved_at = _now_ms()
+    member = _member(session.test_id, session.student_id)
+    try:
+        async with redis_manager.guard() as r:
+            await r.eval(
+                _SAVE_SCRIPT, 2, draft_key(session.test_id, session.student_id), DIRTY_DRAFTS_KEY,
+                str(session.id), session.redis_ttl_seconds(), member,
+                *[
+                    item
+                    for field, value in encoded.items()
+                    for item in (field, value, field + SAVED_AT_SUFFIX, saved_at)
+                ],
+            )
+        return
+    except RedisUnavailable:
+        pass
+
+    stored = await db.get(AnswerDraft, (session.test_id, session.student_id), with_for_update=True)
+    entries = _row_entries(stored, session.id)
+    entries.update({str(question_id): (saved_at, payload) for question_id, payload in answers.items()})
+    await _upsert_drafts(db, [{
+        "test_id": session.test_id, "student_id": session.student_id, "attempt_id": session.id,
+        **_row_values(entries),
+    }])
+    await db.commit()
+
+
+async def load_draft(db: AsyncSession, session: AttemptSessionInfo) -> Dict[int, Dict[str, Any]]:
+    """Draft of the attempt as ``question_id -> answer_data``; empty if there is none.
+
+    Redis and the database row are merged per question, newest save first:
+    answers saved to the row during a Redis outage survive an older hash
+    that was not flushed before it.
+    """
+    cached: DraftEntries = {}
+    try:
+        async with redis_manager.guard() as r:
+            fields = await r.hgetall(draft_key(session.test_id, session.student_id))
+        if fields.get(ATTEMPT_FIELD) == str(session.id):
+            cached = _hash_entries(fields)
+    except RedisUnavailable:
+        pass
+
+    stored = (await db.execute(
+        select(AnswerDraft).where(
+            AnswerDraft.test_id == session.test_id,
+            AnswerDraft.student_id == session.student_id,
+            AnswerDraft.attempt_id == session.id,
+        )
+    )).scalar_one_or_none()
+    return _decode(_merge_entries(_row_entries(stored, session.id), cached))
+
+
+async def discard_draft(db: AsyncSession, session: AttemptSessionInfo) -> None:
+    """Drop the draft once the attempt has been submitted. Commits."""
+    try:
+        async with redis_manager.guard() as r:
+            await r.eval(
+                _DISCARD_SCRIPT, 2, draft_key(session.test_id, session.student_id), DIRTY_DRAFTS_KEY,
+                str(session.id), _member(session.test_id, session.student_id),
+            )
+    except RedisUnavailable:
+        pass
+    await db.execute(
+        delete(AnswerDraft).where(
+            AnswerDraft.test_id == session.test_id,
+            AnswerDraft.student_id == session.student_id,
+            AnswerDraft.attempt_id == session.id,
+        )
+    )
+    await db.commit()
+
+
+async def flush_dirty_drafts(db: AsyncSession, limit: int) -> int:
+    """Persist up to ``limit`` dirty drafts in one statement. Returns the number written.
+
+    An autosave arriving after the pop marks the attempt dirty again, so it
+    is picked up by the next flush. Hashes are merged into the stored rows
+    per question, so answers saved directly to a row while Redis was down
+    are not overwritten by an older hash; a row of a later attempt is left
+    alone. On a database error the popped attempts are put back.
+    """
+    async with redis_manager.guard() as r:
+        members = list(await r.spop(DIRTY_DRAFTS_KEY, limit) or [])
+        if not members:
+            return 0
+        async with r.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.hgetall(draft_key(*_parse_member(member)))
+            drafts = await pipe.execute()
+
+    cached = {}
+    for member, fields in zip(members, drafts):
+        if not fields:  # submitted or expired meanwhile
+            continue
+        attempt_id = fields.get(ATTEMPT_FIELD)
+        cached[_parse_member(member)] = (int(attempt_id) if attempt_id is not None else None, _hash_entries(fields))
+    if not cached:
+        return 0
+    try:
+        stored = {
+            (row.test_id, row.student_id): row
+            for row in (await db.execute(
+                select(AnswerDraft)
+                .where(tuple_(AnswerDraft.test_id, AnswerDraft.student_id).in_(list(cached)))
+                .with_for_update()
+            )).scalars()
+        }
+        rows = []
+        for (test_id, student_id), (attempt_id, entries) in cached.items():
+            row = stored.get((test_id, student_id))
+            if row is not None and row.attempt_id is not None and (attempt_id is None or row.attempt_id > attempt_id):
+                continue
+            rows.append({
+                "test_id": test_id,
+                "student_id": student_id,
+                "attempt_id": attempt_id,
+                **_row_values(_merge_entries(_row_entries(row, attempt_id), entries)),
+            })
+        if rows:
+            await _upsert_drafts(db, rows)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        try:
+            async with redis_manager.guard() as r:
+                await r.sadd(DIRTY_DRAFTS_KEY, *members)
+        except RedisUnavailable:
+            logger.warning("Could not requeue %s dirty drafts", len(members))
+        raise
+    return len(rows)
+
+
+class DraftFlusher:
+    """Background task periodically writing dirty Redis drafts to ``answer_drafts``."""
+
+    def __init__(self, session_factory: async_sessionmaker, interval: float, batch_size: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="draft-flusher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.flush_all()
+        except Exception:
+            logger.exception("Final draft flush failed")
+
+    async def flush_all(self) -> int:
+        """Flush batches until no dirty drafts remain (or Redis is unavailable)."""
+        flushed = 0
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    written = await flush_dirty_drafts(db, self.batch_size)
+            except RedisUnavailable:
+                return flushed
+            flushed += written
+            if written < self.batch_size:
+                return flushed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Draft flush failed")
+
+
+draft_flusher = DraftFlusher(
+    session_factory=AsyncSessionLocal,
+    interval=settings.DRAFT_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.DRAFT_FLUSH_BATCH_SIZE,
+)
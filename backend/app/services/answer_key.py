@@ -0,0 +1,223 @@
+"""Compiled answer keys for published tests.
+
+Grading a submission only needs a handful of derived facts per question
+(correct option ids, accepted short-answer variants, expected ordering...).
+Deriving them from the ORM graph on every submit is wasteful, so they are
+compiled once per test version and kept in a small in-process LRU.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+import re
+import string
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.test import Test, Question, QuestionType, TestStatus
+
+
+_SHORT_ANSWER_SPLIT_PATTERN = re.compile(r"[|;\n,]+")
+_TRUE_VALUES = frozenset({"true", "истина", "правда", "yes", "1"})
+_FALSE_VALUES = frozenset({"false", "ложь", "no", "0"})
+
+
+def parse_float_value(value: Optional[Any]) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        normalized = value.strip().replace(",", ".")
+        if not normalized:
+            return None
+        value = normalized
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_true_false(value: Optional[Any]) -> Optional[bool]:
+    if value is None:
+        return None
+    value_str = str(value).strip().lower()
+    if value_str in _TRUE_VALUES:
+        return True
+    if value_str in _FALSE_VALUES:
+        return False
+    return None
+
+
+def normalize_short_answer(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    normalized = value.strip().lower()
+    if not normalized:
+        return None
+    normalized = normalized.replace("ё", "е")
+    normalized = re.sub(r"\s+", " ", normalized)
+    normalized = normalized.strip(string.punctuation + " ")
+    return normalized or None
+
+
+def get_short_answer_variants(answer_text: Optional[str]) -> List[str]:
+    if not answer_text:
+        return []
+    raw_variants = _SHORT_ANSWER_SPLIT_PATTERN.split(answer_text)
+    normalized_variants = []
+    for variant in raw_variants:
+        normalized = normalize_short_answer(variant)
+        if normalized:
+            normalized_variants.append(normalized)
+    # fallback: if splitting removed everything, try whole text
+    if not normalized_variants:
+        normalized = normalize_short_answer(answer_text)
+        if normalized:
+            normalized_variants.append(normalized)
+    return normalized_variants
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    """Everything needed to grade one question, with no ORM objects attached."""
+
+    id: int
+    question_type: QuestionType
+    points: float
+    # SINGLE_CHOICE / MULTIPLE_CHOICE
+    correct_option_ids: FrozenSet[int] = frozenset()
+    # MATCHING (every option must be matched to itself)
+    option_ids: FrozenSet[int] = frozenset()
+    # ORDERING
+    expected_sequence: Tuple[int, ...] = ()
+    # FILL_IN_BLANK
+    expected_blanks: Tuple[str, ...] = ()
+    # SHORT_ANSWER
+    short_answer_variants: FrozenSet[str] = frozenset()
+    # TRUE_FALSE
+    expected_bool: Optional[bool] = None
+    # NUMERIC
+    expected_number: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Immutable grading snapshot of a test at a given version."""
+
+    test_id: int
+    version: str
+    status: TestStatus
+    passing_score: float
+    max_attempts: Optional[int]
+    duration_minutes: Optional[int]
+    questions: Tuple[CompiledQuestion, ...]
+    points_total: float
+    questions_by_id: Dict[int, CompiledQuestion] = field(default_factory=dict, compare=False)
+
+
+def version_stamp(test: Test) -> str:
+    """Version stamp of a test; question mutations touch ``Test.updated_at``."""
+    stamp: Optional[datetime] = test.updated_at or test.created_at
+    return stamp.isoformat() if stamp else ""
+
+
+def compile_question(question: Question) -> CompiledQuestion:
+    qtype = question.question_type
+    options = list(question.options or [])
+    kwargs: Dict[str, Any] = {}
+
+    if qtype in (QuestionType.SINGLE_CHOICE, QuestionType.MULTIPLE_CHOICE):
+        kwargs["correct_option_ids"] = frozenset(o.id for o in options if o.is_correct)
+    elif qtype == QuestionType.MATCHING:
+        kwargs["option_ids"] = frozenset(o.id for o in options)
+    elif qtype == QuestionType.ORDERING:
+        kwargs["expected_sequence"] = tuple(o.id for o in sorted(options, key=lambda o: o.order))
+    elif qtype == QuestionType.FILL_IN_BLANK:
+        correct_text = question.correct_answer_text or ""
+        kwargs["expected_blanks"] = tuple(
+            part.strip().lower() for part in correct_text.split(",") if part.strip()
+        )
+    elif qtype == QuestionType.SHORT_ANSWER:
+        kwargs["short_answer_variants"] = frozenset(get_short_answer_variants(question.correct_answer_text))
+    elif qtype == QuestionType.TRUE_FALSE:
+        kwargs["expected_bool"] = normalize_true_false(question.correct_answer_text)
+    elif qtype == QuestionType.NUMERIC:
+        kwargs["expected_number"] = parse_float_value(question.correct_answer_text)
+
+    return CompiledQuestion(
+        id=question.id,
+        question_type=qtype,
+        points=float(question.points or 0.0),
+        **kwargs,
+    )
+
+
+def compile_answer_key(test: Test, questions: List[Question]) -> AnswerKey:
+    compiled = tuple(compile_question(q) for q in questions)
+    return AnswerKey(
+        test_id=test.id,
+        version=version_stamp(test),
+        status=test.status,
+        passing_score=test.passing_score,
+        max_attempts=test.max_attempts,
+        duration_minutes=test.duration_minutes,
+        questions=compiled,
+        points_total=sum(q.points for q in compiled),
+        questions_by_id={q.id: q for q in compiled},
+    )
+
+
+class AnswerKeyCache:
+    """Small LRU of compiled answer keys keyed by ``(test_id, version)``."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, str], AnswerKey]" = OrderedDict()
+
+    def get(self, test_id: int, version: str) -> Optional[AnswerKey]:
+        key = (test_id, version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: AnswerKey) -> None:
+        # Only one version per test is ever useful: drop stale ones eagerly
+        self.invalidate(key.test_id)
+        self._entries[(key.test_id, key.version)] = key
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, test_id: int) -> None:
+        for cached in [k for k in self._entries if k[0] == test_id]:
+            del self._entries[cached]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+answer_key_cache = AnswerKeyCache(maxsize=settings.ANSWER_KEY_CACHE_SIZE)
+
+
+async def get_answer_key(db: AsyncSession, test: Test) -> AnswerKey:
+    """Return the compiled key for ``test``, loading questions only on a cache miss."""
+    version = version_stamp(test)
+    cached = answer_key_cache.get(test.id, version)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(Question)
+        .options(selectinload(Question.options))
+        .where(Question.test_id == test.id)
+        .order_by(Question.id)
+    )
+    key = compile_answer_key(test, list(result.scalars().all()))
+    answer_key_cache.put(key)
+    return key
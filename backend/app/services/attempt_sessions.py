@@ -0,0 +1,313 @@
+"""Attempt sessions: the server-side record of a started attempt.
+
+``POST /results/start`` creates one ``attempt_sessions`` row per attempt —
+server start time, deadline derived from ``duration_minutes`` and the exam
+window's close, status — and mirrors it into Redis:
+
+* ``attempt_session:{id}`` — hash with the session fields;
+* ``attempt_sessions:{student_id}`` — hash ``test_id -> id`` indexing the
+  student's active sessions;
+* ``attempt_deadlines`` — sorted set of timed attempts scored by the moment
+  they are due for automatic submission (deadline plus grace), drained by
+  the deadline worker.
+
+Submit resolves its attempt with one keyed Redis lookup and falls back to the
+table when Redis misses or is unavailable. A partial unique index allows a
+single active session per (test, student), so a second tab or a repeated
+start resumes the same attempt instead of overwriting it, and closing a
+session is a conditional update that exactly one submission can win.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.attempt_session import AttemptSession
+from app.models.test import Test
+
+
+def session_key(attempt_id: int) -> str:
+    return f"attempt_session:{attempt_id}"
+
+
+def student_index_key(student_id: int) -> str:
+    return f"attempt_sessions:{student_id}"
+
+
+DEADLINES_KEY = "attempt_deadlines"
+
+# Pops up to ARGV[2] members due at ARGV[1] atomically, so concurrent
+# workers never receive the same attempt: O(log n + batch)
+_POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass(frozen=True)
+class AttemptSessionInfo:
+    """Snapshot of a session, read from Redis or the table."""
+    id: int
+    test_id: int
+    student_id: int
+    started_at: datetime
+    deadline_at: Optional[datetime]
+    status: str
+    result_id: Optional[int] = None  # set once a submission recorded the attempt
+
+    @property
+    def active(self) -> bool:
+        return self.status == "active"
+
+    @property
+    def due_at(self) -> Optional[datetime]:
+        """When the server submits the attempt itself: deadline plus grace."""
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at + timedelta(seconds=settings.ATTEMPT_DEADLINE_GRACE_SECONDS)
+
+    def overdue(self, now: Optional[datetime] = None) -> bool:
+        """Too late for the student to submit or autosave."""
+        due_at = self.due_at
+        return due_at is not None and (now or datetime.now(timezone.utc)) > due_at
+
+    def redis_ttl_seconds(self, now: Optional[datetime] = None) -> int:
+        """Cache lifetime: until the deadline plus ``ATTEMPT_SESSION_REDIS_TTL_SECONDS``."""
+        ttl = settings.ATTEMPT_SESSION_REDIS_TTL_SECONDS
+        if self.deadline_at is not None:
+            now = now or datetime.now(timezone.utc)
+            ttl += max(int((self.deadline_at - now).total_seconds()), 0)
+        return ttl
+
+    @classmethod
+    def from_row(cls, row: AttemptSession) -> "AttemptSessionInfo":
+        return cls(
+            id=row.id,
+            test_id=row.test_id,
+            student_id=row.student_id,
+            started_at=_aware(row.started_at),
+            deadline_at=_aware(row.deadline_at),
+            status=row.status,
+            result_id=row.result_id,
+        )
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, str]) -> "AttemptSessionInfo":
+        return cls(
+            id=int(fields["id"]),
+            test_id=int(fields["test_id"]),
+            student_id=int(fields["student_id"]),
+            started_at=datetime.fromisoformat(fields["started_at"]),
+            deadline_at=datetime.fromisoformat(fields["deadline_at"]) if fields.get("deadline_at") else None,
+            status=fields["status"],
+        )
+
+    def to_fields(self) -> Dict[str, str]:
+        return {
+            "id": str(self.id),
+            "test_id": str(self.test_id),
+            "student_id": str(self.student_id),
+            "started_at": self.started_at.isoformat(),
+            "deadline_at": self.deadline_at.isoformat() if self.deadline_at else "",
+            "status": self.status,
+        }
+
+
+async def _cache_session(info: AttemptSessionInfo) -> None:
+    ttl = info.redis_ttl_seconds()
+    try:
+        async with redis_manager.guard() as r:
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.hset(session_key(info.id), mapping=info.to_fields())
+                pipe.expire(session_key(info.id), ttl)
+                pipe.hset(student_index_key(info.student_id), str(info.test_id), str(info.id))
+                pipe.expire(student_index_key(info.student_id), ttl)
+                if info.due_at is not None:
+                    # Idempotent, so read-through also restores schedules lost with Redis data
+                    pipe.zadd(DEADLINES_KEY, {str(info.id): info.due_at.timestamp()})
+                await pipe.execute()
+    except RedisUnavailable:
+        pass
+
+
+async def forget_attempt_session(info: AttemptSessionInfo) -> None:
+    """Drop a closed session from Redis; later lookups read the table."""
+    try:
+        async with redis_manager.guard() as r:
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.delete(session_key(info.id))
+                pipe.hdel(student_index_key(info.student_id), str(info.test_id))
+                pipe.zrem(DEADLINES_KEY, str(info.id))
+                await pipe.execute()
+    except RedisUnavailable:
+        pass
+
+
+async def get_attempt_session(db: AsyncSession, attempt_id: int) -> Optional[AttemptSessionInfo]:
+    try:
+        async with redis_manager.guard() as r:
+            fields = await r.hgetall(session_key(attempt_id))
+        if fields:
+            return AttemptSessionInfo.from_fields(fields)
+    except (RedisUnavailable, KeyError, ValueError):
+        pass
+
+    row = await db.get(AttemptSession, attempt_id)
+    if row is None:
+        return None
+    info = AttemptSessionInfo.from_row(row)
+    if info.active:
+        await _cache_session(info)
+    return info
+
+
+async def find_active_session(db: AsyncSession, test_id: int, student_id: int) -> Optional[AttemptSessionInfo]:
+    """The student's active session for ``test_id``, via the per-student index."""
+    try:
+        async with redis_manager.guard() as r:
+            attempt_id = await r.hget(student_index_key(student_id), str(test_id))
+            fields = await r.hgetall(session_key(int(attempt_id))) if attempt_id else None
+        if fields:
+            info = AttemptSessionInfo.from_fields(fields)
+            if info.active:
+                return info
+    except (RedisUnavailable, KeyError, ValueError):
+        pass
+
+    row = (await db.execute(
+        select(AttemptSession).where(
+            AttemptSession.test_id == test_id,
+            AttemptSession.student_id == student_id,
+            AttemptSession.status == "active",
+        )
+    )).scalar_one_or_none()
+    if row is None:
+        return None
+    info = AttemptSessionInfo.from_row(row)
+    await _cache_session(info)
+    return info
+
+
+async def find_submitted_session(
+    db: AsyncSession,
+    test_id: int,
+    student_id: int,
+    closed_since: datetime,
+) -> Optional[AttemptSessionInfo]:
+    """The student's latest session for ``test_id`` submitted at or after ``closed_since``."""
+    row = (await db.execute(
+        select(AttemptSession)
+        .where(
+            AttemptSession.test_id == test_id,
+            AttemptSession.student_id == student_id,
+            AttemptSession.status == "submitted",
+            AttemptSession.closed_at >= closed_since,
+        )
+        .order_by(AttemptSession.closed_at.desc(), AttemptSession.id.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    return AttemptSessionInfo.from_row(row) if row is not None else None
+
+
+async def close_attempt_session(
+    db: AsyncSession,
+    attempt_id: int,
+    status: str,
+    result_id: Optional[int] = None,
+) -> bool:
+    """Move an active session to ``status``. Does not commit.
+
+    Returns False when the session was no longer active, i.e. another
+    submission already closed it.
+    """
+    values = {"status": status, "closed_at": datetime.now(timezone.utc)}
+    if result_id is not None:
+        values["result_id"] = result_id
+    closed = await db.execute(
+        update(AttemptSession)
+        .where(AttemptSession.id == attempt_id, AttemptSession.status == "active")
+        .values(**values)
+    )
+    return closed.rowcount == 1
+
+
+async def start_attempt_session(
+    db: AsyncSession,
+    test: Test,
+    student_id: int,
+) -> Tuple[AttemptSessionInfo, bool]:
+    """Create the session of a new attempt. Commits.
+
+    Returns ``(session, resumed)``: when a concurrent start (second tab) has
+    just created the active session, that one is returned with ``resumed``.
+    """
+    now = datetime.now(timezone.utc)
+    deadline_at = now + timedelta(minutes=test.duration_minutes) if test.duration_minutes else None
+    closes_at = _aware(test.exam_closes_at)
+    if closes_at is not None and (deadline_at is None or closes_at < deadline_at):
+        deadline_at = closes_at  # the exam window ends every attempt
+    row = AttemptSession(
+        test_id=test.id,
+        student_id=student_id,
+        started_at=now,
+        deadline_at=deadline_at,
+        status="active",
+    )
+    db.add(row)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        winner = await find_active_session(db, test.id, student_id)
+        if winner is None:
+            raise
+        return winner, True
+    info = AttemptSessionInfo.from_row(row)
+    await _cache_session(info)
+    return info, False
+
+
+async def pop_due_attempts(now: datetime, limit: int) -> List[int]:
+    """Remove and return up to ``limit`` attempts due by ``now``. Raises ``RedisUnavailable``."""
+    async with redis_manager.guard() as r:
+        due = await r.eval(_POP_DUE_SCRIPT, 1, DEADLINES_KEY, now.timestamp(), limit)
+    return [int(attempt_id) for attempt_id in due]
+
+
+async def reschedule_attempt(attempt_id: int, at: datetime) -> None:
+    try:
+        async with redis_manager.guard() as r:
+            await r.zadd(DEADLINES_KEY, {str(attempt_id): at.timestamp()})
+    except RedisUnavailable:
+        pass  # the database sweep picks it up
+
+
+async def find_overdue_attempts(db: AsyncSession, now: datetime, limit: int) -> List[int]:
+    """Active attempts past deadline and grace, read from the table.
+
+    Backstop for schedules Redis lost (outage, eviction, restart without
+    persistence); served by the partial index on active deadlines.
+    """
+    cutoff = now - timedelta(seconds=settings.ATTEMPT_DEADLINE_GRACE_SECONDS)
+    rows = await db.execute(
+        select(AttemptSession.id)
+        .where(AttemptSession.status == "active", AttemptSession.deadline_at < cutoff)
+        .order_by(AttemptSession.deadline_at)
+        .limit(limit)
+    )
+    return list(rows.scalars())
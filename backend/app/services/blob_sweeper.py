@@ -0,0 +1,117 @@
+"""Removal of stored file blobs that no answer references.
+
+Blobs are written before anything references them: ``POST /results/uploads``
+stores the file and only a later submit records its digest in an answer,
+and ``finalize_attempt`` stores legacy base64 files before inserting the
+result, which can still be rejected or rolled back. Uploads never submitted
+and failed submissions leave such blobs behind.
+
+The :class:`BlobSweeper` periodically deletes blobs last written more than
+``FILE_TOKEN_EXPIRE_MINUTES`` + ``BLOB_SWEEP_GRACE_SECONDS`` ago — no upload
+token can refer to them anymore — whose digest no
+``answers.answer_data.file_sha256`` holds (an indexed expression). Writing
+content that is already stored refreshes its timestamp, so a fresh upload
+of deduplicated content keeps it for another token lifetime.
+"""
+
+import asyncio
+import itertools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.blob_store import BlobStore, blob_store
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, json_text
+from app.models.result import Answer
+
+logger = logging.getLogger(__name__)
+
+
+async def sweep_unreferenced_blobs(
+    db: AsyncSession,
+    store: BlobStore,
+    older_than: timedelta,
+    batch_size: int,
+) -> int:
+    """Delete unreferenced blobs last written before ``older_than`` ago. Returns the number deleted."""
+    cutoff = (datetime.now(timezone.utc) - older_than).timestamp()
+    candidates = store.iter_written_before(cutoff)
+    file_sha256 = json_text(Answer.answer_data, "file_sha256")
+    deleted = 0
+    while True:
+        batch = await asyncio.to_thread(lambda: list(itertools.islice(candidates, batch_size)))
+        if not batch:
+            break
+        referenced = set((await db.execute(select(file_sha256).where(file_sha256.in_(batch)))).scalars())
+        unreferenced = [digest for digest in batch if digest not in referenced]
+        # Re-checked per blob: content uploaded again meanwhile was refreshed
+        deleted += await asyncio.to_thread(
+            lambda: sum(store.delete_if_written_before(digest, cutoff) for digest in unreferenced)
+        )
+    await asyncio.to_thread(store.purge_tmp, cutoff)
+    return deleted
+
+
+class BlobSweeper:
+    """Background task periodically deleting unreferenced blobs."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        store: BlobStore,
+        interval: float,
+        older_than: timedelta,
+        batch_size: int,
+    ):
+        self.session_factory = session_factory
+        self.store = store
+        self.interval = interval
+        self.older_than = older_than
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="blob-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as db:
+            deleted = await sweep_unreferenced_blobs(db, self.store, self.older_than, self.batch_size)
+        if deleted:
+            logger.info("Deleted %s unreferenced blobs", deleted)
+        return deleted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Blob sweep failed")
+
+
+blob_sweeper = BlobSweeper(
+    session_factory=AsyncSessionLocal,
+    store=blob_store,
+    interval=settings.BLOB_SWEEP_INTERVAL_SECONDS,
+    older_than=timedelta(minutes=settings.FILE_TOKEN_EXPIRE_MINUTES, seconds=settings.BLOB_SWEEP_GRACE_SECONDS),
+    batch_size=settings.BLOB_SWEEP_BATCH_SIZE,
+)
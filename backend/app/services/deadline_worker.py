@@ -0,0 +1,161 @@
+"""Automatic submission of timed attempts when their time runs out.
+
+Every timed attempt session is scheduled in the ``attempt_deadlines`` Redis
+sorted set at its deadline plus grace (see ``app.services.attempt_sessions``).
+The :class:`DeadlineWorker` pops due attempts in batches with an atomic
+script — O(log n) per attempt, no per-attempt timers or polling — and
+finalizes each one from its saved draft through the normal grading path.
+A periodic sweep of the ``attempt_sessions`` table covers schedules Redis
+lost, and replaces the sorted set entirely while Redis is unavailable.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import RedisUnavailable
+from app.models.attempt_session import AttemptSession
+from app.models.result import TestResult
+from app.models.test import Test
+from app.services.answer_drafts import discard_draft, load_draft
+from app.services.attempt_sessions import (
+    AttemptSessionInfo, close_attempt_session, find_overdue_attempts, forget_attempt_session,
+    pop_due_attempts, reschedule_attempt,
+)
+from app.services.results_service import AttemptRejected, finalize_attempt
+
+logger = logging.getLogger(__name__)
+
+
+async def expire_attempt(db: AsyncSession, attempt_id: int) -> Optional[TestResult]:
+    """Submit an overdue attempt from its draft; a no-op unless it is still active and overdue.
+
+    The attempt is recorded as completed at its deadline. An attempt that
+    cannot be recorded (e.g. no attempts left) is closed without a result.
+    """
+    row = await db.get(AttemptSession, attempt_id)
+    if row is None or row.status != "active":
+        return None
+    session = AttemptSessionInfo.from_row(row)
+    if not session.overdue():
+        # Popped early (clock skew between processes): keep it scheduled
+        if session.due_at is not None:
+            await reschedule_attempt(session.id, session.due_at)
+        return None
+    test = await db.get(Test, session.test_id)
+    answers = await load_draft(db, session)
+    try:
+        result = await finalize_attempt(
+            db,
+            test=test,
+            student_id=session.student_id,
+            answers=answers,
+            started_at=session.started_at,
+            completed_at=session.deadline_at,
+            attempt_session=session,
+            auto_submitted=True,
+        )
+    except AttemptRejected as exc:
+        if exc.status_code != 409:  # 409: the student's own submit won
+            logger.warning("Closing overdue attempt %s without a result: %s", attempt_id, exc.detail)
+            if await close_attempt_session(db, session.id, "expired"):
+                await db.commit()
+                await discard_draft(db, session)
+            await forget_attempt_session(session)
+        return None
+    await discard_draft(db, session)
+    return result
+
+
+class DeadlineWorker:
+    """Background task draining the deadline schedule with bounded concurrency."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        poll_interval: float,
+        batch_size: int,
+        concurrency: int,
+        sweep_interval: float,
+        retry_delay: timedelta,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.sweep_interval = sweep_interval
+        self.retry_delay = retry_delay
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._last_sweep: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is not None or self.concurrency <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="deadline-worker")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _expire(self, attempt_id: int) -> None:
+        async with self._semaphore:
+            try:
+                async with self.session_factory() as db:
+                    await expire_attempt(db, attempt_id)
+            except Exception:
+                logger.exception("Automatic submission of attempt %s failed", attempt_id)
+                await reschedule_attempt(attempt_id, datetime.now(timezone.utc) + self.retry_delay)
+
+    async def _due_attempts(self, now: datetime) -> List[int]:
+        loop = asyncio.get_running_loop()
+        sweep = self._last_sweep is None or loop.time() - self._last_sweep >= self.sweep_interval
+        try:
+            due = await pop_due_attempts(now, self.batch_size)
+        except RedisUnavailable:
+            due, sweep = [], True
+        if sweep and len(due) < self.batch_size:
+            self._last_sweep = loop.time()
+            async with self.session_factory() as db:
+                overdue = await find_overdue_attempts(db, now, self.batch_size - len(due))
+            due.extend(attempt_id for attempt_id in overdue if attempt_id not in due)
+        return due
+
+    async def run_once(self) -> int:
+        """Expire one batch of due attempts. Returns the batch size."""
+        due = await self._due_attempts(datetime.now(timezone.utc))
+        await asyncio.gather(*(self._expire(attempt_id) for attempt_id in due))
+        return len(due)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.run_once() >= self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Deadline worker failed")
+            await asyncio.sleep(self.poll_interval)
+
+
+deadline_worker = DeadlineWorker(
+    session_factory=AsyncSessionLocal,
+    poll_interval=settings.DEADLINE_POLL_INTERVAL_SECONDS,
+    batch_size=settings.DEADLINE_BATCH_SIZE,
+    concurrency=settings.DEADLINE_WORKER_CONCURRENCY,
+    sweep_interval=settings.DEADLINE_SWEEP_INTERVAL_SECONDS,
+    retry_delay=timedelta(seconds=settings.DEADLINE_RETRY_SECONDS),
+)
@@ -0,0 +1,182 @@
+"""Exam windows: a whole class opening the same test at the same moment.
+
+A test with ``exam_opens_at``/``exam_closes_at`` accepts new attempts only
+inside its window, and attempts end at the latest when it closes. The
+openings are the worst traffic the platform sees — every assigned student
+loads the test, starts it and authenticates within seconds — so the
+per-test data they need is prepared beforehand: when such a test is
+published, and periodically from ``EXAM_WARMUP_LEAD_SECONDS`` before until
+as long after its window opens, the :class:`ExamWarmer` loads
+
+* the student-view snapshot (process LRU + Redis) and the compiled answer key;
+* the assignee set ``test_assignees:{test_id}`` in Redis, answering the
+  "assigned to you?" check of ``GET /tests/{id}`` without a query;
+* the auth principals of the assigned students.
+
+Start requests themselves pass the admission gate in
+``app.core.admission``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.test import Test, TestAssignment, TestStatus
+from app.services.answer_key import get_answer_key
+from app.services.student_view import get_student_view
+from app.services.user_principal import prime_user_principals
+
+logger = logging.getLogger(__name__)
+
+
+def assignees_key(test_id: int) -> str:
+    return f"test_assignees:{test_id}"
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def has_exam_window(test: Test) -> bool:
+    return test.exam_opens_at is not None or test.exam_closes_at is not None
+
+
+def exam_window_inverted(test: Test) -> bool:
+    opens_at, closes_at = _aware(test.exam_opens_at), _aware(test.exam_closes_at)
+    return opens_at is not None and closes_at is not None and closes_at <= opens_at
+
+
+def exam_window_error(test: Test, now: Optional[datetime] = None) -> Optional[str]:
+    """Why a new attempt of ``test`` cannot start at ``now``; ``None`` when it can."""
+    now = now or datetime.now(timezone.utc)
+    opens_at, closes_at = _aware(test.exam_opens_at), _aware(test.exam_closes_at)
+    if opens_at is not None and now < opens_at:
+        return f"The exam window opens at {opens_at.isoformat()}"
+    if closes_at is not None and now >= closes_at:
+        return "The exam window has closed"
+    return None
+
+
+async def is_assigned(db: AsyncSession, test: Test, student_id: int) -> bool:
+    """Assignment check, served by the warmed assignee set for exam tests.
+
+    The set only answers positively: students assigned after it was built
+    are still found through the table.
+    """
+    if has_exam_window(test):
+        try:
+            async with redis_manager.guard() as r:
+                if await r.sismember(assignees_key(test.id), str(student_id)):
+                    return True
+        except RedisUnavailable:
+            pass
+    found = await db.execute(
+        select(TestAssignment.id).where(
+            TestAssignment.test_id == test.id,
+            TestAssignment.student_id == student_id,
+        )
+    )
+    return found.scalar_one_or_none() is not None
+
+
+async def invalidate_assignees(test_id: int) -> None:
+    """Drop the assignee set after assignments of the test were removed."""
+    try:
+        async with redis_manager.guard() as r:
+            await r.delete(assignees_key(test_id))
+    except RedisUnavailable:
+        # Entries expire after twice EXAM_WARMUP_LEAD_SECONDS anyway
+        pass
+
+
+async def warm_exam_caches(db: AsyncSession, test: Test) -> int:
+    """Prepare everything the opening of ``test`` reads. Returns the number of assignees."""
+    await get_student_view(db, test)
+    await get_answer_key(db, test)
+    student_ids = list((await db.execute(
+        select(TestAssignment.student_id).where(TestAssignment.test_id == test.id)
+    )).scalars())
+    if not student_ids:
+        return 0
+    await prime_user_principals(db, student_ids)
+    try:
+        async with redis_manager.guard() as r:
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.delete(assignees_key(test.id))
+                pipe.sadd(assignees_key(test.id), *map(str, student_ids))
+                pipe.expire(assignees_key(test.id), 2 * settings.EXAM_WARMUP_LEAD_SECONDS)
+                await pipe.execute()
+    except RedisUnavailable:
+        pass
+    return len(student_ids)
+
+
+async def find_opening_exams(db: AsyncSession, now: datetime, lead: timedelta) -> List[Test]:
+    """Published tests whose window opens within ``lead`` of ``now`` (either side)."""
+    rows = await db.execute(
+        select(Test).where(
+            Test.status == TestStatus.PUBLISHED,
+            Test.exam_opens_at.between(now - lead, now + lead),
+        )
+    )
+    return list(rows.scalars())
+
+
+class ExamWarmer:
+    """Background task keeping caches warm around the opening of exam windows."""
+
+    def __init__(self, session_factory: async_sessionmaker, interval: float, lead: timedelta):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.lead = lead
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="exam-warmer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run_once(self) -> int:
+        """Warm every exam opening around now. Returns the number of tests warmed."""
+        async with self.session_factory() as db:
+            tests = await find_opening_exams(db, datetime.now(timezone.utc), self.lead)
+            for test in tests:
+                await warm_exam_caches(db, test)
+        return len(tests)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Exam warm-up failed")
+            await asyncio.sleep(self.interval)
+
+
+exam_warmer = ExamWarmer(
+    session_factory=AsyncSessionLocal,
+    interval=settings.EXAM_WARMUP_INTERVAL_SECONDS,
+    lead=timedelta(seconds=settings.EXAM_WARMUP_LEAD_SECONDS),
+)
@@ -0,0 +1,363 @@
+"""Per-question-type graders.
+
+Every ``QuestionType`` has one grader class registered in ``GRADERS``. Graders
+work on compiled answer keys (see ``app.services.answer_key``) and expose a
+batch ``grade_many(key, payloads)`` entry point so that the live submit path
+and bulk regrading share exactly the same code.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.models.test import QuestionType
+from app.services.answer_key import (
+    AnswerKey, CompiledQuestion,
+    normalize_short_answer, normalize_true_false, parse_float_value,
+)
+
+
+MAX_FILE_SIZE_BYTES = 20 * 1024 * 1024
+
+
+class InvalidAnswerError(ValueError):
+    """Raised when a payload cannot be accepted at all (not merely incorrect)."""
+
+
+@dataclass(frozen=True)
+class GradeOutcome:
+    is_correct: Optional[bool]  # None -> awaiting manual grading
+    points: float = 0.0
+
+    @property
+    def is_pending(self) -> bool:
+        return self.is_correct is None
+
+
+INCORRECT = GradeOutcome(False, 0.0)
+PENDING = GradeOutcome(None, 0.0)
+
+
+@dataclass(frozen=True)
+class AttemptGrade:
+    """Outcome of grading one submission against an answer key."""
+
+    outcomes: Tuple[Tuple[CompiledQuestion, Dict[str, Any], GradeOutcome], ...]
+    points_earned: float
+    points_total: float
+    pending_answers_count: int
+
+    @property
+    def score(self) -> float:
+        return (self.points_earned / self.points_total * 100) if self.points_total > 0 else 0
+
+
+class BaseGrader(ABC):
+    question_type: ClassVar[QuestionType]
+
+    @abstractmethod
+    def grade_many(self, key: CompiledQuestion, payloads: Sequence[Mapping[str, Any]]) -> List[GradeOutcome]:
+        """One outcome per payload, in order."""
+
+    def grade(self, key: CompiledQuestion, payload: Mapping[str, Any]) -> GradeOutcome:
+        return self.grade_many(key, [payload])[0]
+
+
+GRADERS: Dict[QuestionType, BaseGrader] = {}
+
+
+def register_grader(cls):
+    GRADERS[cls.question_type] = cls()
+    return cls
+
+
+def get_grader(question_type: QuestionType) -> BaseGrader:
+    grader = GRADERS.get(question_type)
+    if grader is None:
+        raise LookupError(f"No grader registered for {question_type}")
+    return grader
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@register_grader
+class SingleChoiceGrader(BaseGrader):
+    question_type = QuestionType.SINGLE_CHOICE
+
+    def grade_many(self, key, payloads):
+        correct_ids = key.correct_option_ids
+        hit = GradeOutcome(True, key.points)
+        return [
+            hit if _to_int(payload.get("selected_option_id")) in correct_ids else INCORRECT
+            for payload in payloads
+        ]
+
+
+@register_grader
+class MultipleChoiceGrader(BaseGrader):
+    question_type = QuestionType.MULTIPLE_CHOICE
+
+    def grade_many(self, key, payloads):
+        correct_ids = key.correct_option_ids
+        if not correct_ids:
+            return [INCORRECT] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        outcomes = []
+        for payload in payloads:
+            raw_selected = payload.get("selected_option_ids", [])
+            if not isinstance(raw_selected, (list, tuple, set)):
+                raw_selected = []
+            selected = {
+                int(option_id)
+                for option_id in raw_selected
+                if isinstance(option_id, (int, str)) and str(option_id).strip() != ""
+            }
+            outcomes.append(hit if selected == correct_ids else INCORRECT)
+        return outcomes
+
+
+@register_grader
+class TrueFalseGrader(BaseGrader):
+    question_type = QuestionType.TRUE_FALSE
+
+    def grade_many(self, key, payloads):
+        expected = key.expected_bool
+        if expected is None:
+            return [INCORRECT] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        return [
+            hit if normalize_true_false(payload.get("value")) is expected else INCORRECT
+            for payload in payloads
+        ]
+
+
+@register_grader
+class FillInBlankGrader(BaseGrader):
+    question_type = QuestionType.FILL_IN_BLANK
+
+    def grade_many(self, key, payloads):
+        expected = key.expected_blanks
+        if not expected:
+            return [INCORRECT] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        outcomes = []
+        for payload in payloads:
+            blanks = payload.get("blanks", [])
+            if isinstance(blanks, dict):
+                try:
+                    blanks = [blanks[k] for k in sorted(blanks, key=lambda x: int(x))]
+                except (TypeError, ValueError):
+                    blanks = []
+            if not isinstance(blanks, list):
+                blanks = []
+            student = tuple(str(value).strip().lower() for value in blanks if str(value).strip())
+            outcomes.append(hit if student == expected else INCORRECT)
+        return outcomes
+
+
+@register_grader
+class NumericGrader(BaseGrader):
+    question_type = QuestionType.NUMERIC
+    tolerance: ClassVar[float] = 1e-4
+
+    def grade_many(self, key, payloads):
+        expected = key.expected_number
+        if expected is None:
+            return [INCORRECT] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        tolerance = self.tolerance
+        outcomes = []
+        for payload in payloads:
+            value = payload.get("number_value")
+            if value is None:
+                value = payload.get("value")
+            value = parse_float_value(value)
+            outcomes.append(hit if value is not None and abs(value - expected) <= tolerance else INCORRECT)
+        return outcomes
+
+
+@register_grader
+class MatchingGrader(BaseGrader):
+    question_type = QuestionType.MATCHING
+
+    def grade_many(self, key, payloads):
+        expected_ids = key.option_ids
+        if not expected_ids:
+            return [INCORRECT] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        outcomes = []
+        for payload in payloads:
+            matches = payload.get("matches", {})
+            if not isinstance(matches, dict):
+                matches = {}
+            prepared = {}
+            for left, right in matches.items():
+                left_id, right_id = _to_int(left), _to_int(right)
+                if left_id is not None and right_id is not None:
+                    prepared[left_id] = right_id
+            correct = len(prepared) == len(expected_ids) and all(
+                prepared.get(option_id) == option_id for option_id in expected_ids
+            )
+            outcomes.append(hit if correct else INCORRECT)
+        return outcomes
+
+
+@register_grader
+class OrderingGrader(BaseGrader):
+    question_type = QuestionType.ORDERING
+
+    def grade_many(self, key, payloads):
+        expected = key.expected_sequence
+        if not expected:
+            return [INCORRECT] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        outcomes = []
+        for payload in payloads:
+            order_map = payload.get("order", {})
+            if not isinstance(order_map, dict):
+                order_map = {}
+            prepared: Dict[int, int] = {}
+            for option_id, position in order_map.items():
+                option_id, position = _to_int(option_id), _to_int(position)
+                if option_id is not None and position is not None:
+                    prepared[option_id] = position
+            if len(prepared) != len(expected) or len(set(prepared.values())) != len(prepared):
+                outcomes.append(INCORRECT)
+                continue
+            sequence = tuple(option_id for option_id, _ in sorted(prepared.items(), key=lambda item: item[1]))
+            outcomes.append(hit if sequence == expected else INCORRECT)
+        return outcomes
+
+
+@register_grader
+class ShortAnswerGrader(BaseGrader):
+    question_type = QuestionType.SHORT_ANSWER
+
+    def grade_many(self, key, payloads):
+        variants = key.short_answer_variants
+        if not variants:
+            # No configured correct answers -> requires manual grading
+            return [PENDING] * len(payloads)
+        hit = GradeOutcome(True, key.points)
+        return [
+            hit if normalize_short_answer(payload.get("text") or payload.get("value")) in variants else INCORRECT
+            for payload in payloads
+        ]
+
+
+class ManualGrader(BaseGrader):
+    """Accepts any payload and leaves it for the teacher."""
+
+    def grade_many(self, key, payloads):
+        return [PENDING] * len(payloads)
+
+
+@register_grader
+class EssayGrader(ManualGrader):
+    question_type = QuestionType.ESSAY
+
+
+@register_grader
+class CodeGrader(ManualGrader):
+    question_type = QuestionType.CODE
+
+
+@register_grader
+class FileUploadGrader(ManualGrader):
+    question_type = QuestionType.FILE_UPLOAD
+
+    def validate(self, payload: Mapping[str, Any]) -> None:
+        file_name = payload.get("file_name")
+        file_type = payload.get("file_type")
+        file_size = _to_int(payload.get("file_size"))
+        raw_content = payload.get("file_content")
+
+        if file_size is not None and file_size > MAX_FILE_SIZE_BYTES:
+            raise InvalidAnswerError("Размер файла превышает допустимый лимит (20 МБ)")
+
+        # Files streamed via /results/uploads arrive already stored (resolved token)
+        if not payload.get("file_sha256"):
+            if not raw_content or not isinstance(raw_content, str):
+                raise InvalidAnswerError("Для этого вопроса нужно загрузить файл")
+
+            content_payload = raw_content
+            if content_payload.startswith("data:"):
+                content_payload = content_payload.split(",", 1)[-1]
+            approx_bytes = int(len(content_payload) * 3 / 4)
+            if approx_bytes > int(MAX_FILE_SIZE_BYTES * 1.4):  # base64 overhead (~33%)
+                raise InvalidAnswerError("Размер файла превышает допустимый лимит (20 МБ)")
+        if not file_name or not isinstance(file_name, str):
+            raise InvalidAnswerError("Не указано имя файла")
+        if len(file_name) > 255:
+            raise InvalidAnswerError("Имя файла слишком длинное")
+        if file_type is not None and not isinstance(file_type, str):
+            raise InvalidAnswerError("Некорректный тип файла")
+
+    def grade_many(self, key, payloads):
+        for payload in payloads:
+            self.validate(payload)
+        # file uploads всегда проверяются вручную
+        return [PENDING] * len(payloads)
+
+
+def _grade_leniently(grader: BaseGrader, key: CompiledQuestion, payloads: Sequence[Mapping[str, Any]]) -> List[GradeOutcome]:
+    try:
+        return grader.grade_many(key, payloads)
+    except InvalidAnswerError:
+        pass
+    outcomes = []
+    for payload in payloads:
+        try:
+            outcomes.append(grader.grade(key, payload))
+        except InvalidAnswerError:
+            outcomes.append(INCORRECT)
+    return outcomes
+
+
+def grade_submissions(
+    key: AnswerKey,
+    submissions: Sequence[Mapping[int, Dict[str, Any]]],
+    invalid_as_incorrect: bool = False,
+) -> List[AttemptGrade]:
+    """Grade many submissions (question_id -> payload) against one answer key.
+
+    Payloads are batched per question so each grader's loop runs once per
+    question rather than once per (submission, question) pair. Missing answers
+    are graded as empty payloads. Unacceptable payloads raise
+    ``InvalidAnswerError`` unless ``invalid_as_incorrect`` is set (attempts
+    submitted by the server at their deadline), in which case they score 0.
+    """
+    per_submission: List[List[Tuple[CompiledQuestion, Dict[str, Any], GradeOutcome]]] = [[] for _ in submissions]
+
+    for question in key.questions:
+        payloads = [submission.get(question.id) or {} for submission in submissions]
+        grader = get_grader(question.question_type)
+        if invalid_as_incorrect:
+            outcomes = _grade_leniently(grader, question, payloads)
+        else:
+            outcomes = grader.grade_many(question, payloads)
+        for bucket, payload, outcome in zip(per_submission, payloads, outcomes):
+            bucket.append((question, payload, outcome))
+
+    grades = []
+    for bucket in per_submission:
+        grades.append(AttemptGrade(
+            outcomes=tuple(bucket),
+            points_earned=sum(outcome.points for _, _, outcome in bucket),
+            points_total=key.points_total,
+            pending_answers_count=sum(1 for _, _, outcome in bucket if outcome.is_pending),
+        ))
+    return grades
+
+
+def grade_submission(
+    key: AnswerKey,
+    answers: Mapping[int, Dict[str, Any]],
+    invalid_as_incorrect: bool = False,
+) -> AttemptGrade:
+    return grade_submissions(key, [answers], invalid_as_incorrect)[0]
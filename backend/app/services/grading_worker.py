@@ -0,0 +1,284 @@
+"""Background grading workers draining the ``queued_submissions`` outbox.
+
+Each API process runs a small pool of asyncio workers (``GRADING_WORKERS``).
+Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so several processes can
+drain the same table. Every claim takes a fresh ``lease_token``; rows stuck
+in ``processing`` longer than ``GRADING_STALE_AFTER_SECONDS`` (crashed or
+slow worker) are requeued periodically and can be claimed again. Outcomes
+are recorded only while the claim's lease still holds: the result is stored
+in the transaction that moves the row from ``processing`` to ``completed``
+with the worker's lease, so a slow worker whose row was reclaimed rolls its
+result back instead of grading the submission twice.
+
+Rejected submissions fail with the rejection's status code; unexpected
+errors put the row back in the queue with exponential backoff
+(``retry_at``) until ``GRADING_MAX_ATTEMPTS`` claims were used, then fail it
+with code 500.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.attempt_session import AttemptSession
+from app.models.submission import QueuedSubmission
+from app.models.result import TestResult
+from app.models.test import Test, TestStatus
+from app.services.results_service import AttemptRejected, finalize_attempt, normalize_answers
+
+logger = logging.getLogger(__name__)
+
+GRADING_FAILED_DETAIL = "Grading failed, please contact your teacher"
+
+
+class LeaseLost(Exception):
+    """The submission was reclaimed by another worker while being graded."""
+
+
+def retry_delay(attempts: int, backoff: timedelta) -> timedelta:
+    """Wait before the next claim after ``attempts`` claims: backoff, 2x, 4x, ..."""
+    return backoff * (2 ** max(attempts - 1, 0))
+
+
+async def claim_next_submission(db: AsyncSession) -> Optional[QueuedSubmission]:
+    """Atomically move the oldest due queued submission to ``processing``."""
+    result = await db.execute(
+        select(QueuedSubmission)
+        .where(
+            QueuedSubmission.status == "queued",
+            or_(QueuedSubmission.retry_at.is_(None), QueuedSubmission.retry_at <= datetime.now(timezone.utc)),
+        )
+        .order_by(QueuedSubmission.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    submission = result.scalar_one_or_none()
+    if submission is None:
+        await db.rollback()
+        return None
+    submission.status = "processing"
+    submission.attempts = (submission.attempts or 0) + 1
+    submission.claimed_at = datetime.now(timezone.utc)
+    submission.lease_token = uuid.uuid4().hex
+    await db.commit()
+    return submission
+
+
+async def process_submission(
+    db: AsyncSession,
+    submission: QueuedSubmission,
+    max_attempts: int,
+    retry_backoff: timedelta,
+) -> QueuedSubmission:
+    """Grade one claimed submission and record the outcome on the outbox row.
+
+    Nothing is recorded once the claim's lease was lost to another worker.
+    """
+    submission_id, lease = submission.id, submission.lease_token
+
+    async def record_completion(result: TestResult) -> None:
+        completed = await db.execute(
+            update(QueuedSubmission)
+            .where(
+                QueuedSubmission.id == submission_id,
+                QueuedSubmission.status == "processing",
+                QueuedSubmission.lease_token == lease,
+            )
+            .values(
+                status="completed", result_id=result.id, error=None, error_code=None, retry_at=None,
+                processed_at=datetime.now(timezone.utc),
+            )
+        )
+        if completed.rowcount != 1:
+            raise LeaseLost(submission_id)
+        if submission.attempt_session_id is not None:
+            await db.execute(
+                update(AttemptSession)
+                .where(AttemptSession.id == submission.attempt_session_id)
+                .values(result_id=result.id)
+            )
+
+    try:
+        test_result = await db.execute(select(Test).where(Test.id == submission.test_id))
+        test = test_result.scalar_one_or_none()
+        if test is None:
+            raise AttemptRejected(404, "Test not found")
+        if test.status != TestStatus.PUBLISHED:
+            raise AttemptRejected(403, "Test is not published")
+        await finalize_attempt(
+            db,
+            test=test,
+            student_id=submission.student_id,
+            answers=normalize_answers(submission.payload),
+            started_at=submission.started_at,
+            completed_at=submission.submitted_at,
+            on_recorded=record_completion,
+        )
+        return submission
+    except LeaseLost:
+        await db.rollback()
+        logger.warning("Submission %s was reclaimed while being graded; discarding this result", submission_id)
+        return submission
+    except AttemptRejected as exc:
+        if not await _still_leased(db, submission, lease):
+            return submission
+        submission.status = "failed"
+        submission.error = exc.detail
+        submission.error_code = exc.status_code
+        submission.processed_at = datetime.now(timezone.utc)
+    except Exception:
+        logger.exception("Grading submission %s failed", submission_id)
+        if not await _still_leased(db, submission, lease):
+            return submission  # failed after the result was committed, or reclaimed
+        if submission.attempts < max_attempts:
+            submission.status = "queued"
+            submission.retry_at = datetime.now(timezone.utc) + retry_delay(submission.attempts, retry_backoff)
+        else:
+            submission.status = "failed"
+            submission.error = GRADING_FAILED_DETAIL
+            submission.error_code = 500
+            submission.processed_at = datetime.now(timezone.utc)
+    await db.commit()
+    return submission
+
+
+async def _still_leased(db: AsyncSession, submission: QueuedSubmission, lease: Optional[str]) -> bool:
+    """Roll back, then lock the row if this worker's claim still holds."""
+    await db.rollback()
+    await db.refresh(submission, with_for_update=True)
+    if submission.status == "processing" and submission.lease_token == lease:
+        return True
+    await db.rollback()
+    return False
+
+
+async def requeue_stale_submissions(db: AsyncSession, older_than: timedelta, max_attempts: int) -> int:
+    """Return rows stuck in ``processing`` (e.g. worker crash) to the queue.
+
+    Rows that already used ``max_attempts`` claims are failed instead.
+    """
+    now = datetime.now(timezone.utc)
+    stale = (QueuedSubmission.status == "processing", QueuedSubmission.claimed_at < now - older_than)
+    failed = await db.execute(
+        update(QueuedSubmission)
+        .where(*stale, QueuedSubmission.attempts >= max_attempts)
+        .values(status="failed", error=GRADING_FAILED_DETAIL, error_code=500, processed_at=now)
+    )
+    requeued = await db.execute(
+        update(QueuedSubmission)
+        .where(*stale)
+        .values(status="queued", retry_at=None, lease_token=None)
+    )
+    await db.commit()
+    if failed.rowcount:
+        logger.error("Failed %s submissions stuck in processing after %s claims", failed.rowcount, max_attempts)
+    return requeued.rowcount or 0
+
+
+class GradingWorkerPool:
+    """A fixed-size pool of asyncio tasks polling the submission outbox."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        concurrency: int,
+        poll_interval: float,
+        stale_after: timedelta,
+        max_attempts: int,
+        retry_backoff: timedelta,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def notify(self) -> None:
+        """Wake idle workers after a new submission has been queued."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks or self.concurrency <= 0:
+            return
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"grading-worker-{n}")
+            for n in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._requeue_stale(), name="grading-requeue"))
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain_once(self) -> bool:
+        """Claim and process a single submission. Returns False if the queue was empty."""
+        async with self.session_factory() as db:
+            submission = await claim_next_submission(db)
+            if submission is None:
+                return False
+            await process_submission(db, submission, self.max_attempts, self.retry_backoff)
+            return True
+
+    async def requeue_stale_once(self) -> int:
+        async with self.session_factory() as db:
+            requeued = await requeue_stale_submissions(db, self.stale_after, self.max_attempts)
+        if requeued:
+            logger.warning("Requeued %s stale submissions", requeued)
+            self.notify()
+        return requeued
+
+    async def _requeue_stale(self) -> None:
+        # Checked twice per stale_after, so a row waits at most 1.5x stale_after
+        while not self._stopping:
+            try:
+                await self.requeue_stale_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Requeueing stale submissions failed")
+            await asyncio.sleep(self.stale_after.total_seconds() / 2)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                if await self.drain_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Grading worker failed to process a submission")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+grading_workers = GradingWorkerPool(
+    session_factory=AsyncSessionLocal,
+    concurrency=settings.GRADING_WORKERS,
+    poll_interval=settings.GRADING_POLL_INTERVAL_SECONDS,
+    stale_after=timedelta(seconds=settings.GRADING_STALE_AFTER_SECONDS),
+    max_attempts=settings.GRADING_MAX_ATTEMPTS,
+    retry_backoff=timedelta(seconds=settings.GRADING_RETRY_BACKOFF_SECONDS),
+)
@@ -0,0 +1,160 @@
+"""Group performance analytics computed in the database.
+
+Count, average, pass rate, percentiles and a score histogram come from a
+single aggregate statement over the group's results, so a dashboard refresh
+never hydrates ``TestResult`` rows. Responses are cached in Redis per
+``(group, test)`` and dropped whenever a member's result is submitted or
+graded, or the group's membership changes.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.group import GroupMembership
+from app.models.result import TestResult
+from app.models.test import Test
+
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+HISTOGRAM_BUCKET_WIDTH = 10  # score points per bucket, 0-100 scale
+ALL_TESTS_FIELD = "all"
+
+
+def _percentile_key(fraction: float) -> str:
+    return f"p{round(fraction * 100)}"
+
+
+def percentile_cont(sorted_values: Sequence[float], fraction: float) -> Optional[float]:
+    """Linear interpolation between closest ranks, as PostgreSQL's ``percentile_cont``."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _histogram_bounds() -> List[tuple]:
+    starts = range(0, 100, HISTOGRAM_BUCKET_WIDTH)
+    return [(start, start + HISTOGRAM_BUCKET_WIDTH) for start in starts]
+
+
+def _group_results_filter(group_id: int, test_id: Optional[int]):
+    members = select(GroupMembership.student_id).where(GroupMembership.group_id == group_id)
+    conditions = [TestResult.student_id.in_(members), TestResult.status != "pending_manual"]
+    if test_id is not None:
+        conditions.append(TestResult.test_id == test_id)
+    return and_(*conditions)
+
+
+async def compute_group_analytics(db: AsyncSession, group_id: int, test_id: Optional[int]) -> Dict[str, Any]:
+    """Aggregate graded results of the group's members, optionally for one test."""
+    score = TestResult.score
+    bounds = _histogram_bounds()
+    bucket_columns = []
+    for index, (start, end) in enumerate(bounds):
+        in_bucket = score >= start if index == len(bounds) - 1 else and_(score >= start, score < end)
+        bucket_columns.append(func.count().filter(in_bucket).label(f"bucket_{index}"))
+
+    on_postgres = db.get_bind().dialect.name == "postgresql"
+    percentile_columns = []
+    if on_postgres:
+        percentile_columns = [
+            func.percentile_cont(fraction).within_group(score).label(_percentile_key(fraction))
+            for fraction in PERCENTILES
+        ]
+
+    columns = [
+        func.count().label("count"),
+        func.avg(score).label("avg_score"),
+        func.count().filter(TestResult.is_passed.is_(True)).label("passed"),
+        *percentile_columns,
+        *bucket_columns,
+    ]
+    if test_id is not None:
+        columns.append(select(Test.title).where(Test.id == test_id).scalar_subquery().label("test_title"))
+
+    row = (await db.execute(select(*columns).where(_group_results_filter(group_id, test_id)))).one()._mapping
+    count = row["count"]
+
+    if on_postgres:
+        percentiles = {_percentile_key(f): row[_percentile_key(f)] for f in PERCENTILES}
+    else:
+        # No ordered-set aggregates (SQLite in development): sort one column only
+        scores = (await db.execute(
+            select(score).where(_group_results_filter(group_id, test_id)).order_by(score)
+        )).scalars().all()
+        percentiles = {_percentile_key(f): percentile_cont(scores, f) for f in PERCENTILES}
+
+    return {
+        "count": count,
+        "avg_score": float(row["avg_score"] or 0.0),
+        "pass_rate": row["passed"] / count * 100 if count else 0.0,
+        "median_score": percentiles[_percentile_key(0.5)],
+        "percentiles": percentiles,
+        "histogram": [
+            {"from": start, "to": end, "count": row[f"bucket_{index}"]}
+            for index, (start, end) in enumerate(bounds)
+        ],
+        "test_title": row["test_title"] if test_id is not None else None,
+    }
+
+
+def _redis_key(group_id: int) -> str:
+    return f"group_analytics:{group_id}"
+
+
+def _field(test_id: Optional[int]) -> str:
+    return ALL_TESTS_FIELD if test_id is None else str(test_id)
+
+
+async def get_group_analytics(db: AsyncSession, group_id: int, test_id: Optional[int]) -> Dict[str, Any]:
+    """Cached :func:`compute_group_analytics`; computed directly when Redis is down."""
+    try:
+        async with redis_manager.guard() as r:
+            cached = await r.hget(_redis_key(group_id), _field(test_id))
+        if cached:
+            return json.loads(cached)
+    except RedisUnavailable:
+        pass
+
+    analytics = await compute_group_analytics(db, group_id, test_id)
+    try:
+        async with redis_manager.guard() as r:
+            key = _redis_key(group_id)
+            await r.hset(key, _field(test_id), json.dumps(analytics))
+            await r.expire(key, settings.GROUP_ANALYTICS_REDIS_TTL_SECONDS)
+    except RedisUnavailable:
+        pass
+    return analytics
+
+
+async def invalidate_group_analytics(group_ids: Iterable[int], test_id: Optional[int] = None) -> None:
+    """Drop cached analytics of the groups; only ``test_id`` and the overall view if given."""
+    group_ids = list(group_ids)
+    if not group_ids:
+        return
+    try:
+        async with redis_manager.guard() as r:
+            async with r.pipeline(transaction=False) as pipe:
+                for group_id in group_ids:
+                    if test_id is None:
+                        pipe.delete(_redis_key(group_id))
+                    else:
+                        pipe.hdel(_redis_key(group_id), _field(test_id), ALL_TESTS_FIELD)
+                await pipe.execute()
+    except RedisUnavailable:
+        # Entries expire after GROUP_ANALYTICS_REDIS_TTL_SECONDS
+        pass
+
+
+async def invalidate_student_group_analytics(db: AsyncSession, student_id: int, test_id: int) -> None:
+    """Invalidate analytics of every group the student belongs to after a result changed."""
+    group_ids = (await db.execute(
+        select(GroupMembership.group_id).where(GroupMembership.student_id == student_id)
+    )).scalars().all()
+    await invalidate_group_analytics(group_ids, test_id)
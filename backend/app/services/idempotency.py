@@ -0,0 +1,117 @@
+"""Idempotency keys for retried attempt requests.
+
+Clients on flaky networks resend ``POST /results/start`` and ``/submit``. A
+request carrying an ``Idempotency-Key`` header claims
+``idempotency:{user_id}:{scope}:{key}`` in Redis with ``SET NX`` and, once it
+succeeds, stores its response there for ``IDEMPOTENCY_TTL_SECONDS``; a retry
+with the same key and body gets that response replayed from a single GET
+instead of being graded again. A retry arriving while the first request is
+still running is answered 409 with ``Retry-After``, and reusing a key for a
+different body 422. Failed requests release their claim, so the client can
+retry them; a claim released between a retry's ``SET NX`` and ``GET`` is
+claimed once more instead of answering 409.
+
+While Redis is unavailable requests simply run: attempt sessions let one
+submission close an attempt and the unique ``(test_id, student_id,
+attempt_number)`` index keeps duplicate results out of ``test_results``.
+"""
+
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.redis_client import RedisUnavailable, redis_manager
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyRejected(Exception):
+    """A keyed request that must not run; carries an HTTP-style status."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def idempotency_key(user_id: int, scope: str, key: str) -> str:
+    return f"idempotency:{user_id}:{scope}:{key}"
+
+
+def request_fingerprint(body: Any) -> str:
+    raw = json.dumps(jsonable_encoder(body), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(record: Dict[str, Any], fingerprint: str) -> JSONResponse:
+    if record.get("fingerprint") != fingerprint:
+        raise IdempotencyRejected(422, f"{IDEMPOTENCY_KEY_HEADER} was already used for a different request")
+    if "status_code" not in record:
+        raise IdempotencyRejected(409, f"A request with this {IDEMPOTENCY_KEY_HEADER} is still in progress", retry_after=1)
+    return JSONResponse(record["body"], status_code=record["status_code"], headers={REPLAYED_HEADER: "true"})
+
+
+async def _release(redis_key: str) -> None:
+    try:
+        async with redis_manager.guard() as r:
+            await r.delete(redis_key)
+    except RedisUnavailable:
+        pass  # the claim expires after IDEMPOTENCY_LOCK_SECONDS
+
+
+async def run_idempotent(
+    scope: str,
+    user_id: int,
+    key: Optional[str],
+    body: Any,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = 200,
+) -> Any:
+    """Run ``handler`` once per ``key``; repeated requests replay its response.
+
+    Returns the handler's result, or a ``JSONResponse`` replaying the stored
+    one. Raises :class:`IdempotencyRejected` for an in-flight or mismatched
+    duplicate. Without a key, or while Redis is unavailable, ``handler`` just runs.
+    """
+    if key is None:
+        return await handler()
+    redis_key = idempotency_key(user_id, scope, key)
+    fingerprint = request_fingerprint(body)
+    try:
+        async with redis_manager.guard() as r:
+            for _ in range(2):
+                claimed = await r.set(
+                    redis_key, json.dumps({"fingerprint": fingerprint}), nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS
+                )
+                stored = None if claimed else await r.get(redis_key)
+                # Released (failed request) or expired between SET NX and GET: claim once more
+                if claimed or stored is not None:
+                    break
+    except RedisUnavailable:
+        return await handler()
+
+    if not claimed:
+        try:
+            record = json.loads(stored) if stored else {"fingerprint": fingerprint}  # freed and reclaimed twice
+        except ValueError:
+            record = {}
+        return _replay(record, fingerprint)
+
+    try:
+        response = await handler()
+    except BaseException:
+        await _release(redis_key)
+        raise
+    record = {"fingerprint": fingerprint, "status_code": status_code, "body": jsonable_encoder(response)}
+    try:
+        async with redis_manager.guard() as r:
+            await r.set(redis_key, json.dumps(record, separators=(",", ":")), ex=settings.IDEMPOTENCY_TTL_SECONDS)
+    except RedisUnavailable:
+        pass
+    return response
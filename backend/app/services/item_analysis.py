@@ -0,0 +1,234 @@
+"""Classical item analysis of a test: difficulty, discrimination, distractors.
+
+A test's graded attempts are loaded into NumPy arrays — an attempts x
+questions matrix of normalized item scores and an attempts x options choice
+matrix for choice questions — and every statistic is computed column-wise:
+
+* difficulty: mean normalized item score (the item p-value);
+* discrimination: point-biserial correlation between the item score and the
+  rest of the test (total minus the item itself);
+* distractors: share of attempts selecting each option and the mean total
+  score of those attempts.
+
+Reports are cached in Redis under a version derived from the test's latest
+result timestamp and its statistics row (including its regrade counter), so
+any submission or regrade produces a new key and no explicit invalidation is
+needed.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.result import Answer, TestResult
+from app.models.test import Question, QuestionOption, QuestionType, Test
+from app.models.test_stats import TestStats
+from app.services.answer_key import version_stamp
+
+CHOICE_TYPES = (QuestionType.SINGLE_CHOICE, QuestionType.MULTIPLE_CHOICE)
+
+
+def _selected_option_ids(question_type: QuestionType, answer_data: Any) -> List[int]:
+    if not isinstance(answer_data, dict):
+        return []
+    if question_type == QuestionType.SINGLE_CHOICE:
+        raw = [answer_data.get("selected_option_id")]
+    else:
+        raw = answer_data.get("selected_option_ids") or []
+        if not isinstance(raw, (list, tuple)):
+            return []
+    selected = []
+    for value in raw:
+        try:
+            selected.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return selected
+
+
+def _nan_to_none(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def point_biserial(item_scores: np.ndarray) -> np.ndarray:
+    """Corrected item-total correlation of every column; NaN where a column is constant."""
+    rest = item_scores.sum(axis=1, keepdims=True) - item_scores
+    item_centered = item_scores - item_scores.mean(axis=0)
+    rest_centered = rest - rest.mean(axis=0)
+    covariance = (item_centered * rest_centered).sum(axis=0)
+    spread = np.sqrt((item_centered ** 2).sum(axis=0) * (rest_centered ** 2).sum(axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(spread > 0, covariance / np.where(spread > 0, spread, 1), np.nan)
+
+
+def analyze_items(
+    questions: Sequence[Tuple[int, QuestionType, float]],
+    options: Sequence[Tuple[int, int, bool]],
+    result_ids: Sequence[int],
+    points: Iterable[Tuple[int, int, float]],
+    choices: Iterable[Tuple[int, int]],
+) -> Dict[str, Any]:
+    """Compute the report from flat rows.
+
+    ``questions``: ``(id, type, max points)`` in display order; ``options``:
+    ``(id, question id, is correct)``; ``points``: ``(result id, question id,
+    points earned)``; ``choices``: ``(result id, option id)``. Unanswered
+    questions score 0, as in grading.
+    """
+    max_points = np.array([q[2] for q in questions], dtype=np.float64)
+    result_index = {result_id: row for row, result_id in enumerate(result_ids)}
+    question_index = {question[0]: col for col, question in enumerate(questions)}
+    option_index = {option[0]: col for col, option in enumerate(options)}
+    attempts = len(result_ids)
+
+    scores = np.zeros((attempts, len(questions)), dtype=np.float64)
+    cells = [
+        (result_index[result_id], question_index[question_id], earned or 0.0)
+        for result_id, question_id, earned in points
+        if result_id in result_index and question_id in question_index
+    ]
+    if cells:
+        rows, cols, earned = (np.array(column) for column in zip(*cells))
+        scores[rows.astype(np.int64), cols.astype(np.int64)] = earned
+
+    chosen = np.zeros((attempts, len(options)), dtype=bool)
+    picks = [
+        (result_index[result_id], option_index[option_id])
+        for result_id, option_id in choices
+        if result_id in result_index and option_id in option_index
+    ]
+    if picks:
+        rows, cols = (np.array(column, dtype=np.int64) for column in zip(*picks))
+        chosen[rows, cols] = True
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normalized = np.where(max_points > 0, scores / np.where(max_points > 0, max_points, 1), 0.0)
+    totals = scores.sum(axis=1)
+
+    if attempts:
+        difficulty = normalized.mean(axis=0)
+        discrimination = point_biserial(normalized)
+        selection_counts = chosen.sum(axis=0)
+        selection_rate = selection_counts / attempts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            chooser_mean_total = (chosen.T.astype(np.float64) @ totals) / selection_counts
+    else:
+        difficulty = discrimination = np.full(len(questions), np.nan)
+        selection_rate = chooser_mean_total = np.full(len(options), np.nan)
+
+    difficulty, discrimination = _nan_to_none(difficulty), _nan_to_none(discrimination)
+    selection_rate, chooser_mean_total = _nan_to_none(selection_rate), _nan_to_none(chooser_mean_total)
+
+    options_by_question: Dict[int, List[Dict[str, Any]]] = {}
+    for col, (option_id, question_id, is_correct) in enumerate(options):
+        options_by_question.setdefault(question_id, []).append({
+            "option_id": option_id,
+            "is_correct": bool(is_correct),
+            "selection_rate": selection_rate[col],
+            "mean_total_score": chooser_mean_total[col],
+        })
+
+    return {
+        "attempts": attempts,
+        "mean_total_score": float(totals.mean()) if attempts else None,
+        "questions": [
+            {
+                "question_id": question_id,
+                "question_type": question_type,
+                "max_points": float(points_max),
+                "difficulty": difficulty[col],
+                "discrimination": discrimination[col],
+                "options": options_by_question.get(question_id, []),
+            }
+            for col, (question_id, question_type, points_max) in enumerate(questions)
+        ],
+    }
+
+
+async def compute_item_analysis(db: AsyncSession, test_id: int) -> Dict[str, Any]:
+    """Load the test's graded attempts as flat rows and analyze them."""
+    questions = (await db.execute(
+        select(Question.id, Question.question_type, Question.points)
+        .where(Question.test_id == test_id)
+        .order_by(Question.order, Question.id)
+    )).all()
+    choice_types = {question_id: qtype for question_id, qtype, _ in questions if qtype in CHOICE_TYPES}
+    options = []
+    if choice_types:
+        options = (await db.execute(
+            select(QuestionOption.id, QuestionOption.question_id, QuestionOption.is_correct)
+            .where(QuestionOption.question_id.in_(list(choice_types)))
+            .order_by(QuestionOption.question_id, QuestionOption.order, QuestionOption.id)
+        )).all()
+
+    graded = (TestResult.test_id == test_id) & (TestResult.status != "pending_manual")
+    result_ids = (await db.execute(
+        select(TestResult.id).where(graded).order_by(TestResult.id)
+    )).scalars().all()
+    points = (await db.execute(
+        select(Answer.test_result_id, Answer.question_id, Answer.points_earned)
+        .join(TestResult, TestResult.id == Answer.test_result_id)
+        .where(graded)
+    )).all()
+
+    choices: List[Tuple[int, int]] = []
+    if choice_types:
+        # answer_data is only needed (and only loaded) for choice questions
+        choice_rows = await db.execute(
+            select(Answer.test_result_id, Answer.question_id, Answer.answer_data)
+            .join(TestResult, TestResult.id == Answer.test_result_id)
+            .where(graded, Answer.question_id.in_(list(choice_types)))
+        )
+        for result_id, question_id, answer_data in choice_rows:
+            choices.extend(
+                (result_id, option_id)
+                for option_id in _selected_option_ids(choice_types[question_id], answer_data)
+            )
+
+    report = analyze_items(questions, options, result_ids, points, choices)
+    report["test_id"] = test_id
+    return report
+
+
+async def analysis_version(db: AsyncSession, test: Test) -> str:
+    """Changes whenever a result is added or regraded, or the test is edited."""
+    completed_at, stats_updated_at, regrades = (await db.execute(
+        select(
+            select(func.max(TestResult.completed_at)).where(TestResult.test_id == test.id).scalar_subquery(),
+            select(TestStats.updated_at).where(TestStats.test_id == test.id).scalar_subquery(),
+            select(TestStats.regrade_count).where(TestStats.test_id == test.id).scalar_subquery(),
+        )
+    )).one()
+    stamps = [value.isoformat() if value is not None else "-" for value in (completed_at, stats_updated_at)]
+    return "|".join([*stamps, str(regrades or 0), version_stamp(test)])
+
+
+def _redis_key(test_id: int) -> str:
+    return f"item_analysis:{test_id}"
+
+
+async def get_item_analysis(db: AsyncSession, test: Test) -> Dict[str, Any]:
+    """Cached :func:`compute_item_analysis` for the current :func:`analysis_version`."""
+    version = await analysis_version(db, test)
+    try:
+        async with redis_manager.guard() as r:
+            stored = await r.hgetall(_redis_key(test.id))
+        if stored and stored.get("version") == version and stored.get("body"):
+            return json.loads(stored["body"])
+    except RedisUnavailable:
+        pass
+
+    report = await compute_item_analysis(db, test.id)
+    try:
+        async with redis_manager.guard() as r:
+            key = _redis_key(test.id)
+            await r.hset(key, mapping={"version": version, "body": json.dumps(report, default=str)})
+            await r.expire(key, settings.ITEM_ANALYSIS_REDIS_TTL_SECONDS)
+    except RedisUnavailable:
+        pass
+    return report
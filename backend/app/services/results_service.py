@@ -0,0 +1,366 @@
+from datetime import datetime, timezone
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Mapping, NamedTuple, Optional
+
+from sqlalchemy import select, func, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.blob_store import blob_store
+from app.core.database import json_without_keys
+from app.core.security import decode_file_token
+from app.models.test import Test, TestAssignment, QuestionType
+from app.models.result import TestResult, Answer
+from app.services.answer_key import get_answer_key
+from app.services.attempt_sessions import AttemptSessionInfo, close_attempt_session, forget_attempt_session
+from app.services.graders import AttemptGrade, InvalidAnswerError, grade_submission
+from app.services.group_analytics import invalidate_student_group_analytics
+from app.services.test_stats import apply_stats_delta, contribution_delta, record_result_created, result_contribution
+
+
+# Inline answer members never returned by result views (legacy base64 file uploads)
+LARGE_ANSWER_FIELDS = ("file_content",)
+
+# Inserts of a result racing others for its attempt_number (unique per test and student)
+ATTEMPT_NUMBER_RETRIES = 3
+
+
+class AttemptRejected(Exception):
+    """A submission that must not be recorded; carries an HTTP-style status."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def answer_view_columns():
+    """Answer columns for responses, with large payload members stripped by the database."""
+    return (
+        Answer.id,
+        Answer.test_result_id,
+        Answer.question_id,
+        json_without_keys(Answer.answer_data, *LARGE_ANSWER_FIELDS).label("answer_data"),
+        Answer.is_correct,
+        Answer.points_earned,
+        Answer.teacher_comment,
+        Answer.created_at,
+    )
+
+
+async def load_answer_views(db: AsyncSession, *criteria) -> List[Mapping[str, Any]]:
+    rows = await db.execute(select(*answer_view_columns()).where(*criteria).order_by(Answer.id))
+    return rows.mappings().all()
+
+
+class AttemptCounts(NamedTuple):
+    used: int  # results recorded for (test, student)
+    last_number: int  # highest attempt_number so far, 0 before the first attempt
+
+
+@dataclass(frozen=True)
+class AttemptContext:
+    """Everything start/submit need to admit an attempt, loaded in one query."""
+    test: Test
+    assigned: bool
+    attempts: AttemptCounts
+
+
+def _attempt_counts_cte(test_id: int, student_id: int):
+    return (
+        select(
+            func.count().label("used"),
+            func.coalesce(func.max(TestResult.attempt_number), 0).label("last_number"),
+        )
+        .where(TestResult.test_id == test_id, TestResult.student_id == student_id)
+        .cte("attempt_counts")
+    )
+
+
+async def load_attempt_counts(db: AsyncSession, test_id: int, student_id: int) -> AttemptCounts:
+    counts = _attempt_counts_cte(test_id, student_id)
+    row = (await db.execute(select(counts.c.used, counts.c.last_number))).one()
+    return AttemptCounts(row.used, row.last_number)
+
+
+async def load_attempt_context(db: AsyncSession, test_id: int, student_id: int) -> Optional[AttemptContext]:
+    """Test row, assignment existence and attempt counts in a single round trip.
+
+    The aggregate CTE always yields one row, so it is cross-joined to the
+    test; the assignment check is an EXISTS on the (student_id, test_id)
+    index. Returns ``None`` when the test does not exist.
+    """
+    counts = _attempt_counts_cte(test_id, student_id)
+    assigned = (
+        select(TestAssignment.id)
+        .where(TestAssignment.test_id == Test.id, TestAssignment.student_id == student_id)
+        .exists()
+    )
+    row = (await db.execute(
+        select(Test, assigned.label("assigned"), counts.c.used, counts.c.last_number)
+        .join(counts, true())
+        .where(Test.id == test_id)
+    )).one_or_none()
+    if row is None:
+        return None
+    return AttemptContext(test=row[0], assigned=bool(row.assigned), attempts=AttemptCounts(row.used, row.last_number))
+
+
+def normalize_answers(answers: Any) -> Dict[int, Dict[str, Any]]:
+    """Build a ``question_id -> payload`` mapping from submitted answers.
+
+    Accepts either ``AnswerCreate``-like objects or plain dicts (as stored in
+    the submission queue).
+    """
+    normalized: Dict[int, Dict[str, Any]] = {}
+    for answer in answers or []:
+        if isinstance(answer, Mapping):
+            question_id = answer.get("question_id")
+            payload = answer.get("answer_data")
+        else:
+            question_id = answer.question_id
+            payload = answer.answer_data
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            continue
+        normalized[question_id] = payload if isinstance(payload, dict) else {}
+    return normalized
+
+
+def resolve_file_answer(payload: Dict[str, Any], student_id: int) -> Dict[str, Any]:
+    """Turn a ``file_token`` from ``POST /results/uploads`` into a stored reference.
+
+    Client-supplied ``file_sha256`` values are never trusted: a blob can only
+    be referenced through a token issued to the same student.
+    """
+    payload = {k: v for k, v in payload.items() if k != "file_sha256"}
+    token = payload.pop("file_token", None)
+    if token is None:
+        return payload
+    claims = decode_file_token(token) if isinstance(token, str) else None
+    if not claims or claims.get("uid") != student_id:
+        raise AttemptRejected(400, "Invalid file token")
+    digest = claims.get("sha256")
+    if not blob_store.exists(digest):
+        raise AttemptRejected(400, "Uploaded file not found")
+    payload.pop("file_content", None)
+    payload.update(
+        file_name=claims.get("name"),
+        file_type=claims.get("mime"),
+        file_size=claims.get("size"),
+        file_sha256=digest,
+    )
+    return payload
+
+
+async def store_file_answer(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Move an uploaded file's base64 content into the blob store.
+
+    The stored answer keeps only a small reference (hash, size, mime, name).
+    """
+    raw_content = payload.get("file_content")
+    if not isinstance(raw_content, str):
+        return payload
+    try:
+        ref = await blob_store.put_base64_async(raw_content)
+    except ValueError:
+        raise AttemptRejected(400, "Invalid file content")
+    stored = {k: v for k, v in payload.items() if k != "file_content"}
+    stored["file_sha256"] = ref.sha256
+    stored["file_size"] = ref.size
+    return stored
+
+
+async def grade_attempt_answers(
+    db: AsyncSession,
+    test: Test,
+    student_id: int,
+    answers: Mapping[int, Dict[str, Any]],
+    auto_submitted: bool = False,
+) -> AttemptGrade:
+    """Resolve file tokens and grade ``answers`` without storing anything.
+
+    Unacceptable answers raise ``AttemptRejected`` (400), unless the attempt
+    is ``auto_submitted``: then they score 0. Used by ``finalize_attempt``
+    and to validate submissions before they are queued.
+    """
+    answer_key = await get_answer_key(db, test)
+    answers = dict(answers)
+    for question in answer_key.questions:
+        if question.question_type == QuestionType.FILE_UPLOAD and question.id in answers:
+            try:
+                answers[question.id] = resolve_file_answer(answers[question.id], student_id)
+            except AttemptRejected:
+                if not auto_submitted:
+                    raise
+                answers[question.id] = {}
+    try:
+        return grade_submission(answer_key, answers, invalid_as_incorrect=auto_submitted)
+    except InvalidAnswerError as exc:
+        raise AttemptRejected(400, str(exc))
+
+
+async def finalize_attempt(
+    db: AsyncSession,
+    *,
+    test: Test,
+    student_id: int,
+    answers: Mapping[int, Dict[str, Any]],
+    started_at: datetime,
+    completed_at: Optional[datetime] = None,
+    attempts: Optional[AttemptCounts] = None,
+    attempt_session: Optional[AttemptSessionInfo] = None,
+    auto_submitted: bool = False,
+    on_recorded: Optional[Callable[[TestResult], Awaitable[None]]] = None,
+) -> TestResult:
+    """Grade an attempt and persist ``TestResult`` + ``Answer`` rows.
+
+    Shared by the synchronous submit endpoint and the background grading
+    and deadline workers. ``attempts`` may come from an already loaded
+    :class:`AttemptContext`. An active ``attempt_session`` is closed in the
+    same transaction; if another submission closed it first nothing is
+    stored. A result losing the race for its ``attempt_number`` (unique per
+    test and student) takes the next one. ``auto_submitted`` attempts (timed
+    out, graded from their draft) score unacceptable answers as incorrect
+    instead of being rejected and close their session as ``expired``.
+    ``on_recorded`` is awaited with the new result just before the commit,
+    to record its outcome elsewhere in the same transaction.
+    Commits the transaction and returns the stored result.
+    """
+    completed_at = completed_at or datetime.now(timezone.utc)
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    if completed_at.tzinfo is None:
+        completed_at = completed_at.replace(tzinfo=timezone.utc)
+
+    if attempts is None:
+        attempts = await load_attempt_counts(db, test.id, student_id)
+    if test.max_attempts and attempts.used >= test.max_attempts:
+        raise AttemptRejected(400, f"Maximum attempts ({test.max_attempts}) reached")
+
+    grade = await grade_attempt_answers(db, test, student_id, answers, auto_submitted)
+
+    stored_payloads = []
+    for question, payload, _ in grade.outcomes:
+        if question.question_type == QuestionType.FILE_UPLOAD:
+            try:
+                payload = await store_file_answer(payload)
+            except AttemptRejected:
+                if not auto_submitted:
+                    raise
+                payload = {k: v for k, v in payload.items() if k != "file_content"}
+        stored_payloads.append(payload)
+
+    pending_answers_count = grade.pending_answers_count
+    score = grade.score
+    status_value = "pending_manual" if pending_answers_count > 0 else "auto_completed"
+    is_passed = score >= test.passing_score if status_value != "pending_manual" else False
+
+    for _ in range(ATTEMPT_NUMBER_RETRIES):
+        result = TestResult(
+            test_id=test.id,
+            student_id=student_id,
+            score=score,
+            points_earned=grade.points_earned,
+            points_total=grade.points_total,
+            is_passed=is_passed,
+            status=status_value,
+            pending_answers_count=pending_answers_count,
+            started_at=started_at,
+            completed_at=completed_at,
+            time_spent_minutes=int((completed_at - started_at).total_seconds() / 60),
+            attempt_number=attempts.last_number + 1,
+        )
+        try:
+            async with db.begin_nested():
+                db.add(result)
+            break
+        except IntegrityError:
+            # A concurrent submission committed this attempt number first
+            attempts = await load_attempt_counts(db, test.id, student_id)
+            if test.max_attempts and attempts.used >= test.max_attempts:
+                await db.rollback()
+                raise AttemptRejected(400, f"Maximum attempts ({test.max_attempts}) reached")
+    else:
+        await db.rollback()
+        raise AttemptRejected(409, "Too many concurrent submissions, retry later")
+    if attempt_session is not None and not await close_attempt_session(
+        db, attempt_session.id, "expired" if auto_submitted else "submitted", result.id
+    ):
+        await db.rollback()
+        await forget_attempt_session(attempt_session)
+        raise AttemptRejected(409, "Attempt already submitted")
+    await record_result_created(db, result)
+
+    db.add_all([
+        Answer(
+            test_result_id=result.id,
+            question_id=question.id,
+            answer_data=payload,
+            is_correct=outcome.is_correct,
+            points_earned=outcome.points,
+        )
+        for (question, _, outcome), payload in zip(grade.outcomes, stored_payloads)
+    ])
+    if on_recorded is not None:
+        await on_recorded(result)
+    await db.commit()
+    if attempt_session is not None:
+        await forget_attempt_session(attempt_session)
+    await invalidate_student_group_analytics(db, student_id, test.id)
+    return result
+
+
+async def recompute_result_scores(db: AsyncSession, result_ids: Collection[int]) -> List[TestResult]:
+    """Re-derive score, status and pass flag of results after manual grading.
+
+    Points and pending counts come from one aggregate query over ``answers``
+    instead of loading every answer; ``test_stats`` receives one delta per
+    test, which also bumps its ``regrade_count``. Does not commit.
+    """
+    if not result_ids:
+        return []
+    totals = {
+        result_id: (earned, pending)
+        for result_id, earned, pending in await db.execute(
+            select(
+                Answer.test_result_id,
+                func.coalesce(func.sum(Answer.points_earned), 0.0),
+                func.count().filter(Answer.is_correct.is_(None)),
+            )
+            .where(Answer.test_result_id.in_(result_ids))
+            .group_by(Answer.test_result_id)
+        )
+    }
+    rows = (await db.execute(
+        select(TestResult, Test.passing_score)
+        .join(Test, Test.id == TestResult.test_id)
+        .where(TestResult.id.in_(result_ids))
+    )).all()
+
+    stats_deltas: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    results = []
+    for result, passing_score in rows:
+        before = result_contribution(result)
+        points_earned, pending_answers = totals.get(result.id, (0.0, 0))
+        result.points_earned = points_earned
+        result.score = (points_earned / result.points_total * 100) if result.points_total > 0 else 0
+        result.pending_answers_count = pending_answers
+        if pending_answers == 0:
+            if result.status == "pending_manual":
+                result.status = "completed"
+            result.is_passed = result.score >= passing_score
+        else:
+            result.status = "pending_manual"
+            result.is_passed = False
+        for column, value in contribution_delta(before, result_contribution(result)).items():
+            stats_deltas[result.test_id][column] += value
+        stats_deltas[result.test_id]["regrade_count"] = 1
+        results.append(result)
+
+    await db.flush()
+    for test_id, delta in stats_deltas.items():
+        await apply_stats_delta(db, test_id, delta)
+    return results
@@ -0,0 +1,177 @@
+"""Pre-serialized student view of a published test.
+
+Students must never see ``is_correct``/``correct_answer_text``, and every
+student assigned to a test sees exactly the same sanitized document. It is
+serialized once per test version to JSON bytes and kept in an in-process LRU
+plus Redis, so opening a test costs a cache lookup instead of loading and
+re-validating the question graph.
+"""
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.test import Test, Question
+from app.schemas.test import TestResponse
+from app.services.answer_key import version_stamp
+
+
+@dataclass(frozen=True)
+class StudentViewSnapshot:
+    test_id: int
+    version: str
+    body: bytes
+    etag: str
+
+
+def sanitize_test(test: Test) -> Dict[str, Any]:
+    """Build the student-facing test document without correct answers."""
+    sanitized_questions = []
+    for q in test.questions:
+        sanitized_options = [
+            {
+                "id": o.id,
+                "question_id": o.question_id,
+                "option_text": o.option_text,
+                "is_correct": False,  # never reveal
+                "order": o.order,
+                "matching_pair": o.matching_pair,
+                "created_at": o.created_at,
+            }
+            for o in q.options
+        ]
+
+        sanitized_questions.append(
+            {
+                "id": q.id,
+                "test_id": q.test_id,
+                "question_text": q.question_text,
+                "question_type": q.question_type,
+                "points": q.points,
+                "order": q.order,
+                "correct_answer_text": None,  # never reveal
+                "explanation": q.explanation,
+                "created_at": q.created_at,
+                "options": sanitized_options,
+            }
+        )
+
+    return {
+        "id": test.id,
+        "title": test.title,
+        "description": test.description,
+        "duration_minutes": test.duration_minutes,
+        "passing_score": test.passing_score,
+        "max_attempts": test.max_attempts,
+        "show_results": test.show_results,
+        "shuffle_questions": test.shuffle_questions,
+        "shuffle_options": test.shuffle_options,
+        "status": test.status,
+        "exam_opens_at": test.exam_opens_at,
+        "exam_closes_at": test.exam_closes_at,
+        "creator_id": test.creator_id,
+        "created_at": test.created_at,
+        "updated_at": test.updated_at,
+        "questions": sanitized_questions,
+    }
+
+
+def make_snapshot(test_id: int, version: str, body: bytes) -> StudentViewSnapshot:
+    etag = '"sv-' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return StudentViewSnapshot(test_id=test_id, version=version, body=body, etag=etag)
+
+
+def build_snapshot(test: Test) -> StudentViewSnapshot:
+    """Validate the sanitized document once and serialize it to bytes."""
+    body = TestResponse.model_validate(sanitize_test(test)).model_dump_json().encode()
+    return make_snapshot(test.id, version_stamp(test), body)
+
+
+class StudentViewCache:
+    """Small LRU keyed by ``(test_id, version)``; one live version per test."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, str], StudentViewSnapshot]" = OrderedDict()
+
+    def get(self, test_id: int, version: str) -> Optional[StudentViewSnapshot]:
+        key = (test_id, version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, snapshot: StudentViewSnapshot) -> None:
+        self.invalidate(snapshot.test_id)
+        self._entries[(snapshot.test_id, snapshot.version)] = snapshot
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, test_id: int) -> None:
+        for cached in [k for k in self._entries if k[0] == test_id]:
+            del self._entries[cached]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+student_view_cache = StudentViewCache(maxsize=settings.STUDENT_VIEW_CACHE_SIZE)
+
+
+def _redis_key(test_id: int) -> str:
+    return f"student_view:{test_id}"
+
+
+async def get_student_view(db: AsyncSession, test: Test) -> StudentViewSnapshot:
+    """Return the snapshot for ``test``; memory, then Redis, then the database."""
+    version = version_stamp(test)
+    snapshot = student_view_cache.get(test.id, version)
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        async with redis_manager.guard() as r:
+            stored = await r.hgetall(_redis_key(test.id))
+        if stored and stored.get("version") == version and stored.get("body"):
+            snapshot = make_snapshot(test.id, version, stored["body"].encode())
+    except RedisUnavailable:
+        snapshot = None
+
+    if snapshot is None:
+        result = await db.execute(
+            select(Test)
+            .options(selectinload(Test.questions).selectinload(Question.options))
+            .where(Test.id == test.id)
+        )
+        snapshot = build_snapshot(result.scalar_one())
+        try:
+            async with redis_manager.guard() as r:
+                key = _redis_key(test.id)
+                await r.hset(key, mapping={"version": snapshot.version, "body": snapshot.body.decode()})
+                await r.expire(key, settings.STUDENT_VIEW_REDIS_TTL_SECONDS)
+        except RedisUnavailable:
+            pass
+
+    student_view_cache.put(snapshot)
+    return snapshot
+
+
+async def invalidate_student_view(test_id: int) -> None:
+    """Drop the snapshot after the test or any of its questions changed."""
+    student_view_cache.invalidate(test_id)
+    try:
+        async with redis_manager.guard() as r:
+            await r.delete(_redis_key(test_id))
+    except RedisUnavailable:
+        # Stale entries are ignored anyway: their version no longer matches
+        pass
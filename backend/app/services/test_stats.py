@@ -0,0 +1,168 @@
+"""Incrementally maintained per-test statistics (``test_stats`` rollup).
+
+Every change to a ``TestResult`` applies the difference between the result's
+old and new contribution to its test's row with an atomic upsert
+(``col = col + delta``) inside the caller's transaction, so dashboards read a
+single row regardless of the number of attempts. Deletes carry no delta:
+whoever removes results (e.g. deleting a user cascades to theirs) calls
+``rebuild_test_stats`` for the affected tests in the same transaction, which
+also repairs any drift.
+"""
+
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from sqlalchemy import and_, delete, distinct, exists, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import upsert_insert
+from app.models.result import TestResult
+from app.models.test_stats import HISTOGRAM_BUCKETS, TestStats
+
+BUCKET_WIDTH = 100 // HISTOGRAM_BUCKETS
+BUCKET_COLUMNS = tuple(f"bucket_{index}" for index in range(HISTOGRAM_BUCKETS))
+
+
+def score_bucket(score: float) -> int:
+    """Histogram bucket of a 0-100 score; 100 falls into the last bucket."""
+    return min(max(int(score // BUCKET_WIDTH), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def result_contribution(result: TestResult) -> Dict[str, float]:
+    """Counters a single result adds to its test's row (attempt counters excluded)."""
+    if result.status == "pending_manual":
+        return {"pending_count": 1}
+    score = float(result.score)
+    return {
+        "graded_count": 1,
+        "passes": 1 if result.is_passed else 0,
+        "score_sum": score,
+        "score_sq_sum": score * score,
+        BUCKET_COLUMNS[score_bucket(score)]: 1,
+    }
+
+
+def contribution_delta(before: Mapping[str, float], after: Mapping[str, float]) -> Dict[str, float]:
+    keys = set(before) | set(after)
+    return {key: after.get(key, 0) - before.get(key, 0) for key in keys}
+
+
+async def apply_stats_delta(db: AsyncSession, test_id: int, delta: Mapping[str, float]) -> None:
+    """Add ``delta`` to the test's counters, creating the row on first use. Does not commit."""
+    delta = {column: value for column, value in delta.items() if value}
+    if not delta:
+        return
+    insert = upsert_insert(db)
+    stmt = insert(TestStats).values(test_id=test_id, **delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TestStats.test_id],
+        set_={
+            **{column: getattr(TestStats, column) + stmt.excluded[column] for column in delta},
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_result_created(db: AsyncSession, result: TestResult) -> None:
+    """Account for a newly inserted (already flushed) result in the same transaction."""
+    delta = result_contribution(result)
+    delta["attempts"] = 1
+    # attempt_number alone is no proof: earlier attempts may have been deleted
+    has_other_results = await db.scalar(select(exists().where(
+        TestResult.test_id == result.test_id,
+        TestResult.student_id == result.student_id,
+        TestResult.id != result.id,
+    )))
+    if not has_other_results:
+        delta["unique_students"] = 1
+    await apply_stats_delta(db, result.test_id, delta)
+
+
+async def student_result_test_ids(db: AsyncSession, student_id: int) -> List[int]:
+    """Tests holding results of ``student_id``: rebuild them after deleting those results."""
+    rows = await db.execute(select(distinct(TestResult.test_id)).where(TestResult.student_id == student_id))
+    return list(rows.scalars())
+
+
+def _bucket_condition(index: int):
+    score = TestResult.score
+    if index == 0:
+        return score < BUCKET_WIDTH
+    if index == HISTOGRAM_BUCKETS - 1:
+        return score >= index * BUCKET_WIDTH
+    return and_(score >= index * BUCKET_WIDTH, score < (index + 1) * BUCKET_WIDTH)
+
+
+async def rebuild_test_stats(db: AsyncSession, test_ids: Optional[Sequence[int]] = None) -> int:
+    """Recompute rows from ``test_results`` (all tests or ``test_ids``). Does not commit.
+
+    The table is locked against writers first — row locks would miss tests
+    that have no row yet — so submissions committing meanwhile wait and then
+    apply their delta on top of the rebuilt totals. (SQLite serializes
+    writers on its own.)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text(f"LOCK TABLE {TestStats.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+    graded = TestResult.status != "pending_manual"
+    score = TestResult.score
+    query = select(
+        TestResult.test_id,
+        func.count().label("attempts"),
+        func.count(distinct(TestResult.student_id)).label("unique_students"),
+        func.count().filter(TestResult.status == "pending_manual").label("pending_count"),
+        func.count().filter(graded).label("graded_count"),
+        func.count().filter(and_(graded, TestResult.is_passed.is_(True))).label("passes"),
+        func.coalesce(func.sum(score).filter(graded), 0.0).label("score_sum"),
+        func.coalesce(func.sum(score * score).filter(graded), 0.0).label("score_sq_sum"),
+        *[
+            func.count().filter(and_(graded, _bucket_condition(index))).label(column)
+            for index, column in enumerate(BUCKET_COLUMNS)
+        ],
+    ).group_by(TestResult.test_id)
+    if test_ids is not None:
+        query = query.where(TestResult.test_id.in_(test_ids))
+    rows = (await db.execute(query)).mappings().all()
+
+    purge = delete(TestStats)
+    if test_ids is not None:
+        purge = purge.where(TestStats.test_id.in_(test_ids))
+    await db.execute(purge)
+    db.add_all([TestStats(**row) for row in rows])
+    await db.flush()
+    return len(rows)
+
+
+def summarize_stats(test_id: int, stats: Optional[TestStats]) -> Dict[str, Any]:
+    """Derived figures for the stats endpoint; a missing row means no attempts yet."""
+    if stats is None:
+        stats = TestStats(
+            test_id=test_id, attempts=0, unique_students=0, pending_count=0, graded_count=0,
+            passes=0, score_sum=0.0, score_sq_sum=0.0, **{column: 0 for column in BUCKET_COLUMNS},
+        )
+    graded = stats.graded_count
+    average = stats.score_sum / graded if graded else None
+    stddev = None
+    if graded:
+        stddev = math.sqrt(max(stats.score_sq_sum / graded - average * average, 0.0))
+    return {
+        "test_id": test_id,
+        "attempts": stats.attempts,
+        "unique_students": stats.unique_students,
+        "graded_count": graded,
+        "pending_count": stats.pending_count,
+        "average_score": average,
+        "score_stddev": stddev,
+        "pass_rate": stats.passes / graded * 100 if graded else None,
+        "histogram": [
+            {"from": index * BUCKET_WIDTH, "to": (index + 1) * BUCKET_WIDTH, "count": getattr(stats, column)}
+            for index, column in enumerate(BUCKET_COLUMNS)
+        ],
+        "updated_at": stats.updated_at,
+    }
+
+
+async def get_test_stats(db: AsyncSession, test_id: int) -> Dict[str, Any]:
+    stats = await db.get(TestStats, test_id)
+    return summarize_stats(test_id, stats)
@@ -1,6 +1,14 @@
-from typing import List
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
 
-from app.models.test import QuestionType
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.test import QuestionType, TestAssignment
+
+
+# Rows per INSERT statement; keeps bind parameters well under driver limits
+ASSIGNMENT_INSERT_CHUNK_SIZE = 1000
 
 
 def normalize_question_options(question_type: QuestionType, options: List) -> List:
@@ -29,3 +37,47 @@ def normalize_question_options(question_type: QuestionType, options: List) -> Li
     return normalized
 
 
+
+
+async def bulk_assign_students(
+    db: AsyncSession,
+    test_id: int,
+    student_ids: Iterable[int],
+    assigned_by_id: Optional[int],
+    due_date: Optional[datetime] = None,
+) -> Tuple[List[TestAssignment], int]:
+    """Insert assignments set-based, skipping students that already have one.
+
+    Relies on the ``uix_test_assignments_test_student`` constraint via
+    ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` instead of checking each
+    student first. Does not commit, so the caller controls the transaction.
+    Returns the created rows and the number of skipped students.
+    """
+    ids = sorted(set(student_ids))
+    if not ids:
+        return [], 0
+
+    dialect = db.get_bind().dialect.name
+    created: List[TestAssignment] = []
+    for offset in range(0, len(ids), ASSIGNMENT_INSERT_CHUNK_SIZE):
+        rows = [
+            {
+                "test_id": test_id,
+                "student_id": sid,
+                "assigned_by_id": assigned_by_id,
+                "due_date": due_date,
+            }
+            for sid in ids[offset:offset + ASSIGNMENT_INSERT_CHUNK_SIZE]
+        ]
+        if dialect == "postgresql":
+            stmt = postgresql.insert(TestAssignment).values(rows).on_conflict_do_nothing(
+                constraint="uix_test_assignments_test_student"
+            )
+        else:
+            stmt = sqlite.insert(TestAssignment).values(rows).on_conflict_do_nothing(
+                index_elements=["test_id", "student_id"]
+            )
+        result = await db.scalars(stmt.returning(TestAssignment))
+        created.extend(result.all())
+
+    return created, len(ids) - len(created)
@@ -0,0 +1,178 @@
+"""Cached authentication principals for ``get_current_user``.
+
+Every authenticated request needs only the caller's id, role and status
+flags. Those are cached per process (short TTL) and in Redis (longer TTL) so
+the common path costs no database round trip. Mutations of a user must call
+``invalidate_user_principals``; other processes drop their local copy within
+``USER_PRINCIPAL_LOCAL_TTL_SECONDS``.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import RedisUnavailable, redis_manager
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated caller as seen by authorization checks."""
+    id: int
+    role: UserRole
+    is_active: bool
+    is_verified: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            role=UserRole(user.role),
+            is_active=bool(user.is_active),
+            is_verified=bool(user.is_verified),
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["role"] = self.role.value
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "UserPrincipal":
+        data = json.loads(raw)
+        return cls(
+            id=int(data["id"]),
+            role=UserRole(data["role"]),
+            is_active=bool(data["is_active"]),
+            is_verified=bool(data["is_verified"]),
+        )
+
+
+class PrincipalCache:
+    """Size-bounded in-process TTL cache keyed by user id."""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[int, Tuple[float, UserPrincipal]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[UserPrincipal]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= self._clock():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def put(self, principal: UserPrincipal) -> None:
+        self._entries[principal.id] = (self._clock() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.USER_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.USER_PRINCIPAL_LOCAL_TTL_SECONDS,
+)
+
+
+def _redis_key(user_id: int) -> str:
+    return f"user_principal:{user_id}"
+
+
+async def get_user_principal(db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+    """Resolve a principal from the local cache, then Redis, then the database."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    try:
+        async with redis_manager.guard() as r:
+            raw = await r.get(_redis_key(user_id))
+        if raw:
+            principal = UserPrincipal.from_json(raw)
+    except (RedisUnavailable, ValueError, KeyError):
+        principal = None
+
+    if principal is None:
+        result = await db.execute(
+            select(User.id, User.role, User.is_active, User.is_verified).where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        principal = UserPrincipal(
+            id=row.id,
+            role=UserRole(row.role),
+            is_active=bool(row.is_active),
+            is_verified=bool(row.is_verified),
+        )
+        try:
+            async with redis_manager.guard() as r:
+                await r.set(_redis_key(user_id), principal.to_json(), ex=settings.USER_PRINCIPAL_REDIS_TTL_SECONDS)
+        except RedisUnavailable:
+            pass
+
+    principal_cache.put(principal)
+    return principal
+
+
+async def prime_user_principals(db: AsyncSession, user_ids: Iterable[int]) -> int:
+    """Load many principals in one query into both caches, ahead of a burst of logins."""
+    ids = sorted(set(user_ids))
+    if not ids:
+        return 0
+    rows = await db.execute(
+        select(User.id, User.role, User.is_active, User.is_verified).where(User.id.in_(ids))
+    )
+    principals = [
+        UserPrincipal(id=row.id, role=UserRole(row.role), is_active=bool(row.is_active), is_verified=bool(row.is_verified))
+        for row in rows
+    ]
+    for principal in principals:
+        principal_cache.put(principal)
+    try:
+        async with redis_manager.guard() as r:
+            async with r.pipeline(transaction=False) as pipe:
+                for principal in principals:
+                    pipe.set(_redis_key(principal.id), principal.to_json(), ex=settings.USER_PRINCIPAL_REDIS_TTL_SECONDS)
+                await pipe.execute()
+    except RedisUnavailable:
+        pass
+    return len(principals)
+
+
+async def invalidate_user_principals(user_ids: Iterable[int]) -> None:
+    """Drop cached principals after a user's role or status changed."""
+    keys = []
+    for user_id in user_ids:
+        principal_cache.invalidate(user_id)
+        keys.append(_redis_key(user_id))
+    if not keys:
+        return
+    try:
+        async with redis_manager.guard() as r:
+            await r.delete(*keys)
+    except RedisUnavailable:
+        # Entries expire after USER_PRINCIPAL_REDIS_TTL_SECONDS anyway
+        pass
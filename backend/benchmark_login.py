@@ -0,0 +1,119 @@
+"""
+Бенчмарк пропускной способности входа и отзывчивости event loop.
+
+Запускает приложение в памяти (SQLite, httpx ASGI-клиент), выполняет
+параллельные запросы /auth/login и параллельно измеряет задержку event loop.
+Режим --inline выполняет bcrypt прямо в event loop (как было раньше) для
+сравнения.
+
+Требует зависимости из requirements-dev.txt.
+Пример использования:
+  python backend/benchmark_login.py --users 50 --concurrency 25
+  python backend/benchmark_login.py --users 50 --concurrency 25 --inline
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base, get_db
+from app.core.password_hasher import password_hasher
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.user import User, UserRole
+
+PASSWORD = "benchmark-password"
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01) -> None:
+    """Record how late a periodic timer fires; large values mean a blocked loop."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(loop.time() - expected, 0.0))
+
+
+async def run_benchmark(users: int, concurrency: int, inline: bool) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    hashed = get_password_hash(PASSWORD)
+    async with session_factory() as db:
+        db.add_all([
+            User(
+                email=f"bench{n}@example.com",
+                username=f"bench{n}",
+                full_name=f"Bench {n}",
+                hashed_password=hashed,
+                role=UserRole.STUDENT,
+                is_verified=True,
+            )
+            for n in range(users)
+        ])
+        await db.commit()
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    if inline:
+        async def run_inline(func, *args):
+            return func(*args)
+        password_hasher._run = run_inline
+
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = []
+    lag_samples: list = []
+    stop = asyncio.Event()
+
+    async with AsyncClient(app=app, base_url="http://benchmark") as client:
+        async def login(n: int) -> None:
+            async with semaphore:
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    data={"username": f"bench{n}", "password": PASSWORD},
+                )
+                statuses.append(response.status_code)
+
+        monitor = asyncio.create_task(measure_loop_lag(stop, lag_samples))
+        started = time.perf_counter()
+        await asyncio.gather(*(login(n) for n in range(users)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+
+    app.dependency_overrides.pop(get_db, None)
+    password_hasher.shutdown()
+    await engine.dispose()
+
+    lag_ms = sorted(sample * 1000 for sample in lag_samples) or [0.0]
+    p99 = lag_ms[min(len(lag_ms) - 1, int(len(lag_ms) * 0.99))]
+    print(f"Режим:               {'inline (блокирующий bcrypt)' if inline else 'пул потоков'}")
+    print(f"Входов:              {users} (успешных: {statuses.count(200)}, 503: {statuses.count(503)})")
+    print(f"Время:               {elapsed:.2f} с, {users / elapsed:.1f} входов/с")
+    print(f"Задержка loop, мс:   медиана {statistics.median(lag_ms):.1f}, p99 {p99:.1f}, макс {lag_ms[-1]:.1f}")
+    print(f"Метрики хешера:      {password_hasher.metrics()}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк входа и задержки event loop")
+    parser.add_argument("--users", type=int, default=40, help="Количество входов (по умолчанию: 40)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Параллельных запросов (по умолчанию: 20)")
+    parser.add_argument("--inline", action="store_true", help="Выполнять bcrypt в event loop для сравнения")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    asyncio.run(run_benchmark(options.users, options.concurrency, options.inline))
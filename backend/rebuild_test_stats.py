@@ -0,0 +1,35 @@
+"""
+Пересчёт сводной статистики тестов (таблица test_stats) по test_results.
+
+Таблица обновляется приложением при каждой сдаче и проверке; пересчёт нужен
+только если данные разошлись (ручные правки БД, восстановление из бэкапа).
+
+Пример использования:
+  python backend/rebuild_test_stats.py            # все тесты
+  python backend/rebuild_test_stats.py --test-id 7 --test-id 9
+"""
+
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal
+from app.services.test_stats import rebuild_test_stats
+
+
+async def rebuild(test_ids) -> None:
+    async with AsyncSessionLocal() as db:
+        rebuilt = await rebuild_test_stats(db, test_ids)
+        await db.commit()
+    scope = "всех тестов" if test_ids is None else f"тестов {', '.join(map(str, test_ids))}"
+    print(f"✅ Статистика {scope} пересчитана, строк: {rebuilt}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Пересчитать таблицу test_stats")
+    parser.add_argument("--test-id", dest="test_ids", type=int, action="append", help="ID теста (можно несколько раз)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    asyncio.run(rebuild(options.test_ids))
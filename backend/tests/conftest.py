@@ -1,7 +1,10 @@
 import asyncio
+import itertools
 import pytest
+import pytest_asyncio
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
@@ -9,6 +12,11 @@ from httpx import AsyncClient
 
 from app.main import app
 from app.core.database import Base, get_db
+from app.models.test import Test, TestStatus
+from app.models.user import User, UserRole
+from app.services.answer_key import answer_key_cache
+from app.services.student_view import student_view_cache
+from app.services.user_principal import principal_cache
 
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -21,9 +29,30 @@ def event_loop():
     loop.close()
 
 
-@pytest.fixture(scope="session")
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """Tests reuse ids (and second-resolution timestamps) across databases."""
+    answer_key_cache.clear()
+    student_view_cache.clear()
+    principal_cache.clear()
+    yield
+
+
+@pytest_asyncio.fixture
 async def engine():
+    """A fresh in-memory database with all tables for each test."""
     engine = create_async_engine(TEST_DATABASE_URL, future=True)
+
+    # pysqlite only opens a transaction at the first write, so a leading
+    # SAVEPOINT would commit on RELEASE; begin explicitly as PostgreSQL does
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_implicit_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin_explicitly(connection):
+        connection.exec_driver_sql("BEGIN")
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     try:
@@ -33,6 +62,11 @@ async def engine():
 
 
 @pytest.fixture()
+def session_factory(engine) -> async_sessionmaker:
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
 async def db_session(engine) -> AsyncGenerator[AsyncSession, None]:
     async_session = async_sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False, autoflush=False, autocommit=False
@@ -42,6 +76,53 @@ async def db_session(engine) -> AsyncGenerator[AsyncSession, None]:
 
 
 @pytest.fixture()
+def make_user(session_factory):
+    """Commit a user with unique email/username: ``await make_user(UserRole.STUDENT)``."""
+    numbers = itertools.count(1)
+
+    async def make(role: UserRole = UserRole.STUDENT, **fields) -> User:
+        n = next(numbers)
+        user = User(**{
+            "email": f"user{n}@example.com",
+            "username": f"user{n}",
+            "full_name": f"User {n}",
+            "hashed_password": "x",
+            "role": role,
+            **fields,
+        })
+        async with session_factory() as db:
+            db.add(user)
+            await db.commit()
+        return user
+
+    return make
+
+
+@pytest_asyncio.fixture
+async def teacher(make_user) -> User:
+    return await make_user(UserRole.TEACHER)
+
+
+@pytest_asyncio.fixture
+async def student(make_user) -> User:
+    return await make_user(UserRole.STUDENT)
+
+
+@pytest.fixture()
+def make_test(session_factory, teacher):
+    """Commit a published test created by ``teacher``: ``await make_test(max_attempts=1)``."""
+
+    async def make(**fields) -> Test:
+        test = Test(**{"title": "Test", "status": TestStatus.PUBLISHED, "creator_id": teacher.id, **fields})
+        async with session_factory() as db:
+            db.add(test)
+            await db.commit()
+        return test
+
+    return make
+
+
+@pytest_asyncio.fixture
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
         yield db_session
@@ -52,5 +133,3 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield c
 
     app.dependency_overrides.clear()
-
-
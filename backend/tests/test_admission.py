@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionGate, AdmissionRejected
+
+
+@pytest.mark.asyncio
+async def test_gate_admits_waiters_in_arrival_order():
+    gate = AdmissionGate(max_active=2, max_waiting=10, max_wait_seconds=5)
+    release = asyncio.Event()
+    order = []
+
+    async def request(n):
+        async with gate.admit():
+            order.append(n)
+            await release.wait()
+
+    tasks = [asyncio.create_task(request(n)) for n in range(6)]
+    await asyncio.sleep(0)
+    assert (gate.active, gate.waiting) == (2, 4) and order == [0, 1]
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == list(range(6))
+    assert (gate.active, gate.waiting, gate.admitted, gate.peak_waiting) == (0, 0, 6, 4)
+
+
+@pytest.mark.asyncio
+async def test_gate_refuses_beyond_queue_and_wait_limits():
+    gate = AdmissionGate(max_active=1, max_waiting=1, max_wait_seconds=0.05)
+    holding = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold():
+        async with gate.admit():
+            holding.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await holding.wait()
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as full:
+        async with gate.admit():
+            pass
+    assert full.value.retry_after >= 1
+    # The queued request gives up after max_wait_seconds
+    with pytest.raises(AdmissionRejected):
+        await waiter
+    assert gate.waiting == 0 and gate.rejected == 2
+
+    release.set()
+    await holder
+    assert gate.active == 0
+    async with gate.admit():
+        assert gate.active == 1
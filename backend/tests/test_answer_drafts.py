@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.draft import AnswerDraft
+from app.services.answer_drafts import (
+    _hash_entries, _merge_entries, _row_entries, discard_draft, encode_draft_answers, load_draft, save_draft_answers,
+)
+from app.services.attempt_sessions import close_attempt_session, start_attempt_session
+from app.services.results_service import AttemptRejected
+
+
+def test_encode_draft_answers_rejects_oversized_answers():
+    assert encode_draft_answers({7: {"text": "a"}}) == {"7": '{"text":"a"}'}
+    with pytest.raises(AttemptRejected) as exc:
+        encode_draft_answers({7: {"text": "x" * settings.DRAFT_MAX_ANSWER_BYTES}})
+    assert exc.value.status_code == 413
+
+
+def test_newest_save_of_each_question_wins_across_redis_and_the_row():
+    # The hash was not flushed before Redis went down; question 2 was saved to the row meanwhile
+    stale_hash = {"attempt": "5", "1": '{"text":"cached"}', "1:at": "200", "2": '{"text":"old"}', "2:at": "100"}
+    row = AnswerDraft(attempt_id=5, answers={"2": {"text": "outage"}, "3": {"text": "legacy"}},
+                      answer_saved_at={"2": 150})
+    merged = _merge_entries(_row_entries(row, 5), _hash_entries(stale_hash))
+    assert {question_id: payload["text"] for question_id, (_, payload) in merged.items()} == {
+        "1": "cached", "2": "outage", "3": "legacy",
+    }
+    assert _row_entries(row, 6) == {}
+
+
+@pytest.mark.asyncio
+async def test_drafts_fall_back_to_the_database_without_redis(session_factory, student, make_test):
+    test = await make_test(title="Drafts")
+
+    async with session_factory() as db:
+        first, _ = await start_attempt_session(db, test, student.id)
+        await save_draft_answers(db, first, {1: {"text": "first"}, 2: {"selected_option_id": 5}})
+        await save_draft_answers(db, first, {1: {"text": "edited"}})
+
+    async with session_factory() as db:
+        assert (await db.execute(select(AnswerDraft))).scalars().one().answers == {
+            "1": {"text": "edited"}, "2": {"selected_option_id": 5},
+        }
+        assert await load_draft(db, first) == {1: {"text": "edited"}, 2: {"selected_option_id": 5}}
+
+        # The first attempt ended without its draft being discarded
+        assert await close_attempt_session(db, first.id, "expired")
+        await db.commit()
+        second, _ = await start_attempt_session(db, test, student.id)
+        assert await load_draft(db, second) == {}
+        await save_draft_answers(db, second, {3: {"text": "new"}})
+        assert await load_draft(db, second) == {3: {"text": "new"}}
+
+        # A late discard of the earlier attempt leaves the current draft alone
+        await discard_draft(db, first)
+        assert await load_draft(db, second) == {3: {"text": "new"}}
+        await discard_draft(db, second)
+        assert await load_draft(db, second) == {}
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.models.test import QuestionType, TestStatus
+from app.services.answer_key import AnswerKeyCache, compile_answer_key
+
+
+def _option(option_id: int, is_correct: bool = False, order: int = 0):
+    return SimpleNamespace(id=option_id, is_correct=is_correct, order=order)
+
+
+def _question(question_id: int, question_type: QuestionType, options=None, correct_answer_text=None, points=1.0):
+    return SimpleNamespace(
+        id=question_id,
+        question_type=question_type,
+        options=options or [],
+        correct_answer_text=correct_answer_text,
+        points=points,
+    )
+
+
+def _test(test_id: int = 1, updated_at=None):
+    return SimpleNamespace(
+        id=test_id,
+        status=TestStatus.PUBLISHED,
+        passing_score=60.0,
+        max_attempts=None,
+        duration_minutes=None,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        updated_at=updated_at,
+    )
+
+
+def test_compile_answer_key_precomputes_grading_facts():
+    questions = [
+        _question(1, QuestionType.MULTIPLE_CHOICE, [_option(10, True), _option(11), _option(12, True)], points=2),
+        _question(2, QuestionType.ORDERING, [_option(20, order=2), _option(21, order=1)]),
+        _question(3, QuestionType.SHORT_ANSWER, correct_answer_text="Москва|Moscow"),
+        _question(4, QuestionType.FILL_IN_BLANK, correct_answer_text="A, b"),
+        _question(5, QuestionType.TRUE_FALSE, correct_answer_text="Ложь"),
+        _question(6, QuestionType.NUMERIC, correct_answer_text="3,14"),
+    ]
+    key = compile_answer_key(_test(), questions)
+
+    assert key.points_total == 7
+    assert key.questions_by_id[1].correct_option_ids == frozenset({10, 12})
+    assert key.questions_by_id[2].expected_sequence == (21, 20)
+    assert key.questions_by_id[3].short_answer_variants == frozenset({"москва", "moscow"})
+    assert key.questions_by_id[4].expected_blanks == ("a", "b")
+    assert key.questions_by_id[5].expected_bool is False
+    assert key.questions_by_id[6].expected_number == 3.14
+
+
+def test_answer_key_cache_versions_and_lru():
+    cache = AnswerKeyCache(maxsize=2)
+    old = compile_answer_key(_test(1), [])
+    cache.put(old)
+    assert cache.get(1, old.version) is old
+
+    new = compile_answer_key(_test(1, updated_at=datetime(2025, 2, 1, tzinfo=timezone.utc)), [])
+    cache.put(new)
+    assert cache.get(1, old.version) is None
+    assert cache.get(1, new.version) is new
+
+    cache.put(compile_answer_key(_test(2), []))
+    cache.put(compile_answer_key(_test(3), []))
+    assert len(cache) == 2
+    assert cache.get(1, new.version) is None
+
+    cache.invalidate(3)
+    assert len(cache) == 1
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import undefer
+
+from app.models.result import Answer, TestResult
+from app.models.test import Question, QuestionType
+from app.services.results_service import load_answer_views
+
+
+@pytest.mark.asyncio
+async def test_answer_data_is_deferred_and_views_strip_file_content(session_factory, teacher, make_test):
+    test = await make_test(title="Files", passing_score=50)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="Upload", question_type=QuestionType.FILE_UPLOAD, points=1, order=0)
+        db.add(question)
+        await db.flush()
+        result = TestResult(
+            test_id=test.id, student_id=teacher.id, score=0, points_earned=0, points_total=1, is_passed=False,
+            status="pending_manual", started_at=now, completed_at=now,
+        )
+        db.add(result)
+        await db.flush()
+        db.add(Answer(
+            test_result_id=result.id, question_id=question.id, points_earned=0,
+            answer_data={"file_name": "a.txt", "file_size": 5, "file_content": "aGVsbG8="},
+        ))
+        await db.commit()
+
+    async with session_factory() as db:
+        [view] = await load_answer_views(db, Answer.test_result_id == result.id)
+        assert view["answer_data"] == {"file_name": "a.txt", "file_size": 5}
+
+        answer = (await db.execute(select(Answer))).scalar_one()
+        with pytest.raises(InvalidRequestError):
+            answer.answer_data
+
+    async with session_factory() as db:
+        answer = (await db.execute(select(Answer).options(undefer(Answer.answer_data)))).scalar_one()
+        assert answer.answer_data["file_content"] == "aGVsbG8="
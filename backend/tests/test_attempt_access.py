@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+
+from app.api.v1.endpoints.results import _start_attempt, save_draft
+from app.models.attempt_session import AttemptSession
+from app.models.result import TestResult
+from app.models.test import TestAssignment
+from app.schemas.result import AnswerCreate, DraftUpdate, TestAttemptStart
+from app.services.user_principal import UserPrincipal
+
+
+@pytest.mark.asyncio
+async def test_access_is_checked_before_the_attempt_is_touched(session_factory, student, make_test):
+    test = await make_test(title="Timed", duration_minutes=1)
+    unassigned = await make_test(title="Not yours")
+    principal = UserPrincipal(id=student.id, role=student.role, is_active=True, is_verified=True)
+    async with session_factory() as db:
+        db.add(TestAssignment(test_id=test.id, student_id=student.id))
+        await db.commit()
+        started = await _start_attempt(TestAttemptStart(test_id=test.id), db, principal)
+
+    # The attempt runs out and the assignment is withdrawn
+    async with session_factory() as db:
+        await db.execute(
+            update(AttemptSession).where(AttemptSession.id == started["attempt_id"])
+            .values(deadline_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        )
+        await db.execute(delete(TestAssignment).where(TestAssignment.test_id == test.id))
+        await db.commit()
+
+    async with session_factory() as db:
+        with pytest.raises(HTTPException) as denied:
+            await _start_attempt(TestAttemptStart(test_id=test.id), db, principal)
+        assert denied.value.status_code == 403
+        # Not submitted from its draft on behalf of a student without access
+        assert (await db.get(AttemptSession, started["attempt_id"])).status == "active"
+        assert await db.scalar(select(func.count()).select_from(TestResult)) == 0
+
+        # 403 rather than "no active attempt"
+        draft = DraftUpdate(answers=[AnswerCreate(question_id=1, answer_data={"text": "x"})])
+        with pytest.raises(HTTPException) as denied:
+            await save_draft(unassigned.id, draft, db=db, current_user=principal)
+        assert denied.value.status_code == 403
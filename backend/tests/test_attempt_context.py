@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.models.result import TestResult
+from app.models.test import TestAssignment
+from app.services.results_service import AttemptCounts, load_attempt_context
+
+
+@pytest.mark.asyncio
+async def test_attempt_context_is_loaded_in_one_statement(engine, session_factory, student, make_user, make_test):
+    other = await make_user()
+    test = await make_test(title="Ctx", passing_score=50, max_attempts=3)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        db.add(TestAssignment(test_id=test.id, student_id=student.id))
+        # Attempt numbers need not be contiguous (e.g. after a result was deleted)
+        for attempt in (1, 3):
+            db.add(TestResult(
+                test_id=test.id, student_id=student.id, score=50, points_earned=1, points_total=2, is_passed=True,
+                status="auto_completed", started_at=now, completed_at=now, attempt_number=attempt,
+            ))
+        await db.commit()
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record_query(conn, cursor, statement, *args):
+        if statement != "BEGIN":
+            statements.append(statement)
+
+    async with session_factory() as db:
+        context = await load_attempt_context(db, test.id, student.id)
+        assert len(statements) == 1
+        assert context.test.title == "Ctx"
+        assert context.assigned is True
+        assert context.attempts == AttemptCounts(used=2, last_number=3)
+
+        fresh = await load_attempt_context(db, test.id, other.id)
+        assert fresh.assigned is False
+        assert fresh.attempts == AttemptCounts(used=0, last_number=0)
+
+        assert await load_attempt_context(db, test.id + 1, student.id) is None
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.services.attempt_sessions import (
+    AttemptSessionInfo, close_attempt_session, find_active_session, get_attempt_session, start_attempt_session,
+)
+
+
+def test_session_info_round_trips_through_redis_fields():
+    now = datetime.now(timezone.utc)
+    info = AttemptSessionInfo(id=1, test_id=2, student_id=3, started_at=now, deadline_at=None, status="active")
+    assert AttemptSessionInfo.from_fields(info.to_fields()) == info
+    assert not info.overdue() and info.due_at is None
+    grace = timedelta(seconds=settings.ATTEMPT_DEADLINE_GRACE_SECONDS)
+    timed = AttemptSessionInfo(1, 2, 3, now, now - grace / 2, "active")
+    assert not timed.overdue() and timed.overdue(now + grace)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_start_resumes_the_active_session_and_close_is_won_once(session_factory, student, make_test):
+    test = await make_test(title="Timed", duration_minutes=30)
+
+    async with session_factory() as db:
+        first, resumed = await start_attempt_session(db, test, student.id)
+        assert not resumed and first.deadline_at - first.started_at == timedelta(minutes=30)
+        # A second tab losing the race on the partial unique index resumes the winner's session
+        again, resumed = await start_attempt_session(db, test, student.id)
+        assert resumed and again == first
+        assert await get_attempt_session(db, first.id) == first
+
+        assert await close_attempt_session(db, first.id, "submitted")
+        assert not await close_attempt_session(db, first.id, "submitted")
+        await db.commit()
+        assert await find_active_session(db, test.id, student.id) is None
+
+        second, resumed = await start_attempt_session(db, test, student.id)
+        assert not resumed and second.id != first.id
@@ -0,0 +1,32 @@
+import base64
+
+import pytest
+
+from app.core.blob_store import BlobStore
+
+
+def test_put_bytes_is_content_addressed_and_deduplicated(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first = store.put_bytes(b"hello")
+    second = store.put_bytes(b"hello")
+
+    assert first == second
+    assert first.size == 5
+    path = store.path_for(first.sha256)
+    assert path.parent.parent.name == first.sha256[:2]
+    assert path.read_bytes() == b"hello"
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_put_base64_accepts_data_urls_and_rejects_garbage(tmp_path):
+    store = BlobStore(str(tmp_path))
+    encoded = "data:text/plain;base64," + base64.b64encode(b"hi").decode()
+    ref = await store.put_base64_async(encoded)
+    with store.open(ref.sha256) as fh:
+        assert fh.read() == b"hi"
+
+    with pytest.raises(ValueError):
+        await store.put_base64_async("not base64!")
+    with pytest.raises(ValueError):
+        store.path_for("../../etc/passwd")
@@ -0,0 +1,62 @@
+import base64
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.blob_store import BlobStore
+from app.models.test import Question, QuestionType
+from app.services import results_service
+from app.services.attempt_sessions import close_attempt_session, start_attempt_session
+from app.services.blob_sweeper import sweep_unreferenced_blobs
+from app.services.results_service import AttemptRejected, finalize_attempt
+
+
+def _age(store: BlobStore, digest: str, hours: int) -> None:
+    past = time.time() - hours * 3600
+    os.utime(store.path_for(digest), (past, past))
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_only_old_unreferenced_blobs(tmp_path, monkeypatch, session_factory, student, make_test):
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(results_service, "blob_store", store)
+    test = await make_test(title="Files")
+
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="F", question_type=QuestionType.FILE_UPLOAD, points=1, order=0)
+        db.add(question)
+        await db.commit()
+
+    def file_answer(content: bytes):
+        return {question.id: {"file_name": "a.txt", "file_content": base64.b64encode(content).decode()}}
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        await finalize_attempt(db, test=test, student_id=student.id, answers=file_answer(b"kept"), started_at=now)
+
+    async with session_factory() as db:
+        # Another submission closed the attempt first: the file was stored, the result was not
+        session, _ = await start_attempt_session(db, test, student.id)
+        await close_attempt_session(db, session.id, "submitted")
+        await db.commit()
+        with pytest.raises(AttemptRejected):
+            await finalize_attempt(
+                db, test=test, student_id=student.id, answers=file_answer(b"orphaned"), started_at=now,
+                attempt_session=session,
+            )
+
+    kept, orphaned = (hashlib.sha256(content).hexdigest() for content in (b"kept", b"orphaned"))
+    assert store.exists(orphaned)
+    recent = store.put_bytes(b"just uploaded").sha256
+    for digest in (kept, orphaned):
+        _age(store, digest, hours=2)
+    reuploaded = store.put_bytes(b"uploaded again").sha256
+    _age(store, reuploaded, hours=2)
+    store.put_bytes(b"uploaded again")
+
+    async with session_factory() as db:
+        assert await sweep_unreferenced_blobs(db, store, timedelta(hours=1), batch_size=2) == 1
+    assert [store.exists(digest) for digest in (kept, orphaned, recent, reuploaded)] == [True, False, True, True]
@@ -6,6 +6,17 @@ from sqlalchemy import update, select
 from app.models.user import User, UserRole
 
 
+# /auth/register requires the parent phone and school profile
+PROFILE = {
+    "phone": "+70000000000",
+    "gender": "male",
+    "date_of_birth": "2010-01-01",
+    "school_name": "School 1",
+    "class_number": 7,
+    "class_letter": "A",
+}
+
+
 async def register_user(client: AsyncClient, email: str, username: str, full_name: str, password: str, role: str):
     r = await client.post(
         "/api/v1/auth/register",
@@ -15,6 +26,7 @@ async def register_user(client: AsyncClient, email: str, username: str, full_nam
             "full_name": full_name,
             "password": password,
             "role": role,
+            **PROFILE,
         },
     )
     assert r.status_code == 201, r.text
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.attempt_session import AttemptSession
+from app.models.draft import AnswerDraft
+from app.models.result import TestResult
+from app.models.test import Question, QuestionOption, QuestionType
+from app.services.answer_drafts import save_draft_answers
+from app.services.attempt_sessions import start_attempt_session
+from app.services.deadline_worker import DeadlineWorker, expire_attempt
+
+
+@pytest.mark.asyncio
+async def test_overdue_attempts_are_submitted_from_their_drafts(session_factory, make_user, make_test):
+    students = [await make_user() for _ in range(2)]
+    test = await make_test(title="Timed", duration_minutes=10, passing_score=50)
+
+    async with session_factory() as db:
+        choice = Question(test_id=test.id, question_text="Q", question_type=QuestionType.SINGLE_CHOICE, points=1, order=0)
+        upload = Question(test_id=test.id, question_text="F", question_type=QuestionType.FILE_UPLOAD, points=1, order=1)
+        db.add_all([choice, upload])
+        await db.flush()
+        right = QuestionOption(question_id=choice.id, option_text="a", is_correct=True, order=0)
+        db.add_all([right, QuestionOption(question_id=choice.id, option_text="b", is_correct=False, order=1)])
+        await db.commit()
+
+    async with session_factory() as db:
+        sessions = [(await start_attempt_session(db, test, student.id))[0] for student in students]
+        await save_draft_answers(db, sessions[0], {choice.id: {"selected_option_id": right.id}})
+        # Not due yet: the grace period after the deadline is still running
+        assert await expire_attempt(db, sessions[0].id) is None
+        await db.execute(
+            update(AttemptSession).values(deadline_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        )
+        await db.commit()
+
+    async with session_factory() as db:
+        # The missing file answer scores zero instead of rejecting the timed-out attempt
+        result = await expire_attempt(db, sessions[0].id)
+        assert (result.points_earned, result.completed_at is not None) == (1.0, True)
+        assert await expire_attempt(db, sessions[0].id) is None
+
+    # Without Redis the worker finds the remaining overdue attempt through the table
+    worker = DeadlineWorker(
+        session_factory, poll_interval=1, batch_size=10, concurrency=2, sweep_interval=60, retry_delay=timedelta(seconds=1),
+    )
+    assert await worker.run_once() == 1
+
+    async with session_factory() as db:
+        statuses = dict((await db.execute(select(AttemptSession.student_id, AttemptSession.status))).all())
+        assert set(statuses.values()) == {"expired"}
+        results = (await db.execute(select(TestResult).order_by(TestResult.student_id))).scalars().all()
+        assert [r.student_id for r in results] == [s.id for s in students]
+        assert results[1].points_earned == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_overdue_attempt_is_expired_and_its_draft_dropped(session_factory, student, make_test):
+    test = await make_test(title="Once", duration_minutes=10, max_attempts=1)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="Q", question_type=QuestionType.ESSAY, points=1, order=0)
+        db.add(question)
+        await db.commit()
+
+    async with session_factory() as db:
+        session, _ = await start_attempt_session(db, test, student.id)
+        await save_draft_answers(db, session, {question.id: {"text_answer": "draft"}})
+        # The only attempt was used up meanwhile, so the overdue one cannot be recorded
+        db.add(TestResult(
+            test_id=test.id, student_id=student.id, score=0, points_earned=0, points_total=1, is_passed=False,
+            status="completed", started_at=now, completed_at=now, attempt_number=1,
+        ))
+        await db.execute(update(AttemptSession).values(deadline_at=now - timedelta(hours=1)))
+        await db.commit()
+
+    async with session_factory() as db:
+        assert await expire_attempt(db, session.id) is None
+        assert (await db.get(AttemptSession, session.id)).status == "expired"
+        assert (await db.execute(select(AnswerDraft))).first() is None
@@ -7,10 +7,21 @@ from datetime import datetime, timezone, timedelta
 from app.models.user import User
 
 
+# /auth/register requires the parent phone and school profile
+PROFILE = {
+    "phone": "+70000000000",
+    "gender": "male",
+    "date_of_birth": "2010-01-01",
+    "school_name": "School 1",
+    "class_number": 7,
+    "class_letter": "A",
+}
+
+
 async def register_user(client: AsyncClient, email: str, username: str, full_name: str, password: str, role: str):
     r = await client.post(
         "/api/v1/auth/register",
-        json={"email": email, "username": username, "full_name": full_name, "password": password, "role": role},
+        json={"email": email, "username": username, "full_name": full_name, "password": password, "role": role, **PROFILE},
     )
     assert r.status_code == 201, r.text
 
@@ -28,13 +39,13 @@ async def login_user(client: AsyncClient, username: str, password: str) -> str:
 @pytest.mark.asyncio
 async def test_e2e_group_assignment_and_analytics(client: AsyncClient, db_session: AsyncSession):
     # Arrange: register teacher and student, verify
-    await register_user(client, "teach@example.com", "teach", "Teach", "pass", "teacher")
-    await register_user(client, "stud@example.com", "stud", "Stud", "pass", "student")
+    await register_user(client, "teach@example.com", "teach", "Teach", "pass1234", "teacher")
+    await register_user(client, "stud@example.com", "stud", "Stud", "pass1234", "student")
     await db_session.execute(update(User).where(User.username.in_(["teach", "stud"])).values(is_verified=True))
     await db_session.commit()
 
-    teach_token = await login_user(client, "teach", "pass")
-    stud_token = await login_user(client, "stud", "pass")
+    teach_token = await login_user(client, "teach", "pass1234")
+    stud_token = await login_user(client, "stud", "pass1234")
 
     # Create group by teacher and add student
     r = await client.post("/api/v1/groups/", json={"name": "E2E Group"}, headers={"Authorization": f"Bearer {teach_token}"})
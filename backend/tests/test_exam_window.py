@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.api.v1.endpoints.tests import get_test
+from app.models.test import Question, QuestionType, Test, TestAssignment
+from app.services.answer_key import answer_key_cache, version_stamp
+from app.services.attempt_sessions import start_attempt_session
+from app.services.exam_window import ExamWarmer, exam_window_error, is_assigned
+from app.services.student_view import student_view_cache
+from app.services.user_principal import UserPrincipal, principal_cache
+
+
+def test_exam_window_admits_starts_only_while_open():
+    now = datetime.now(timezone.utc)
+    test = Test(exam_opens_at=now, exam_closes_at=now + timedelta(hours=1))
+    assert "opens at" in exam_window_error(test, now - timedelta(seconds=1))
+    assert exam_window_error(test, now) is None
+    assert exam_window_error(test, now + timedelta(hours=1)) == "The exam window has closed"
+    assert exam_window_error(Test(), now) is None
+
+
+@pytest.mark.asyncio
+async def test_opening_exams_are_warmed_and_end_attempts_at_close(session_factory, student, make_test):
+    now = datetime.now(timezone.utc)
+    exam = await make_test(
+        title="Exam", duration_minutes=90,
+        exam_opens_at=now + timedelta(minutes=5), exam_closes_at=now + timedelta(minutes=45),
+    )
+    later = await make_test(title="Later", exam_opens_at=now + timedelta(days=1))
+
+    async with session_factory() as db:
+        db.add(Question(test_id=exam.id, question_text="Q", question_type=QuestionType.ESSAY, points=1, order=0))
+        db.add(TestAssignment(test_id=exam.id, student_id=student.id))
+        await db.commit()
+
+    warmer = ExamWarmer(session_factory, interval=30, lead=timedelta(minutes=10))
+    assert await warmer.run_once() == 1
+    version = version_stamp(exam)
+    assert student_view_cache.get(exam.id, version) is not None
+    assert answer_key_cache.get(exam.id, version) is not None
+    assert principal_cache.get(student.id) is not None
+    assert student_view_cache.get(later.id, version_stamp(later)) is None
+
+    async with session_factory() as db:
+        assert await is_assigned(db, exam, student.id)
+        assert not await is_assigned(db, later, student.id)
+        # The 90-minute attempt ends when the window closes
+        session, _ = await start_attempt_session(db, exam, student.id)
+        assert session.deadline_at == exam.exam_closes_at
+
+
+@pytest.mark.asyncio
+async def test_students_cannot_read_exam_questions_before_the_window_opens(session_factory, student, make_test):
+    now = datetime.now(timezone.utc)
+    exam = await make_test(title="Exam", exam_opens_at=now + timedelta(hours=1))
+    async with session_factory() as db:
+        db.add(Question(test_id=exam.id, question_text="Q", question_type=QuestionType.ESSAY, points=1, order=0))
+        db.add(TestAssignment(test_id=exam.id, student_id=student.id))
+        await db.commit()
+
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    principal = UserPrincipal(id=student.id, role=student.role, is_active=True, is_verified=True)
+    async with session_factory() as db:
+        with pytest.raises(HTTPException) as closed:
+            await get_test(exam.id, request, db=db, current_user=principal)
+        assert closed.value.status_code == 403 and "opens at" in closed.value.detail
+
+        exam = await db.get(Test, exam.id)
+        exam.exam_opens_at = now - timedelta(minutes=1)
+        await db.commit()
+        response = await get_test(exam.id, request, db=db, current_user=principal)
+        assert response.status_code == 200 and b"questions" in response.body
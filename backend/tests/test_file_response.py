@@ -0,0 +1,47 @@
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+
+from app.core.file_response import RangeNotSatisfiable, conditional_file_response, parse_byte_range
+
+
+def test_parse_byte_range():
+    assert parse_byte_range("bytes=0-3", 10) == (0, 3)
+    assert parse_byte_range("bytes=4-", 10) == (4, 9)
+    assert parse_byte_range("bytes=-3", 10) == (7, 9)
+    assert parse_byte_range("bytes=5-100", 10) == (5, 9)
+    assert parse_byte_range("bytes=0-1,4-5", 10) is None
+    assert parse_byte_range("items=0-1", 10) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=10-", 10)
+
+
+@pytest.mark.asyncio
+async def test_conditional_file_response(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(b"0123456789")
+    app = FastAPI()
+
+    @app.get("/file")
+    async def download(request: Request):
+        return conditional_file_response(request, path, etag="abc", media_type="text/plain")
+
+    async with AsyncClient(app=app, base_url="http://t") as client:
+        full = await client.get("/file")
+        assert full.status_code == 200 and full.content == b"0123456789"
+        assert full.headers["etag"] == '"abc"'
+        assert full.headers["accept-ranges"] == "bytes"
+
+        partial = await client.get("/file", headers={"Range": "bytes=2-5"})
+        assert partial.status_code == 206 and partial.content == b"2345"
+        assert partial.headers["content-range"] == "bytes 2-5/10"
+
+        stale = await client.get("/file", headers={"Range": "bytes=2-5", "If-Range": '"old"'})
+        assert stale.status_code == 200 and stale.content == b"0123456789"
+
+        cached = await client.get("/file", headers={"If-None-Match": 'W/"abc"'})
+        assert cached.status_code == 304 and cached.content == b""
+
+        outside = await client.get("/file", headers={"Range": "bytes=20-"})
+        assert outside.status_code == 416
+        assert outside.headers["content-range"] == "bytes */10"
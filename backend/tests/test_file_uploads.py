@@ -0,0 +1,47 @@
+import pytest
+
+from app.core.blob_store import BlobStore, BlobTooLarge
+from app.core.security import create_file_token
+from app.services import results_service
+from app.services.results_service import AttemptRejected, resolve_file_answer
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(results_service, "blob_store", store)
+    return store
+
+
+def test_blob_writer_streams_and_enforces_limit(store):
+    writer = store.writer(max_size=8)
+    writer.write(b"abcd")
+    writer.write(b"efgh")
+    ref = writer.commit()
+    assert ref.size == 8
+    assert store.path_for(ref.sha256).read_bytes() == b"abcdefgh"
+
+    writer = store.writer(max_size=4)
+    with pytest.raises(BlobTooLarge):
+        writer.write(b"abcde")
+    assert list((store.root / "tmp").iterdir()) == []
+
+
+def test_file_token_resolves_only_for_its_owner(store):
+    ref = store.put_bytes(b"report")
+    token = create_file_token({"uid": 7, "sha256": ref.sha256, "size": ref.size, "name": "r.pdf", "mime": "application/pdf"})
+
+    resolved = resolve_file_answer({"file_token": token, "file_content": "ignored"}, student_id=7)
+    assert resolved == {
+        "file_name": "r.pdf",
+        "file_type": "application/pdf",
+        "file_size": 6,
+        "file_sha256": ref.sha256,
+    }
+
+    with pytest.raises(AttemptRejected):
+        resolve_file_answer({"file_token": token}, student_id=8)
+    with pytest.raises(AttemptRejected):
+        resolve_file_answer({"file_token": "garbage"}, student_id=7)
+    # a raw digest supplied by the client is never trusted
+    assert "file_sha256" not in resolve_file_answer({"file_name": "x", "file_sha256": ref.sha256}, student_id=7)
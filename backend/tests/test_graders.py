@@ -0,0 +1,64 @@
+import pytest
+
+from app.models.test import QuestionType, TestStatus
+from app.services.answer_key import AnswerKey, CompiledQuestion
+from app.services.graders import GRADERS, InvalidAnswerError, get_grader, grade_submissions
+
+
+def _key(*questions: CompiledQuestion) -> AnswerKey:
+    return AnswerKey(
+        test_id=1,
+        version="v1",
+        status=TestStatus.PUBLISHED,
+        passing_score=60.0,
+        max_attempts=None,
+        duration_minutes=None,
+        questions=tuple(questions),
+        points_total=sum(q.points for q in questions),
+        questions_by_id={q.id: q for q in questions},
+    )
+
+
+def test_every_question_type_has_a_grader():
+    assert set(GRADERS) == set(QuestionType)
+
+
+def test_grade_many_batches_payloads():
+    question = CompiledQuestion(id=1, question_type=QuestionType.ORDERING, points=3.0, expected_sequence=(5, 7, 6))
+    outcomes = get_grader(QuestionType.ORDERING).grade_many(
+        question,
+        [
+            {"order": {"5": 1, "7": 2, "6": 3}},
+            {"order": {"5": 0, "7": 1, "6": 2}},
+            {"order": {"5": 1, "7": 1, "6": 3}},
+            {"order": "broken"},
+        ],
+    )
+    assert [o.is_correct for o in outcomes] == [True, True, False, False]
+    assert [o.points for o in outcomes] == [3.0, 3.0, 0.0, 0.0]
+
+
+def test_grade_submissions_totals_and_pending():
+    key = _key(
+        CompiledQuestion(id=1, question_type=QuestionType.SINGLE_CHOICE, points=2.0, correct_option_ids=frozenset({10})),
+        CompiledQuestion(id=2, question_type=QuestionType.SHORT_ANSWER, points=1.0, short_answer_variants=frozenset({"москва"})),
+        CompiledQuestion(id=3, question_type=QuestionType.ESSAY, points=1.0),
+    )
+    first, second = grade_submissions(
+        key,
+        [
+            {1: {"selected_option_id": "10"}, 2: {"text": " МОСКВА! "}, 3: {"text": "essay"}},
+            {1: {"selected_option_id": 11}},
+        ],
+    )
+    assert first.points_earned == 3.0
+    assert first.pending_answers_count == 1
+    assert first.score == 75.0
+    assert second.points_earned == 0.0
+    assert second.pending_answers_count == 1
+
+
+def test_file_upload_without_content_is_rejected():
+    question = CompiledQuestion(id=1, question_type=QuestionType.FILE_UPLOAD, points=1.0)
+    with pytest.raises(InvalidAnswerError):
+        get_grader(QuestionType.FILE_UPLOAD).grade(question, {"file_name": "a.txt"})
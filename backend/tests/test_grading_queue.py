@@ -0,0 +1,87 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Response
+
+from app.api.v1.endpoints.results import get_grading_queue
+from app.models.result import Answer, TestResult
+from app.models.test import Question, QuestionType
+from app.models.user import UserRole
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_id_cursor
+from app.services.user_principal import UserPrincipal
+
+
+async def _queue(db, teacher, limit=50, test_id=None, after=None):
+    response = Response()
+    principal = UserPrincipal(id=teacher.id, role=teacher.role, is_active=True, is_verified=True)
+    items = await get_grading_queue(
+        response, limit=limit, test_id=test_id, after=after, db=db, current_user=principal,
+    )
+    return items, response.headers.get(NEXT_CURSOR_HEADER)
+
+
+@pytest.mark.asyncio
+async def test_grading_queue_pages_pending_answers_of_own_tests(session_factory, teacher, student, make_user, make_test):
+    other_teacher = await make_user(UserRole.TEACHER)
+    essays = await make_test(title="Essays")
+    uploads = await make_test(title="Uploads")
+    foreign = await make_test(title="Foreign", creator_id=other_teacher.id)
+
+    base = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+    async with session_factory() as db:
+        questions = {}
+        for test, question_type in [
+            (essays, QuestionType.ESSAY), (uploads, QuestionType.FILE_UPLOAD), (foreign, QuestionType.ESSAY),
+        ]:
+            questions[test.id] = Question(
+                test_id=test.id, question_text=test.title, question_type=question_type, points=2, order=0,
+            )
+        db.add_all(questions.values())
+        await db.flush()
+        attempt_numbers = itertools.count(1)
+
+        def answer(test, minutes, answer_data, is_correct=None):
+            result = TestResult(
+                test_id=test.id, student_id=student.id, score=0, points_earned=0, points_total=2, is_passed=False,
+                status="pending_manual", started_at=base, completed_at=base, attempt_number=next(attempt_numbers),
+            )
+            result.answers.append(Answer(
+                question_id=questions[test.id].id, answer_data=answer_data, is_correct=is_correct,
+                points_earned=0, created_at=base + timedelta(minutes=minutes),
+            ))
+            return result
+
+        # Inserted one by one: the queue follows id order, whatever created_at says
+        for result in [
+            answer(essays, 3, {"text": "first"}),
+            answer(uploads, 1, {"file_name": "a.pdf", "file_type": "application/pdf", "file_size": 5,
+                                "file_content": "aGVsbG8="}),
+            answer(essays, 2, {"text": "third"}),
+            answer(essays, 0, {"text": "graded"}, is_correct=True),
+            answer(foreign, 0, {"text": "not mine"}),
+        ]:
+            db.add(result)
+            await db.flush()
+        await db.commit()
+
+    async with session_factory() as db:
+        first, cursor = await _queue(db, teacher, limit=2)
+        assert [item.test_title for item in first] == ["Essays", "Uploads"]
+        assert first[0].id < first[1].id
+        assert cursor is not None
+        second, last_cursor = await _queue(db, teacher, limit=2, after=decode_id_cursor(cursor))
+        assert [item.answer_data for item in second] == [{"text": "third"}]
+        assert last_cursor is None
+
+        upload = first[1]
+        assert upload.answer_data is None
+        assert (upload.file_name, upload.file_type, upload.file_size) == ("a.pdf", "application/pdf", 5)
+        assert first[0].answer_data == {"text": "first"} and first[0].file_name is None
+
+        only_essays, _ = await _queue(db, teacher, test_id=essays.id)
+        assert [item.answer_data["text"] for item in only_essays] == ["first", "third"]
+        assert (await _queue(db, teacher, test_id=foreign.id))[0] == []
+
+        theirs, _ = await _queue(db, other_teacher)
+        assert [(item.test_id, item.student_id) for item in theirs] == [(foreign.id, student.id)]
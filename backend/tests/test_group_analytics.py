@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.group import Group, GroupMembership
+from app.models.result import TestResult
+from app.services.group_analytics import compute_group_analytics, percentile_cont
+
+
+def test_percentile_cont_interpolates_like_postgres():
+    assert percentile_cont([], 0.5) is None
+    assert percentile_cont([10.0, 20.0, 30.0, 40.0], 0.5) == 25.0
+    assert percentile_cont([10.0, 20.0, 30.0, 40.0], 0.25) == 17.5
+    assert percentile_cont([55.0], 0.9) == 55.0
+
+
+@pytest.mark.asyncio
+async def test_group_analytics_aggregates_members_graded_results(session_factory, teacher, make_user, make_test):
+    students = [await make_user() for _ in range(4)]
+    test = await make_test(title="Quiz", passing_score=60)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        group = Group(name="Analytics", creator_id=teacher.id)
+        db.add(group)
+        await db.flush()
+        db.add_all([GroupMembership(group_id=group.id, student_id=s.id) for s in students[:3]])
+
+        def result(student, score, status="auto_completed", attempt_number=1):
+            return TestResult(
+                test_id=test.id, student_id=student.id, score=score, points_earned=score, points_total=100,
+                is_passed=status != "pending_manual" and score >= 60, status=status,
+                started_at=now, completed_at=now, attempt_number=attempt_number,
+            )
+
+        db.add_all([
+            result(students[0], 40.0),
+            result(students[1], 70.0),
+            result(students[2], 100.0),
+            result(students[2], 90.0, status="pending_manual", attempt_number=2),  # not graded yet
+            result(students[3], 10.0),  # not a member
+        ])
+        await db.commit()
+
+    async with session_factory() as db:
+        analytics = await compute_group_analytics(db, group.id, test.id)
+        empty = await compute_group_analytics(db, group.id, test.id + 1)
+
+    assert analytics["count"] == 3
+    assert analytics["avg_score"] == pytest.approx(70.0)
+    assert analytics["pass_rate"] == pytest.approx(200 / 3)
+    assert analytics["median_score"] == 70.0
+    assert analytics["percentiles"]["p25"] == 55.0
+    assert analytics["test_title"] == "Quiz"
+    counts = {bucket["from"]: bucket["count"] for bucket in analytics["histogram"]}
+    assert counts[40] == 1 and counts[70] == 1 and counts[90] == 1
+    assert sum(counts.values()) == 3
+
+    assert empty["count"] == 0
+    assert empty["median_score"] is None
+    assert empty["pass_rate"] == 0.0
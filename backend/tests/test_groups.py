@@ -7,6 +7,17 @@ from datetime import datetime, timedelta, timezone
 from app.models.user import User
 
 
+# /auth/register requires the parent phone and school profile
+PROFILE = {
+    "phone": "+70000000000",
+    "gender": "male",
+    "date_of_birth": "2010-01-01",
+    "school_name": "School 1",
+    "class_number": 7,
+    "class_letter": "A",
+}
+
+
 async def register_user(client: AsyncClient, email: str, username: str, full_name: str, password: str, role: str):
     r = await client.post(
         "/api/v1/auth/register",
@@ -16,6 +27,7 @@ async def register_user(client: AsyncClient, email: str, username: str, full_nam
             "full_name": full_name,
             "password": password,
             "role": role,
+            **PROFILE,
         },
     )
     assert r.status_code == 201, r.text
@@ -36,16 +48,16 @@ async def login_user(client: AsyncClient, username: str, password: str) -> str:
 @pytest.mark.asyncio
 async def test_group_permissions_and_assign(client: AsyncClient, db_session: AsyncSession):
     # Two teachers and one student
-    await register_user(client, "t1@example.com", "t1", "Teacher One", "pass", "teacher")
-    await register_user(client, "t2@example.com", "t2", "Teacher Two", "pass", "teacher")
-    await register_user(client, "s1@example.com", "s1", "Student One", "pass", "student")
+    await register_user(client, "t1@example.com", "teacher1", "Teacher One", "pass1234", "teacher")
+    await register_user(client, "t2@example.com", "teacher2", "Teacher Two", "pass1234", "teacher")
+    await register_user(client, "s1@example.com", "student1", "Student One", "pass1234", "student")
 
     # Verify accounts
-    await db_session.execute(update(User).where(User.username.in_(["t1", "t2", "s1"])).values(is_verified=True))
+    await db_session.execute(update(User).where(User.username.in_(["teacher1", "teacher2", "student1"])).values(is_verified=True))
     await db_session.commit()
 
-    t1 = await login_user(client, "t1", "pass")
-    t2 = await login_user(client, "t2", "pass")
+    t1 = await login_user(client, "teacher1", "pass1234")
+    t2 = await login_user(client, "teacher2", "pass1234")
 
     # t1 creates a group
     r = await client.post(
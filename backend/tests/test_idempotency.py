@@ -0,0 +1,109 @@
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.redis_client import redis_manager
+from app.models.attempt_session import AttemptSession
+from app.models.result import TestResult
+from app.models.test import Question, QuestionOption, QuestionType
+from app.services.attempt_sessions import find_submitted_session, get_attempt_session, start_attempt_session
+from app.services.idempotency import idempotency_key, request_fingerprint, run_idempotent
+from app.services.results_service import AttemptCounts, AttemptRejected, finalize_attempt
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint({"a": 1, "b": [1, 2]}) == request_fingerprint({"b": [1, 2], "a": 1})
+    assert request_fingerprint({"a": 1}) != request_fingerprint({"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_requests_run_normally_without_redis():
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return {"ok": True}
+
+    assert await run_idempotent("submit", 1, "key", {"a": 1}, handler) == {"ok": True}
+    assert await run_idempotent("submit", 1, None, {"a": 1}, handler) == {"ok": True}
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_results_racing_for_an_attempt_number_are_renumbered(session_factory, student, make_test):
+    test = await make_test(title="Retry", passing_score=50, max_attempts=2)
+
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="Q", question_type=QuestionType.SINGLE_CHOICE, points=1, order=0)
+        db.add(question)
+        await db.flush()
+        right = QuestionOption(question_id=question.id, option_text="a", is_correct=True, order=0)
+        db.add(right)
+        await db.commit()
+
+    answers = {question.id: {"selected_option_id": right.id}}
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        first = await finalize_attempt(db, test=test, student_id=student.id, answers=answers, started_at=now)
+
+    async with session_factory() as db:
+        # Counts read before the first result committed: the unique index forces the next number
+        session, _ = await start_attempt_session(db, test, student.id)
+        second = await finalize_attempt(
+            db, test=test, student_id=student.id, answers=answers, started_at=now,
+            attempts=AttemptCounts(0, 0), attempt_session=session,
+        )
+        assert (first.attempt_number, second.attempt_number) == (1, 2)
+        stored = await get_attempt_session(db, session.id)
+        assert (stored.status, stored.result_id) == ("submitted", second.id)
+        # A retry without the attempt id finds the attempt it submitted
+        replayed = await find_submitted_session(db, test.id, student.id, now - timedelta(minutes=1))
+        assert replayed.id == session.id
+        assert await find_submitted_session(db, test.id, student.id, now + timedelta(minutes=1)) is None
+
+    async with session_factory() as db:
+        with pytest.raises(AttemptRejected) as rejected:
+            await finalize_attempt(
+                db, test=test, student_id=student.id, answers=answers, started_at=now, attempts=AttemptCounts(1, 1),
+            )
+        assert rejected.value.status_code == 400
+        numbers = (await db.execute(select(TestResult.attempt_number).order_by(TestResult.id))).scalars().all()
+        assert numbers == [1, 2]
+        assert (await db.execute(select(AttemptSession.status))).scalars().all() == ["submitted"]
+
+
+class ReleasingRedis:
+    """Holds a claim that its holder releases right after the next SET NX fails."""
+
+    def __init__(self, redis_key):
+        self.values = {redis_key: "held"}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            del self.values[key]
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+
+@pytest.mark.asyncio
+async def test_claim_released_between_set_and_get_is_claimed_again(monkeypatch):
+    fake = ReleasingRedis(idempotency_key(1, "submit", "key"))
+
+    @asynccontextmanager
+    async def guard():
+        yield fake
+
+    monkeypatch.setattr(redis_manager, "guard", guard)
+
+    async def handler():
+        return {"ok": True}
+
+    assert await run_idempotent("submit", 1, "key", {"a": 1}, handler) == {"ok": True}
+    assert json.loads(fake.values[idempotency_key(1, "submit", "key")])["body"] == {"ok": True}
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.models.result import Answer, TestResult
+from app.models.test import Question, QuestionOption, QuestionType
+from app.services.item_analysis import analyze_items, compute_item_analysis
+
+
+def test_analyze_items_statistics():
+    questions = [(1, QuestionType.SINGLE_CHOICE, 1.0), (2, QuestionType.ESSAY, 2.0), (3, QuestionType.NUMERIC, 1.0)]
+    options = [(10, 1, True), (11, 1, False), (12, 1, False)]
+    # Four attempts; question 3 is answered correctly by everyone
+    points = [
+        (100, 1, 1.0), (100, 2, 2.0), (100, 3, 1.0),
+        (101, 1, 1.0), (101, 2, 1.0), (101, 3, 1.0),
+        (102, 1, 0.0), (102, 2, 1.0), (102, 3, 1.0),
+        (103, 1, 0.0), (103, 3, 1.0),  # question 2 left unanswered
+    ]
+    choices = [(100, 10), (101, 10), (102, 11), (103, 11)]
+
+    report = analyze_items(questions, options, [100, 101, 102, 103], points, choices)
+    q1, q2, q3 = report["questions"]
+
+    assert report["attempts"] == 4
+    assert q1["difficulty"] == pytest.approx(0.5)
+    assert q2["difficulty"] == pytest.approx(0.5)
+    assert q3["difficulty"] == pytest.approx(1.0)
+    assert q3["discrimination"] is None  # constant item
+
+    item = np.array([1.0, 1.0, 0.0, 0.0])
+    rest = np.array([3.0, 2.0, 2.0, 1.0])
+    assert q1["discrimination"] == pytest.approx(np.corrcoef(item, rest)[0, 1])
+
+    by_option = {o["option_id"]: o for o in q1["options"]}
+    assert by_option[10]["selection_rate"] == pytest.approx(0.5)
+    assert by_option[10]["mean_total_score"] == pytest.approx(3.5)
+    assert by_option[11]["mean_total_score"] == pytest.approx(1.5)
+    assert by_option[12]["selection_rate"] == 0.0
+    assert by_option[12]["mean_total_score"] is None
+    assert q2["options"] == []
+
+
+def test_analyze_items_without_attempts():
+    report = analyze_items([(1, QuestionType.SINGLE_CHOICE, 1.0)], [(10, 1, True)], [], [], [])
+    assert report["attempts"] == 0
+    assert report["questions"][0]["difficulty"] is None
+    assert report["questions"][0]["options"][0]["selection_rate"] is None
+
+
+@pytest.mark.asyncio
+async def test_compute_item_analysis_reads_choices_of_graded_results(session_factory, student, make_test):
+    test = await make_test(title="Items", passing_score=50)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="Pick", question_type=QuestionType.MULTIPLE_CHOICE, points=1, order=0)
+        db.add(question)
+        await db.flush()
+        right = QuestionOption(question_id=question.id, option_text="a", is_correct=True, order=0)
+        wrong = QuestionOption(question_id=question.id, option_text="b", is_correct=False, order=1)
+        db.add_all([right, wrong])
+        await db.flush()
+        attempts = [("auto_completed", [right.id], 1.0), ("auto_completed", [right.id, wrong.id], 0.0),
+                    ("pending_manual", [wrong.id], 0.0)]
+        for attempt_number, (status, selected, earned) in enumerate(attempts, start=1):
+            result = TestResult(
+                test_id=test.id, student_id=student.id, score=earned * 100, points_earned=earned, points_total=1,
+                is_passed=earned > 0, status=status, started_at=now, completed_at=now, attempt_number=attempt_number,
+            )
+            db.add(result)
+            await db.flush()
+            db.add(Answer(test_result_id=result.id, question_id=question.id,
+                          answer_data={"selected_option_ids": selected}, points_earned=earned))
+        await db.commit()
+
+    async with session_factory() as db:
+        report = await compute_item_analysis(db, test.id)
+
+    assert report["attempts"] == 2
+    options = {o["option_id"]: o["selection_rate"] for o in report["questions"][0]["options"]}
+    assert options == {right.id: 1.0, wrong.id: 0.5}
+    assert report["questions"][0]["difficulty"] == pytest.approx(0.5)
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.result import Answer, TestResult
+from app.models.test import Question, QuestionType, Test
+from app.models.test_stats import TestStats
+from app.services.item_analysis import analysis_version
+from app.services.results_service import recompute_result_scores
+from app.services.test_stats import record_result_created
+
+
+@pytest.mark.asyncio
+async def test_recompute_result_scores_from_answer_aggregates(session_factory, student, make_test):
+    test = await make_test(title="Essays", passing_score=50)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        essays = [
+            Question(test_id=test.id, question_text=f"E{i}", question_type=QuestionType.ESSAY, points=2, order=i)
+            for i in range(2)
+        ]
+        db.add_all(essays)
+        await db.flush()
+        result = TestResult(
+            test_id=test.id, student_id=student.id, score=0, points_earned=0, points_total=4, is_passed=False,
+            status="pending_manual", pending_answers_count=2, started_at=now, completed_at=now,
+        )
+        db.add(result)
+        await db.flush()
+        answers = [
+            Answer(test_result_id=result.id, question_id=q.id, answer_data={"text": "..."}, points_earned=0)
+            for q in essays
+        ]
+        db.add_all(answers)
+        await record_result_created(db, result)
+        await db.commit()
+
+    async with session_factory() as db:
+        first = await db.get(Answer, answers[0].id)
+        first.is_correct, first.points_earned = True, 2
+        [partial] = await recompute_result_scores(db, {result.id})
+        assert (partial.status, partial.pending_answers_count, partial.score) == ("pending_manual", 1, 50.0)
+        assert partial.is_passed is False
+
+        second = await db.get(Answer, answers[1].id)
+        second.is_correct, second.points_earned = False, 1
+        [graded] = await recompute_result_scores(db, {result.id})
+        await db.commit()
+
+    assert (graded.status, graded.pending_answers_count, graded.points_earned, graded.score) == ("completed", 0, 3, 75.0)
+    assert graded.is_passed is True
+    async with session_factory() as db:
+        stats = await db.get(TestStats, test.id)
+        assert (stats.pending_count, stats.graded_count, stats.passes, stats.score_sum) == (0, 1, 1, 75.0)
+
+    # A regrade that moves points between answers leaves every counter as is
+    async with session_factory() as db:
+        version = await analysis_version(db, await db.get(Test, test.id))
+        first, second = await db.get(Answer, answers[0].id), await db.get(Answer, answers[1].id)
+        first.points_earned, second.points_earned = 1, 2
+        [regraded] = await recompute_result_scores(db, {result.id})
+        await db.commit()
+    assert regraded.score == 75.0
+    async with session_factory() as db:
+        assert await analysis_version(db, await db.get(Test, test.id)) != version
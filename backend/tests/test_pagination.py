@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models.group import Group
+from app.services.pagination import InvalidCursor, PageCursor, decode_cursor, encode_cursor, keyset_paginate
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(ts, 42)) == PageCursor(ts, 42)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_rows_once_with_timestamp_ties(session_factory, teacher):
+    base = datetime(2026, 1, 1, 12, 0, 0, 500000)
+    async with session_factory() as db:
+        # Pairs of groups share a timestamp so the id tie-breaker matters
+        db.add_all([
+            Group(name=f"group-{n}", creator_id=teacher.id, created_at=base + timedelta(seconds=n // 2))
+            for n in range(7)
+        ])
+        await db.commit()
+
+        async def walk(oldest_first):
+            seen, after = [], None
+            while True:
+                query = keyset_paginate(select(Group), Group.created_at, Group.id, after, oldest_first).limit(3)
+                page = (await db.execute(query)).scalars().all()
+                seen.extend(group.name for group in page)
+                if len(page) < 3:
+                    return seen
+                after = PageCursor(page[-1].created_at, page[-1].id)
+
+        assert await walk(False) == [f"group-{n}" for n in (6, 5, 4, 3, 2, 1, 0)]
+        assert await walk(True) == [f"group-{n}" for n in range(7)]
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_in_executor():
+    hasher = PasswordHasher(max_workers=1, max_pending=2)
+    hashed = await hasher.hash("secret-password")
+    assert await hasher.verify("secret-password", hashed) is True
+    assert await hasher.verify("wrong-password", hashed) is False
+    assert hasher.metrics()["completed"] == 3
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_work_beyond_max_pending():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    release = threading.Event()
+    blocked = asyncio.create_task(hasher._run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("another-password")
+    assert hasher.metrics()["pending"] == 1
+    assert hasher.metrics()["rejected"] == 1
+
+    release.set()
+    assert await blocked is True
+    assert hasher.metrics()["pending"] == 0
+    hasher.shutdown()
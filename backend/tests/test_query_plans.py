@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from check_query_plans import HOT_QUERIES, check_query_plans, find_seq_scans, render_sql
+
+
+def test_find_seq_scans_walks_nested_plans():
+    plan = {"Plan": {"Node Type": "Nested Loop", "Plans": [
+        {"Node Type": "Index Scan", "Relation Name": "test_results"},
+        {"Node Type": "Seq Scan", "Relation Name": "answers"},
+        {"Node Type": "Seq Scan", "Relation Name": "tests"},
+    ]}}
+    assert find_seq_scans(plan) == ["answers"]
+
+
+def test_hot_queries_render_for_postgres():
+    for _, build in HOT_QUERIES:
+        assert render_sql(build()).startswith("SELECT")
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("EXPLAIN_DATABASE_URL"), reason="needs a migrated PostgreSQL in EXPLAIN_DATABASE_URL")
+async def test_hot_queries_use_indexes():
+    assert await check_query_plans(os.environ["EXPLAIN_DATABASE_URL"]) == {}
@@ -1,9 +1,24 @@
 import pytest
 from httpx import AsyncClient
 from datetime import datetime, timezone
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.user import User
 
-async def ensure_user(client: AsyncClient, email: str, username: str, full_name: str, password: str, role: str):
+
+# /auth/register requires the parent phone and school profile
+PROFILE = {
+    "phone": "+70000000000",
+    "gender": "male",
+    "date_of_birth": "2010-01-01",
+    "school_name": "School 1",
+    "class_number": 7,
+    "class_letter": "A",
+}
+
+
+async def ensure_user(client: AsyncClient, db: AsyncSession, email: str, username: str, full_name: str, password: str, role: str):
     r = await client.post(
         "/api/v1/auth/register",
         json={
@@ -12,11 +27,14 @@ async def ensure_user(client: AsyncClient, email: str, username: str, full_name:
             "full_name": full_name,
             "password": password,
             "role": role,
+            **PROFILE,
         },
     )
     # allow already exists (when tests reuse fixture DB)
     if r.status_code not in (200, 201, 400):
         assert r.status_code in (200, 201, 400), r.text
+    await db.execute(update(User).where(User.username == username).values(is_verified=True))
+    await db.commit()
 
 
 async def login(client: AsyncClient, username: str, password: str) -> str:
@@ -29,6 +47,12 @@ async def login(client: AsyncClient, username: str, password: str) -> str:
     return r.json()["access_token"]
 
 
+async def current_user_id(client: AsyncClient, token: str) -> int:
+    r = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
 async def create_test_with_questions(client: AsyncClient, token: str, questions):
     payload = {
         "title": "QTypes Test",
@@ -70,9 +94,9 @@ async def get_test_detail(client: AsyncClient, token: str, test_id: int):
 
 
 @pytest.mark.asyncio
-async def test_single_choice(client: AsyncClient):
-    await ensure_user(client, "t_sc@example.com", "t_sc", "Teacher SC", "pass1234", "teacher")
-    await ensure_user(client, "s_sc@example.com", "s_sc", "Student SC", "pass1234", "student")
+async def test_single_choice(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_sc@example.com", "t_sc", "Teacher SC", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_sc@example.com", "s_sc", "Student SC", "pass1234", "student")
     teacher = await login(client, "t_sc", "pass1234")
     student = await login(client, "s_sc", "pass1234")
 
@@ -92,9 +116,9 @@ async def test_single_choice(client: AsyncClient):
             }
         ],
     )
-    await assign_to_student(client, teacher, test["id"], 2)
+    await assign_to_student(client, teacher, test["id"], await current_user_id(client, student))
     started_at = await start_attempt(client, student, test["id"])
-    detail = await get_test_detail(client, student, test["id"]) 
+    detail = await get_test_detail(client, teacher, test["id"]) 
     q = detail["questions"][0]
     correct_option = next(o for o in q["options"] if o["is_correct"]) 
     submit = {
@@ -111,9 +135,9 @@ async def test_single_choice(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_multiple_choice(client: AsyncClient):
-    await ensure_user(client, "t_mc@example.com", "t_mc", "Teacher MC", "pass1234", "teacher")
-    await ensure_user(client, "s_mc@example.com", "s_mc", "Student MC", "pass1234", "student")
+async def test_multiple_choice(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_mc@example.com", "t_mc", "Teacher MC", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_mc@example.com", "s_mc", "Student MC", "pass1234", "student")
     teacher = await login(client, "t_mc", "pass1234")
     student = await login(client, "s_mc", "pass1234")
 
@@ -134,9 +158,9 @@ async def test_multiple_choice(client: AsyncClient):
             }
         ],
     )
-    await assign_to_student(client, teacher, test["id"], 4)
+    await assign_to_student(client, teacher, test["id"], await current_user_id(client, student))
     started_at = await start_attempt(client, student, test["id"]) 
-    detail = await get_test_detail(client, student, test["id"]) 
+    detail = await get_test_detail(client, teacher, test["id"]) 
     q = detail["questions"][0]
     correct_ids = [o["id"] for o in q["options"] if o["is_correct"]]
     submit = {
@@ -153,9 +177,9 @@ async def test_multiple_choice(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_true_false_and_numeric(client: AsyncClient):
-    await ensure_user(client, "t_tf@example.com", "t_tf", "Teacher TF", "pass1234", "teacher")
-    await ensure_user(client, "s_tf@example.com", "s_tf", "Student TF", "pass1234", "student")
+async def test_true_false_and_numeric(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_tf@example.com", "t_tf", "Teacher TF", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_tf@example.com", "s_tf", "Student TF", "pass1234", "student")
     teacher = await login(client, "t_tf", "pass1234")
     student = await login(client, "s_tf", "pass1234")
 
@@ -208,9 +232,9 @@ async def test_true_false_and_numeric(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_numeric_with_comma_separator(client: AsyncClient):
-    await ensure_user(client, "t_numcomma@example.com", "t_numcomma", "Teacher NumComma", "pass1234", "teacher")
-    await ensure_user(client, "s_numcomma@example.com", "s_numcomma", "Student NumComma", "pass1234", "student")
+async def test_numeric_with_comma_separator(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_numcomma@example.com", "t_numcomma", "Teacher NumComma", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_numcomma@example.com", "s_numcomma", "Student NumComma", "pass1234", "student")
     teacher = await login(client, "t_numcomma", "pass1234")
     student = await login(client, "s_numcomma", "pass1234")
 
@@ -228,7 +252,7 @@ async def test_numeric_with_comma_separator(client: AsyncClient):
             },
         ],
     )
-    await assign_to_student(client, teacher, test["id"], 6)
+    await assign_to_student(client, teacher, test["id"], await current_user_id(client, student))
     started_at = await start_attempt(client, student, test["id"])
     detail = await get_test_detail(client, student, test["id"])
     question = detail["questions"][0]
@@ -250,9 +274,9 @@ async def test_numeric_with_comma_separator(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_fill_in_blank_and_ordering(client: AsyncClient):
-    await ensure_user(client, "t_fb@example.com", "t_fb", "Teacher FB", "pass1234", "teacher")
-    await ensure_user(client, "s_fb@example.com", "s_fb", "Student FB", "pass1234", "student")
+async def test_fill_in_blank_and_ordering(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_fb@example.com", "t_fb", "Teacher FB", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_fb@example.com", "s_fb", "Student FB", "pass1234", "student")
     teacher = await login(client, "t_fb", "pass1234")
     student = await login(client, "s_fb", "pass1234")
 
@@ -310,9 +334,9 @@ async def test_fill_in_blank_and_ordering(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_ordering_with_one_based_input(client: AsyncClient):
-    await ensure_user(client, "t_ordone@example.com", "t_ordone", "Teacher Ord1", "pass1234", "teacher")
-    await ensure_user(client, "s_ordone@example.com", "s_ordone", "Student Ord1", "pass1234", "student")
+async def test_ordering_with_one_based_input(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_ordone@example.com", "t_ordone", "Teacher Ord1", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_ordone@example.com", "s_ordone", "Student Ord1", "pass1234", "student")
     teacher = await login(client, "t_ordone", "pass1234")
     student = await login(client, "s_ordone", "pass1234")
 
@@ -333,7 +357,7 @@ async def test_ordering_with_one_based_input(client: AsyncClient):
             },
         ],
     )
-    await assign_to_student(client, teacher, test["id"], 8)
+    await assign_to_student(client, teacher, test["id"], await current_user_id(client, student))
     started_at = await start_attempt(client, student, test["id"])
     detail = await get_test_detail(client, student, test["id"])
     q_ord = detail["questions"][0]
@@ -359,9 +383,9 @@ async def test_ordering_with_one_based_input(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_matching_manual_text_and_file_upload_and_code(client: AsyncClient):
-    await ensure_user(client, "t_mx@example.com", "t_mx", "Teacher MX", "pass1234", "teacher")
-    await ensure_user(client, "s_mx@example.com", "s_mx", "Student MX", "pass1234", "student")
+async def test_matching_manual_text_and_file_upload_and_code(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_mx@example.com", "t_mx", "Teacher MX", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_mx@example.com", "s_mx", "Student MX", "pass1234", "student")
     teacher = await login(client, "t_mx", "pass1234")
     student = await login(client, "s_mx", "pass1234")
 
@@ -410,7 +434,7 @@ async def test_matching_manual_text_and_file_upload_and_code(client: AsyncClient
             },
         ],
     )
-    await assign_to_student(client, teacher, test["id"], 10)
+    await assign_to_student(client, teacher, test["id"], await current_user_id(client, student))
     started_at = await start_attempt(client, student, test["id"]) 
     detail = await get_test_detail(client, student, test["id"]) 
     q_match = detail["questions"][0]
@@ -430,19 +454,19 @@ async def test_matching_manual_text_and_file_upload_and_code(client: AsyncClient
     r = await client.post("/api/v1/results/submit", json=submit, headers={"Authorization": f"Bearer {student}"})
     assert r.status_code == 200, r.text
     data = r.json()
-    # Only matching is auto-graded among these, so earned should be 4 out of total (8)
+    # Only matching is auto-graded among these (short answer has no expected answers), so earned should be 4 out of total (8)
     assert data["points_total"] == 8
     assert data["points_earned"] == 4
     assert 49 < data["score"] < 51  # ~50%
     assert data["status"] == "pending_manual"
-    assert data["pending_answers_count"] == 3
+    assert data["pending_answers_count"] == 4
     assert data["is_passed"] is False
 
 
 @pytest.mark.asyncio
-async def test_short_answer_auto_grading(client: AsyncClient):
-    await ensure_user(client, "t_sa@example.com", "t_sa", "Teacher SA", "pass1234", "teacher")
-    await ensure_user(client, "s_sa@example.com", "s_sa", "Student SA", "pass1234", "student")
+async def test_short_answer_auto_grading(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_sa@example.com", "t_sa", "Teacher SA", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_sa@example.com", "s_sa", "Student SA", "pass1234", "student")
     teacher = await login(client, "t_sa", "pass1234")
     student = await login(client, "s_sa", "pass1234")
 
@@ -490,9 +514,9 @@ async def test_short_answer_auto_grading(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_short_answer_without_expected_answers_requires_manual(client: AsyncClient):
-    await ensure_user(client, "t_sam@example.com", "t_sam", "Teacher SA Manual", "pass1234", "teacher")
-    await ensure_user(client, "s_sam@example.com", "s_sam", "Student SA Manual", "pass1234", "student")
+async def test_short_answer_without_expected_answers_requires_manual(client: AsyncClient, db_session: AsyncSession):
+    await ensure_user(client, db_session, "t_sam@example.com", "t_sam", "Teacher SA Manual", "pass1234", "teacher")
+    await ensure_user(client, db_session, "s_sam@example.com", "s_sam", "Student SA Manual", "pass1234", "student")
     teacher = await login(client, "t_sam", "pass1234")
     student = await login(client, "s_sam", "pass1234")
 
@@ -533,6 +557,4 @@ async def test_short_answer_without_expected_answers_requires_manual(client: Asy
     assert data["status"] == "pending_manual"
     assert data["pending_answers_count"] == 1
     assert data["answers"][0]["is_correct"] is None
-    assert data["status"] == "auto_completed"
-    assert data["pending_answers_count"] == 0
 
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.core.redis_client import CircuitBreaker, RedisManager, RedisUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() is False and breaker.rejected == 1
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN and breaker.allow()
+    assert breaker.allow() is False  # one probe at a time
+    breaker.record_failure()  # failed probe re-opens immediately
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.allow() and not breaker.allow()
+    breaker.abandon_probe()  # no verdict: the next caller probes
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_guard_skips_redis_while_circuit_is_open():
+    manager = RedisManager(
+        "redis://127.0.0.1:1",
+        max_connections=4,
+        pool_timeout=0.1,
+        socket_timeout=0.2,
+        connect_timeout=0.2,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    with pytest.raises(RedisUnavailable):
+        async with manager.guard() as r:
+            await r.get("key")
+    assert manager.metrics()["circuit_state"] == "open"
+
+    with pytest.raises(RedisUnavailable):
+        async with manager.guard() as r:
+            raise AssertionError("client must not be used while the circuit is open")
+    assert manager.metrics()["rejected_calls"] == 1
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_exhaustion_falls_back_without_opening_the_circuit():
+    manager = RedisManager(
+        "redis://127.0.0.1:1",
+        max_connections=1,
+        pool_timeout=0.05,
+        socket_timeout=0.2,
+        connect_timeout=0.2,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    release = asyncio.Event()
+
+    async def hold_connection():
+        async with manager.guard():
+            await release.wait()
+
+    holder = asyncio.create_task(hold_connection())
+    await asyncio.sleep(0)
+    with pytest.raises(RedisUnavailable):
+        async with manager.guard():
+            raise AssertionError("no connection slot was free")
+    release.set()
+    await holder
+
+    metrics = manager.metrics()
+    assert (metrics["circuit_state"], metrics["pool_timeouts"], metrics["in_use_connections"]) == ("closed", 1, 0)
+    await manager.close()
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from app.models.test import Test, Question, QuestionOption, QuestionType
+from app.services.student_view import get_student_view, invalidate_student_view
+
+
+@pytest.mark.asyncio
+async def test_student_view_hides_answers_and_is_cached(session_factory, make_test):
+    test = await make_test(title="View", passing_score=50)
+
+    async with session_factory() as db:
+        question = Question(
+            test_id=test.id, question_text="Capital?", question_type=QuestionType.SHORT_ANSWER,
+            points=1, order=0, correct_answer_text="Paris",
+        )
+        db.add(question)
+        await db.flush()
+        db.add(QuestionOption(question_id=question.id, option_text="Paris", is_correct=True, order=0))
+        await db.commit()
+
+    async with session_factory() as db:
+        test = await db.get(Test, test.id)
+        snapshot = await get_student_view(db, test)
+        document = json.loads(snapshot.body)
+        assert document["questions"][0]["correct_answer_text"] is None
+        assert document["questions"][0]["options"][0]["is_correct"] is False
+        assert await get_student_view(db, test) is snapshot
+
+        await invalidate_student_view(test.id)
+        rebuilt = await get_student_view(db, test)
+        assert rebuilt is not snapshot and rebuilt.etag == snapshot.etag
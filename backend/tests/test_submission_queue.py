@@ -0,0 +1,139 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from app.models.test import Question, QuestionOption, QuestionType
+from app.models.result import TestResult
+from app.models.submission import QueuedSubmission
+from app.services import grading_worker
+from app.services.grading_worker import (
+    GradingWorkerPool, claim_next_submission, process_submission, requeue_stale_submissions,
+)
+
+
+def _pool(session_factory, **overrides) -> GradingWorkerPool:
+    options = dict(
+        concurrency=1, poll_interval=0.1, stale_after=timedelta(minutes=5),
+        max_attempts=3, retry_backoff=timedelta(seconds=10),
+    )
+    return GradingWorkerPool(session_factory, **{**options, **overrides})
+
+
+@pytest.mark.asyncio
+async def test_worker_grades_queued_submission(session_factory, student, make_test):
+    test = await make_test(title="Queue", passing_score=50)
+
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="2+2", question_type=QuestionType.SINGLE_CHOICE, points=1, order=0)
+        db.add(question)
+        await db.flush()
+        correct = QuestionOption(question_id=question.id, option_text="4", is_correct=True, order=0)
+        db.add(correct)
+        await db.flush()
+        now = datetime.now(timezone.utc)
+        submission = QueuedSubmission(
+            test_id=test.id,
+            student_id=student.id,
+            payload=[{"question_id": question.id, "answer_data": {"selected_option_id": correct.id}}],
+            started_at=now - timedelta(minutes=5),
+            submitted_at=now,
+            status="queued",
+            attempts=0,
+        )
+        db.add(submission)
+        await db.commit()
+        submission_id = submission.id
+
+    pool = _pool(session_factory)
+    assert await pool.drain_once() is True
+    assert await pool.drain_once() is False
+
+    async with session_factory() as db:
+        stored = (await db.execute(select(QueuedSubmission).where(QueuedSubmission.id == submission_id))).scalar_one()
+        assert stored.status == "completed"
+        assert stored.attempts == 1
+        result = (await db.execute(select(TestResult).where(TestResult.id == stored.result_id))).scalar_one()
+        assert result.score == 100
+        assert result.time_spent_minutes == 5
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_are_retried_with_backoff_then_failed(monkeypatch, session_factory, student, make_test):
+    test = await make_test(title="Retry", passing_score=50)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        submissions = [
+            QueuedSubmission(
+                test_id=test.id, student_id=student.id, payload=[], started_at=now, submitted_at=now,
+                status=status, attempts=attempts, claimed_at=now - timedelta(hours=1),
+            )
+            for status, attempts in [("queued", 0), ("processing", 1), ("processing", 2)]
+        ]
+        db.add_all(submissions)
+        await db.commit()
+        flaky, stale, exhausted = [submission.id for submission in submissions]
+
+    async def broken_finalize(*args, **kwargs):
+        raise RuntimeError("database hiccup")
+
+    monkeypatch.setattr(grading_worker, "finalize_attempt", broken_finalize)
+    pool = _pool(session_factory, max_attempts=2)
+
+    # Crashed workers left two rows processing: one is requeued, one is out of attempts
+    assert await pool.requeue_stale_once() == 1
+    assert await pool.drain_once() is True
+    async with session_factory() as db:
+        rows = {row.id: row for row in (await db.execute(select(QueuedSubmission))).scalars()}
+    assert (rows[flaky].status, rows[flaky].attempts) == ("queued", 1)
+    assert rows[flaky].retry_at is not None
+    assert rows[stale].status == "queued"
+    assert (rows[exhausted].status, rows[exhausted].error_code) == ("failed", 500)
+
+    # The stale row is claimed second time round and fails for good; the flaky one backs off
+    assert await pool.drain_once() is True
+    assert await pool.drain_once() is False
+    async with session_factory() as db:
+        await db.execute(update(QueuedSubmission).values(retry_at=now - timedelta(seconds=1)))
+        await db.commit()
+    assert await pool.drain_once() is True
+
+    async with session_factory() as db:
+        rows = {row.id: row for row in (await db.execute(select(QueuedSubmission))).scalars()}
+    assert [(rows[i].status, rows[i].error_code, rows[i].attempts) for i in (flaky, stale)] == [
+        ("failed", 500, 2), ("failed", 500, 2),
+    ]
+    assert await pool.drain_once() is False
+
+
+@pytest.mark.asyncio
+async def test_slow_worker_whose_row_was_reclaimed_records_nothing(session_factory, student, make_test):
+    test = await make_test(title="Lease", passing_score=50)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        question = Question(test_id=test.id, question_text="Q", question_type=QuestionType.ESSAY, points=1, order=0)
+        db.add(question)
+        await db.flush()
+        db.add(QueuedSubmission(
+            test_id=test.id, student_id=student.id, started_at=now, submitted_at=now, status="queued", attempts=0,
+            payload=[{"question_id": question.id, "answer_data": {"text": "answer"}}],
+        ))
+        await db.commit()
+
+    async with session_factory() as slow_db, session_factory() as fast_db:
+        slow = await claim_next_submission(slow_db)
+        # The slow worker exceeds stale_after: the row is requeued and claimed by another worker
+        assert await requeue_stale_submissions(fast_db, timedelta(seconds=-1), max_attempts=3) == 1
+        fast = await claim_next_submission(fast_db)
+        assert fast.lease_token != slow.lease_token
+
+        await process_submission(fast_db, fast, max_attempts=3, retry_backoff=timedelta(seconds=10))
+        await process_submission(slow_db, slow, max_attempts=3, retry_backoff=timedelta(seconds=10))
+
+    async with session_factory() as db:
+        stored = (await db.execute(select(QueuedSubmission))).scalar_one()
+        results = (await db.execute(select(TestResult))).scalars().all()
+    assert (stored.status, stored.attempts) == ("completed", 2)
+    assert [result.id for result in results] == [stored.result_id]
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.api.v1.endpoints.users import delete_user
+from app.models.result import TestResult
+from app.models.test_stats import TestStats
+from app.models.user import UserRole
+from app.services.test_stats import (
+    apply_stats_delta, contribution_delta, get_test_stats, rebuild_test_stats, record_result_created, result_contribution,
+    score_bucket,
+)
+from app.services.user_principal import UserPrincipal
+
+
+def test_score_bucket_edges():
+    assert score_bucket(0) == 0
+    assert score_bucket(9.99) == 0
+    assert score_bucket(10) == 1
+    assert score_bucket(100) == 9
+
+
+def _counters(row: TestStats) -> dict:
+    return {column.name: getattr(row, column.name) for column in TestStats.__table__.columns if column.name != "updated_at"}
+
+
+@pytest.mark.asyncio
+async def test_incremental_stats_match_rebuild(session_factory, make_user, make_test):
+    students = [await make_user() for _ in range(2)]
+    test = await make_test(title="Stats", passing_score=60)
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        results = []
+        for student, score, status, attempt in [
+            (students[0], 45.0, "auto_completed", 1),
+            (students[0], 80.0, "auto_completed", 2),
+            (students[1], 50.0, "pending_manual", 1),
+        ]:
+            result = TestResult(
+                test_id=test.id, student_id=student.id, score=score, points_earned=score, points_total=100,
+                is_passed=status != "pending_manual" and score >= 60, status=status,
+                started_at=now, completed_at=now, attempt_number=attempt,
+            )
+            db.add(result)
+            await db.flush()
+            await record_result_created(db, result)
+            results.append(result)
+        await db.commit()
+
+        # Manual grading completes the pending attempt with a passing score
+        pending = results[2]
+        before = result_contribution(pending)
+        pending.score, pending.status, pending.is_passed = 100.0, "completed", True
+        await apply_stats_delta(db, test.id, contribution_delta(before, result_contribution(pending)))
+        await db.commit()
+
+    async with session_factory() as db:
+        stats = await get_test_stats(db, test.id)
+        incremental = _counters(await db.get(TestStats, test.id))
+
+    assert stats["attempts"] == 3
+    assert stats["unique_students"] == 2
+    assert stats["pending_count"] == 0
+    assert stats["graded_count"] == 3
+    assert stats["average_score"] == pytest.approx(75.0)
+    assert stats["pass_rate"] == pytest.approx(200 / 3)
+    counts = {bucket["from"]: bucket["count"] for bucket in stats["histogram"]}
+    assert counts[40] == 1 and counts[80] == 1 and counts[90] == 1
+
+    async with session_factory() as db:
+        assert await rebuild_test_stats(db) == 1
+        await db.commit()
+    async with session_factory() as db:
+        rebuilt = (await db.execute(select(TestStats))).scalar_one()
+        assert _counters(rebuilt) == incremental
+
+    async with session_factory() as db:
+        empty = await get_test_stats(db, test.id + 1)
+    assert empty["attempts"] == 0 and empty["average_score"] is None
+
+
+@pytest.mark.asyncio
+async def test_unique_students_and_user_delete_rebuild(session_factory, make_user, make_test):
+    admin = await make_user(UserRole.ADMIN)
+    leaving, staying = await make_user(), await make_user()
+    test = await make_test(title="Stats")
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        # An attempt numbered 2 whose first attempt is gone still counts its student once
+        for student, attempts in [(leaving, [1, 2]), (staying, [2])]:
+            for attempt in attempts:
+                result = TestResult(
+                    test_id=test.id, student_id=student.id, score=90.0, points_earned=90, points_total=100,
+                    is_passed=True, status="auto_completed", started_at=now, completed_at=now,
+                    attempt_number=attempt,
+                )
+                db.add(result)
+                await db.flush()
+                await record_result_created(db, result)
+        await db.commit()
+    async with session_factory() as db:
+        stats = await get_test_stats(db, test.id)
+    assert (stats["attempts"], stats["unique_students"]) == (3, 2)
+
+    principal = UserPrincipal(id=admin.id, role=admin.role, is_active=True, is_verified=True)
+    async with session_factory() as db:
+        await delete_user(leaving.id, db=db, current_user=principal)
+    async with session_factory() as db:
+        stats = await get_test_stats(db, test.id)
+    assert (stats["attempts"], stats["unique_students"], stats["graded_count"]) == (1, 1, 1)
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import update
+
+from app.models.user import User, UserRole
+from app.services.user_principal import (
+    PrincipalCache,
+    UserPrincipal,
+    get_user_principal,
+    invalidate_user_principals,
+)
+
+
+def test_principal_cache_expires_entries():
+    now = [0.0]
+    cache = PrincipalCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    principal = UserPrincipal(id=1, role=UserRole.STUDENT, is_active=True, is_verified=False)
+    cache.put(principal)
+    assert cache.get(1) == principal
+    now[0] = 10
+    assert cache.get(1) is None
+    assert UserPrincipal.from_json(principal.to_json()) == principal
+
+
+@pytest.mark.asyncio
+async def test_principal_is_cached_until_invalidated(session_factory, teacher):
+    async with session_factory() as db:
+        principal = await get_user_principal(db, teacher.id)
+        assert principal == UserPrincipal(id=teacher.id, role=UserRole.TEACHER, is_active=True, is_verified=False)
+
+        await db.execute(update(User).where(User.id == teacher.id).values(is_active=False))
+        await db.commit()
+        assert (await get_user_principal(db, teacher.id)).is_active is True
+
+        await invalidate_user_principals([teacher.id])
+        assert (await get_user_principal(db, teacher.id)).is_active is False
+        assert await get_user_principal(db, teacher.id + 1) is None
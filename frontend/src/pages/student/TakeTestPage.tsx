@@ -26,6 +26,7 @@ export default function TakeTestPage() {
   const { id } = useParams<{ id: string }>()
   const navigate = useNavigate()
   const [startedAt, setStartedAt] = useState<string>('')
+  const [attemptId, setAttemptId] = useState<number | null>(null)
   const [timeLeft, setTimeLeft] = useState<number | null>(null)
   const [matchingShuffles, setMatchingShuffles] = useState<Record<number, { id: number; option_text: string; displayNumber: number }[]>>({})
   const [orderingShuffles, setOrderingShuffles] = useState<Record<number, QuestionSchema['options']>>({})
@@ -40,18 +41,9 @@ export default function TakeTestPage() {
   const [noticeModal, setNoticeModal] = useState<NoticeModalConfig | null>(null)
   const [pendingSubmission, setPendingSubmission] = useState<any | null>(null)
   const [selectedFiles, setSelectedFiles] = useState<Record<number, string>>({})
-  const [fileAnswers, setFileAnswers] = useState<Record<number, { file_name: string; file_type: string; file_size: number; file_content: string }>>({})
+  const [fileAnswers, setFileAnswers] = useState<Record<number, { file_name: string; file_type: string; file_size: number; file_token: string }>>({})
   const antiCheatTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null)
 
-  const readFileAsBase64 = (file: File): Promise<string> => {
-    return new Promise((resolve, reject) => {
-      const reader = new FileReader()
-      reader.onload = () => resolve((reader.result as string) || '')
-      reader.onerror = () => reject(new Error('Не удалось прочитать файл'))
-      reader.readAsDataURL(file)
-    })
-  }
-
   const queryClient = useQueryClient()
 
   const { data: test, isLoading } = useQuery({
@@ -113,17 +105,12 @@ export default function TakeTestPage() {
     }
 
     try {
-      const file_content = await readFileAsBase64(file)
+      const uploaded = await resultService.uploadAnswerFile(file)
       setSelectedFiles((prev) => ({ ...prev, [qIndex]: file.name }))
       if (questionId !== undefined) {
         setFileAnswers((prev) => ({
           ...prev,
-          [questionId]: {
-            file_name: file.name,
-            file_type: file.type,
-            file_size: file.size,
-            file_content,
-          },
+          [questionId]: uploaded,
         }))
       }
       setValue(`answers.${qIndex}.file`, input.files, { shouldDirty: true, shouldTouch: true, shouldValidate: true })
@@ -136,7 +123,7 @@ export default function TakeTestPage() {
       }
     } catch {
       setNoticeModal({
-        title: 'Не удалось прочитать файл',
+        title: 'Не удалось загрузить файл',
         message: 'Попробуйте выбрать файл снова или другой файл.',
       })
       input.value = ''
@@ -234,6 +221,7 @@ export default function TakeTestPage() {
     setShowInstructions(true)
     setIsTestActive(false)
     setStartedAt('')
+    setAttemptId(null)
     setTimeLeft(null)
     setCurrentQuestionIndex(0)
     setFullscreenWarning(false)
@@ -271,6 +259,12 @@ export default function TakeTestPage() {
   }, [timeLeft])
 
   const startTestMutation = useMutation({
+    // A whole class starting at once may be asked to come back after Retry-After seconds
+    retry: (failureCount, err: any) => err?.response?.status === 503 && failureCount < 5,
+    retryDelay: (failureCount, err: any) => {
+      const retryAfter = Number(err?.response?.headers?.['retry-after'])
+      return (Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter * 1000 : 1000 * failureCount) + Math.random() * 500
+    },
     mutationFn: async () => {
       if (!test) {
         throw new Error('Тест недоступен')
@@ -279,7 +273,11 @@ export default function TakeTestPage() {
     },
     onSuccess: (data) => {
       setStartedAt(data.started_at)
-      if (test?.duration_minutes) {
+      setAttemptId(data.attempt_id)
+      // A resumed attempt keeps its original server deadline
+      if (data.deadline_at) {
+        setTimeLeft(Math.max(0, Math.floor((new Date(data.deadline_at).getTime() - Date.now()) / 1000)))
+      } else if (test?.duration_minutes) {
         setTimeLeft(test.duration_minutes * 60)
       } else {
         setTimeLeft(null)
@@ -310,6 +308,8 @@ export default function TakeTestPage() {
   })
 
   const submitMutation = useMutation({
+    // Resend after network failures: the attempt's idempotency key makes retries safe
+    retry: (failureCount, err: any) => attemptId !== null && !err?.response && failureCount < 3,
     mutationFn: async (formData: any) => {
       if (!startedAt) {
         throw new Error('Не удалось зафиксировать время начала теста. Обновите страницу и попробуйте снова.');
@@ -419,7 +419,7 @@ export default function TakeTestPage() {
               answerData.file_name = stored.file_name
               answerData.file_type = stored.file_type
               answerData.file_size = stored.file_size
-              answerData.file_content = stored.file_content
+              answerData.file_token = stored.file_token
               break
             }
 
@@ -436,17 +436,18 @@ export default function TakeTestPage() {
             }
 
             if (file) {
-              answerData.file_name = file.name
-              answerData.file_type = file.type
-              answerData.file_size = file.size
-              answerData.file_content = await readFileAsBase64(file)
+              const uploaded = await resultService.uploadAnswerFile(file)
+              answerData.file_name = uploaded.file_name
+              answerData.file_type = uploaded.file_type
+              answerData.file_size = uploaded.file_size
+              answerData.file_token = uploaded.file_token
               break
             }
 
             answerData.file_name = rawAnswer.file_name ?? null
             answerData.file_type = rawAnswer.file_type ?? null
             answerData.file_size = rawAnswer.file_size ?? null
-            answerData.file_content = rawAnswer.file_content ?? null
+            answerData.file_token = rawAnswer.file_token ?? null
             break
           }
           default:
@@ -459,7 +460,10 @@ export default function TakeTestPage() {
         };
       }));
 
-      return resultService.submitTest(test!.id, startedAt, answers);
+      return resultService.submitTest(test!.id, startedAt, answers, {
+        attemptId: attemptId ?? undefined,
+        idempotencyKey: attemptId !== null ? `attempt-${attemptId}-submit` : undefined,
+      });
     },
     onSuccess: async () => {
       await exitFullscreen()
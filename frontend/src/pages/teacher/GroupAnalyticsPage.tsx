@@ -13,7 +13,15 @@ export default function GroupAnalyticsPage() {
       const params = new URLSearchParams()
       if (testId) params.append('test_id', String(testId))
       const res = await api.get(`/groups/${id}/analytics${params.toString() ? `?${params.toString()}` : ''}`)
-      return res.data as { count: number; avg_score: number; pass_rate: number; test_title?: string | null }
+      return res.data as {
+        count: number
+        avg_score: number
+        pass_rate: number
+        median_score: number | null
+        percentiles: Record<string, number | null>
+        histogram: { from: number; to: number; count: number }[]
+        test_title?: string | null
+      }
     },
     enabled: !!id,
   })
@@ -47,19 +55,39 @@ export default function GroupAnalyticsPage() {
         ) : !data ? (
           <div className="text-center py-12 text-gray-600">Нет данных</div>
         ) : (
-          <div className="grid gap-6 sm:grid-cols-3">
-            <div>
-              <p className="text-gray-500">Работ сдано</p>
-              <p className="text-2xl font-bold">{data.count}</p>
-            </div>
-            <div>
-              <p className="text-gray-500">Средняя оценка</p>
-              <p className="text-2xl font-bold">{data.avg_score.toFixed(1)}%</p>
-            </div>
-            <div>
-              <p className="text-gray-500">Доля зачёта</p>
-              <p className="text-2xl font-bold">{data.pass_rate.toFixed(1)}%</p>
+          <div className="space-y-6">
+            <div className="grid gap-6 sm:grid-cols-4">
+              <div>
+                <p className="text-gray-500">Работ сдано</p>
+                <p className="text-2xl font-bold">{data.count}</p>
+              </div>
+              <div>
+                <p className="text-gray-500">Средняя оценка</p>
+                <p className="text-2xl font-bold">{data.avg_score.toFixed(1)}%</p>
+              </div>
+              <div>
+                <p className="text-gray-500">Медиана</p>
+                <p className="text-2xl font-bold">{data.median_score != null ? `${data.median_score.toFixed(1)}%` : '—'}</p>
+              </div>
+              <div>
+                <p className="text-gray-500">Доля зачёта</p>
+                <p className="text-2xl font-bold">{data.pass_rate.toFixed(1)}%</p>
+              </div>
             </div>
+            {data.count > 0 && (
+              <div className="space-y-1">
+                <p className="text-gray-500">Распределение оценок</p>
+                {data.histogram.map((bucket) => (
+                  <div key={bucket.from} className="flex items-center gap-3 text-sm">
+                    <span className="w-16 text-gray-500">{bucket.from}–{bucket.to}</span>
+                    <div className="flex-1 bg-gray-100 rounded h-3">
+                      <div className="bg-primary-500 h-3 rounded" style={{ width: `${(bucket.count / data.count) * 100}%` }} />
+                    </div>
+                    <span className="w-8 text-right">{bucket.count}</span>
+                  </div>
+                ))}
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -1,24 +1,61 @@
 import api from '@/lib/api'
-import { TestResult, TestResultListItem, Answer } from '@/types'
+import { TestResult, TestResultListItem, Answer, GradingQueueItem } from '@/types'
+
+// Retries with the same key get the first response back instead of repeating the request
+const idempotencyHeaders = (key?: string) => (key ? { 'Idempotency-Key': key } : undefined)
 
 export const resultService = {
-  async startTest(testId: number): Promise<{ started_at: string }> {
-    const response = await api.post<{ message: string; test_id: number; started_at: string }>(
-      '/results/start',
-      { test_id: testId }
-    )
-    return { started_at: response.data.started_at }
+  async startTest(
+    testId: number,
+    options?: { idempotencyKey?: string }
+  ): Promise<{ attempt_id: number; started_at: string; deadline_at: string | null }> {
+    const response = await api.post<{
+      message: string
+      test_id: number
+      attempt_id: number
+      started_at: string
+      deadline_at: string | null
+      status: string
+    }>('/results/start', { test_id: testId }, { headers: idempotencyHeaders(options?.idempotencyKey) })
+    const { attempt_id, started_at, deadline_at } = response.data
+    return { attempt_id, started_at, deadline_at }
+  },
+
+  async uploadAnswerFile(
+    file: File
+  ): Promise<{ file_token: string; file_name: string; file_type: string; file_size: number }> {
+    const response = await api.post('/results/uploads', file, {
+      params: { file_name: file.name },
+      headers: { 'Content-Type': file.type || 'application/octet-stream' },
+    })
+    return response.data
   },
 
-  async submitTest(testId: number, startedAt: string, answers: Answer[]): Promise<TestResult> {
+  async submitTest(
+    testId: number,
+    startedAt: string,
+    answers: Answer[],
+    options?: { fromDraft?: boolean; attemptId?: number; idempotencyKey?: string }
+  ): Promise<TestResult> {
     const response = await api.post<TestResult>('/results/submit', {
       test_id: testId,
+      attempt_id: options?.attemptId,
       started_at: startedAt,
       answers: answers,
-    })
+      from_draft: options?.fromDraft ?? false,
+    }, { headers: idempotencyHeaders(options?.idempotencyKey) })
     return response.data
   },
 
+  async saveDraft(testId: number, answers: Answer[]): Promise<void> {
+    await api.patch(`/results/drafts/${testId}`, { answers })
+  },
+
+  async getDraft(testId: number): Promise<Answer[]> {
+    const response = await api.get<{ test_id: number; answers: Answer[] }>(`/results/drafts/${testId}`)
+    return response.data.answers
+  },
+
   async getResults(testId?: number, studentId?: number): Promise<TestResultListItem[]> {
     const params = new URLSearchParams()
     if (testId) params.append('test_id', testId.toString())
@@ -48,6 +85,25 @@ export const resultService = {
     return response.data
   },
 
+  async getGradingQueue(params?: { test_id?: number; limit?: number; cursor?: string }) {
+    const response = await api.get<GradingQueueItem[]>('/results/grading-queue', { params })
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] as string | undefined }
+  },
+
+  async gradeAnswers(
+    grades: { answerId: number; isCorrect: boolean; pointsEarned: number; teacherComment?: string }[]
+  ): Promise<Answer[]> {
+    const response = await api.post<Answer[]>('/results/grade-answers', {
+      grades: grades.map((grade) => ({
+        answer_id: grade.answerId,
+        is_correct: grade.isCorrect,
+        points_earned: grade.pointsEarned,
+        teacher_comment: grade.teacherComment,
+      })),
+    })
+    return response.data
+  },
+
   async downloadAnswerFile(answerId: number): Promise<Blob> {
     const response = await api.get(`/results/answers/${answerId}/file`, { responseType: 'blob' })
     return response.data
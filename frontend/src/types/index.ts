@@ -143,6 +143,8 @@ export interface Test {
   shuffle_questions: boolean
   shuffle_options: boolean
   status: TestStatus
+  exam_opens_at?: string | null
+  exam_closes_at?: string | null
   creator_id: number
   created_at: string
   updated_at?: string
@@ -178,6 +180,25 @@ export interface Answer {
   teacher_comment?: string
 }
 
+export interface GradingQueueItem {
+  id: number
+  test_result_id: number
+  test_id: number
+  test_title: string
+  question_id: number
+  question_text: string
+  question_type: QuestionType
+  max_points: number
+  student_id: number
+  student_full_name?: string
+  student_username?: string
+  answer_data: Record<string, any> | null
+  file_name?: string | null
+  file_type?: string | null
+  file_size?: number | null
+  created_at: string
+}
+
 export interface TestResult {
   id: number
   test_id: number